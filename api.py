@@ -0,0 +1,232 @@
+# Local HTTP API over the kinetics engine, for LIMS integration.
+#
+# Usage: uvicorn api:app --port 8600
+#
+#   POST /ic50   {"concentrations": [...], "activities": [...]}
+#   POST /ki     {"inhibition_type": "Competitive", "ic50": 10, "substrate_conc": 50, "km": 10}
+#   POST /rate   {"mechanism": "Competitive Inhibition", "km": 10, "vmax": 100,
+#                 "inhibitor_conc": 5, "ki": 2, "substrate": [1, 10, 100]}
+#   POST /batch/{kind}   {"items": [{...}, ...]} or one JSON object per line;
+#                        streams one NDJSON result per item, in input order
+#
+# Evaluation runs in a process pool so the event loop never blocks on a fit.
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from kinetics import apparent_parameters, cheng_prusoff_ki, inhibitor_alpha, interpolate_ic50, michaelis_menten
+
+MAX_WORKERS = int(os.environ.get("KINETICS_API_WORKERS", os.cpu_count() or 1))
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("KINETICS_API_MAX_REQUESTS", 32))
+MAX_BATCH_ITEMS = 100_000
+BATCH_CHUNK = 256        # items per pool task, to amortize process overhead
+BATCH_IN_FLIGHT = 2      # chunks per batch request queued ahead of the stream
+
+
+# Evaluators run in the worker processes: plain dict in, plain dict out
+
+def evaluate_ic50(params):
+    concentrations = np.asarray(params["concentrations"], dtype=float).ravel()
+    activities = np.asarray(params["activities"], dtype=float).ravel()
+    if len(concentrations) != len(activities):
+        raise ValueError(f"concentrations and activities differ in length "
+                         f"({len(concentrations)} vs {len(activities)})")
+    if len(concentrations) == 0:
+        raise ValueError("concentrations and activities must not be empty")
+    ic50, conc_sorted, act_sorted = interpolate_ic50(concentrations, activities)
+    return {"ic50": ic50, "n_points": len(conc_sorted)}
+
+
+def evaluate_ki(params):
+    ic50, substrate_conc, km = float(params["ic50"]), float(params["substrate_conc"]), float(params["km"])
+    if km <= 0 or substrate_conc <= 0:
+        raise ValueError("km and substrate_conc must be positive")
+    return {"ki": cheng_prusoff_ki(params["inhibition_type"], ic50, substrate_conc, km)}
+
+
+def evaluate_rate(params):
+    km, vmax = float(params["km"]), float(params["vmax"])
+    alpha = inhibitor_alpha(float(params.get("inhibitor_conc", 0.0)), float(params.get("ki", 1.0)))
+    alpha_prime = params.get("alpha_prime")
+    km_app, vmax_app = apparent_parameters(params["mechanism"], km, vmax, alpha,
+                                           None if alpha_prime is None else float(alpha_prime))
+    result = {"alpha": alpha, "km_app": km_app, "vmax_app": vmax_app}
+    if "substrate" in params:
+        substrate = np.asarray(params["substrate"], dtype=float)
+        result["velocity"] = michaelis_menten(substrate, km_app, vmax_app).tolist()
+    return result
+
+
+EVALUATORS = {"ic50": evaluate_ic50, "ki": evaluate_ki, "rate": evaluate_rate}
+
+
+def run_one(kind, params):
+    # Never raises: in a batch, one bad item must yield one error line, not
+    # end the stream and lose the rest of its chunk
+    try:
+        return {"ok": True, **EVALUATORS[kind](params)}
+    except (KeyError, TypeError, ValueError) as e:
+        message = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+        return {"ok": False, "error": message}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_chunk(kind, chunk):
+    return [run_one(kind, params) for params in chunk]
+
+
+def clean(value):
+    # JSON has no NaN/inf
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, list):
+        return [clean(v) for v in value]
+    if isinstance(value, dict):
+        return {k: clean(v) for k, v in value.items()}
+    return value
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    app.state.requests = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    try:
+        yield
+    finally:
+        app.state.pool.shutdown(cancel_futures=True)
+
+
+def error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def claim_slot(request):
+    # Reject rather than queue: a LIMS client retries, a stalled socket doesn't.
+    # acquire() returns without suspending on an unlocked semaphore, so no other
+    # request can take the slot between the check and the claim.
+    semaphore = request.app.state.requests
+    if semaphore.locked():
+        return False
+    await semaphore.acquire()
+    return True
+
+
+class SlotStreamingResponse(StreamingResponse):
+    # Holds a claimed request slot until the stream ends, however it ends; a
+    # client gone before the first chunk never starts the generator, so its
+    # finally alone can't be relied on
+    def __init__(self, content, semaphore, **kwargs):
+        super().__init__(content, **kwargs)
+        self.semaphore = semaphore
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.semaphore.release()
+
+
+async def read_items(request):
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    payload = json.loads(body)
+    return payload["items"] if isinstance(payload, dict) else payload
+
+
+async def read_batch(request):
+    # (items, None), or (None, error response) for a malformed or oversized body
+    try:
+        items = await read_items(request)
+    except (ValueError, KeyError, TypeError):
+        return None, error('body must be {"items": [...]}, a JSON list, or NDJSON')
+    if not isinstance(items, list):
+        return None, error("items must be a list")
+    if len(items) > MAX_BATCH_ITEMS:
+        return None, error(f"batch too large ({len(items)} > {MAX_BATCH_ITEMS} items)", 413)
+    return items, None
+
+
+async def single(request):
+    kind = request.url.path.strip("/")
+    if not await claim_slot(request):
+        return error("too many concurrent requests", 503)
+    try:
+        try:
+            params = await request.json()
+        except ValueError:
+            return error("request body must be JSON")
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(request.app.state.pool, run_one, kind, params)
+    finally:
+        request.app.state.requests.release()
+    return JSONResponse(clean(result), status_code=200 if result["ok"] else 422)
+
+
+async def batch(request):
+    kind = request.path_params["kind"]
+    if kind not in EVALUATORS:
+        return error(f"unknown batch kind '{kind}', expected one of {sorted(EVALUATORS)}", 404)
+    if not await claim_slot(request):
+        return error("too many concurrent requests", 503)
+    semaphore = request.app.state.requests
+    try:
+        items, problem = await read_batch(request)
+    except BaseException:
+        semaphore.release()
+        raise
+    if problem is not None:
+        semaphore.release()
+        return problem
+
+    pool = request.app.state.pool
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        chunks = [items[i:i + BATCH_CHUNK] for i in range(0, len(items), BATCH_CHUNK)]
+        pending = []
+        index = 0
+        try:
+            for chunk in chunks:
+                pending.append(loop.run_in_executor(pool, run_chunk, kind, chunk))
+                # Bound the work queued per request; a slow reader applies backpressure
+                if len(pending) < BATCH_IN_FLIGHT:
+                    continue
+                for result in await pending.pop(0):
+                    yield json.dumps(clean({"index": index, **result})) + "\n"
+                    index += 1
+            for future in pending:
+                for result in await future:
+                    yield json.dumps(clean({"index": index, **result})) + "\n"
+                    index += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+    # The slot claimed above is released when the response finishes
+    return SlotStreamingResponse(stream(), semaphore, media_type="application/x-ndjson")
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "workers": MAX_WORKERS, "kinds": sorted(EVALUATORS)})
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/ic50", single, methods=["POST"]),
+        Route("/ki", single, methods=["POST"]),
+        Route("/rate", single, methods=["POST"]),
+        Route("/batch/{kind}", batch, methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
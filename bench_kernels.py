@@ -0,0 +1,115 @@
+# Benchmarks the numerical kernels (kernels.py) on 10^6-point evaluations,
+# NumPy against the Numba-compiled versions, and checks they agree. Then times
+# the float32 / out= path of the rate laws (kinetics.py) against fresh float64
+# arrays and checks the float32 error stays within its documented bound.
+#
+# Usage:
+#   pip install numba
+#   python bench_kernels.py --points 1000000 --repeat 5
+import argparse
+import time
+
+import numpy as np
+
+import kernels
+from kinetics import FLOAT32_ROUNDOFF, hill_response, michaelis_menten
+
+
+def best_of(fn, repeat):
+    fn()  # first call compiles (or loads the on-disk cache)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def cases(points, curve_points=10):
+    rng = np.random.default_rng(0)
+    substrate = rng.uniform(0.1, 500, points)
+
+    # Fitter inner loop: points / curve_points curves with per-curve parameters
+    n = points // curve_points
+    log_conc = np.tile(np.linspace(-3, 2, curve_points), (n, 1))
+    params = np.column_stack([rng.uniform(90, 110, n), rng.uniform(-10, 10, n),
+                              rng.uniform(-2, 1, n), rng.uniform(0.5, 2, n)])
+    act, _ = kernels.hill_model(log_conc, *(params[:, k:k + 1] for k in range(4)))
+    act = act + rng.normal(0, 3, act.shape)
+    weights = np.ones_like(act)
+
+    numpy_cases = {
+        "Michaelis-Menten": lambda: 80.0 * substrate / (25.0 + substrate),
+        "Hill normal equations": lambda: kernels._numpy_normal_equations(log_conc, act, weights, params),
+        "Hill cost": lambda: kernels._numpy_cost(log_conc, act, weights, params),
+    }
+    jit_cases = {
+        "Michaelis-Menten": lambda: kernels.michaelis_menten(substrate, 25.0, 80.0),
+        "Hill normal equations": lambda: kernels.hill_normal_equations(log_conc, act, weights, params),
+        "Hill cost": lambda: kernels.hill_cost(log_conc, act, weights, params),
+    }
+    return numpy_cases, jit_cases
+
+
+def max_relative_difference(a, b):
+    a, b = (a, b) if isinstance(a, tuple) else ((a,), (b,))
+    return max(float(np.max(np.abs(x - y) / np.maximum(np.abs(x), 1e-12))) for x, y in zip(a, b))
+
+
+def float32_cases(points):
+    # (float64 reference, float32 into a reused buffer, bound on |float32 - float64|)
+    rng = np.random.default_rng(1)
+    u = FLOAT32_ROUNDOFF
+    substrate = rng.uniform(0.1, 500, points)
+    substrate32 = substrate.astype(np.float32)
+    conc = np.logspace(-4, 4, points)
+    conc32 = conc.astype(np.float32)
+    top, bottom, ic50, h = 100.0, 2.0, 0.35, 1.3
+    work = kernels.workspace()
+    return {
+        "Michaelis-Menten": (
+            lambda: michaelis_menten(substrate, 25.0, 80.0),
+            lambda: michaelis_menten(substrate32, 25.0, 80.0, out=work.take("v", points, np.float32)),
+            lambda v: 6 * u * np.abs(v)),
+        "Hill response": (
+            lambda: hill_response(conc, top, bottom, ic50, h),
+            lambda: hill_response(conc32, top, bottom, ic50, h, out=work.take("y", points, np.float32)),
+            lambda y: u * (abs(top) + abs(bottom)) * (8 + 4 * h + h * np.abs(np.log(conc / ic50)))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NumPy and Numba kernels.")
+    parser.add_argument("--points", type=int, default=1_000_000, help="Points per evaluation")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per kernel (best is reported)")
+    args = parser.parse_args()
+
+    numpy_cases, jit_cases = cases(args.points)
+    print(f"{args.points:,} points, best of {args.repeat}")
+    if not kernels.JIT_ENABLED:
+        print("Numba is not installed (or POSTER_JIT=0); showing the NumPy timings only.")
+    print(f"{'kernel':<24}{'numpy (ms)':>12}{'numba (ms)':>12}{'speedup':>10}{'max rel diff':>14}")
+    for name, numpy_fn in numpy_cases.items():
+        numpy_time = best_of(numpy_fn, args.repeat)
+        if kernels.JIT_ENABLED:
+            jit_fn = jit_cases[name]
+            jit_time = best_of(jit_fn, args.repeat)
+            diff = max_relative_difference(numpy_fn(), jit_fn())
+            print(f"{name:<24}{numpy_time * 1e3:>12.1f}{jit_time * 1e3:>12.1f}{numpy_time / jit_time:>9.1f}x"
+                  f"{diff:>14.1e}")
+        else:
+            print(f"{name:<24}{numpy_time * 1e3:>12.1f}{'-':>12}{'-':>10}{'-':>14}")
+
+    print()
+    print(f"{'rate law':<24}{'f64 (ms)':>12}{'f32 (ms)':>12}{'speedup':>10}{'err / bound':>14}")
+    for name, (reference_fn, float32_fn, bound) in float32_cases(args.points).items():
+        reference_time = best_of(reference_fn, args.repeat)
+        float32_time = best_of(float32_fn, args.repeat)
+        reference = reference_fn()
+        worst = float(np.max(np.abs(float32_fn() - reference) / bound(reference)))
+        print(f"{name:<24}{reference_time * 1e3:>12.1f}{float32_time * 1e3:>12.1f}"
+              f"{reference_time / float32_time:>9.1f}x{worst:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
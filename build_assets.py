@@ -0,0 +1,80 @@
+# Asset build step: pre-renders the mechanism schematics to SVG and copies the
+# stylesheet into static/ under content-hashed names, so Streamlit's static file
+# serving (and serve.py's cache headers) can deliver them instead of every rerun.
+#
+# Usage: python build_assets.py
+# Rendering needs kaleido (pip install kaleido) and a Chrome install it can use.
+import hashlib
+import json
+import os
+import re
+
+from schematics import MECHANISM_SCHEMATICS
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+CSS_PATH = os.path.join(APP_DIR, "assets", "poster.css")
+
+SCHEMATIC_WIDTH = 500  # px, roughly the width of the Mechanisms left column
+
+
+def hashed_name(stem, ext, data):
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f"{stem}.{digest}.{ext}"
+
+
+def optimize_svg(svg):
+    # Kaleido output is already compact; drop inter-tag whitespace and comments
+    svg = re.sub(r"<!--.*?-->", "", svg, flags=re.S)
+    return re.sub(r">\s+<", "><", svg).strip()
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,>])\s*", r"\1", css).strip()
+
+
+def write_asset(name, data):
+    with open(os.path.join(STATIC_DIR, name), "wb") as f:
+        f.write(data)
+
+
+def build_assets():
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    manifest_path = os.path.join(STATIC_DIR, "manifest.json")
+
+    # Remove files from the previous build so stale hashes don't pile up
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            for old_name in json.load(f).values():
+                old_path = os.path.join(STATIC_DIR, old_name)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+
+    manifest = {}
+
+    for mechanism, (slug, builder) in MECHANISM_SCHEMATICS.items():
+        fig = builder()
+        fig.update_layout(paper_bgcolor="rgba(0,0,0,0)")
+        svg = fig.to_image(format="svg", width=SCHEMATIC_WIDTH, height=fig.layout.height)
+        data = optimize_svg(svg.decode("utf-8")).encode("utf-8")
+        name = hashed_name(f"schematic_{slug}", "svg", data)
+        write_asset(name, data)
+        manifest[f"schematic_{slug}.svg"] = name
+        print(f"{mechanism}: {name} ({len(data)} bytes)")
+
+    with open(CSS_PATH, encoding="utf-8") as f:
+        data = minify_css(f.read()).encode("utf-8")
+    name = hashed_name("poster", "css", data)
+    write_asset(name, data)
+    manifest["poster.css"] = name
+    print(f"Stylesheet: {name} ({len(data)} bytes)")
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    build_assets()
@@ -0,0 +1,103 @@
+# Builds a serverless copy of the poster: a single index.html that runs the app
+# in the browser through stlite (Streamlit on Pyodide). All computation happens
+# client-side, so dist/ can be served from any static file host.
+#
+# Usage:
+#   python build_static_bundle.py --out dist
+#   python -m http.server -d dist 8000
+import argparse
+import glob
+import json
+import os
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTRYPOINT = "enzyme_poster_final.py"
+
+STLITE_VERSION = "0.80.5"
+STLITE_CDN = "https://cdn.jsdelivr.net/npm/@stlite/browser@{version}/build"
+
+# Only the modules and data the app imports at runtime. The build and export
+# scripts (kaleido, Pillow, starlette) never run in the browser, and neither
+# do the batch jobs (jobs.py, fit_cache.py), which need worker processes.
+# kernels.py falls back to NumPy there, since Pyodide has no Numba.
+BUNDLE_FILES = [ENTRYPOINT, "kinetics.py", "kernels.py", "fitting.py", "sensitivity.py", "design.py", "synergy.py",
+                "selectivity.py", "pkpd.py", "figures.py", "schematics.py", "cache_backend.py", "exports.py",
+                "plates.py", "assets/poster.css", "guides/*.md"]
+
+# numpy and pandas ship with stlite's Streamlit; everything else is fetched by
+# micropip before first paint, so keep this list to what the sections import.
+REQUIREMENTS = ["plotly", "streamlit-option-menu"]
+
+# Streamlit reads this from .streamlit/config.toml on a server; there's no static
+# file serving in the browser, so the app inlines its CSS instead.
+STREAMLIT_CONFIG = """[theme]
+base = "light"
+"""
+
+PAGE_TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="UTF-8" />
+    <meta http-equiv="X-UA-Compatible" content="IE=edge" />
+    <meta name="viewport" content="width=device-width, initial-scale=1, shrink-to-fit=no" />
+    <title>{title}</title>
+    <link rel="stylesheet" href="{cdn}/stlite.css" />
+  </head>
+  <body>
+    <div id="root"></div>
+    <script type="module">
+      import {{ mount }} from "{cdn}/stlite.js";
+      mount({options}, document.getElementById("root"));
+    </script>
+  </body>
+</html>
+"""
+
+
+def collect_files():
+    files = {}
+    for pattern in BUNDLE_FILES:
+        for path in sorted(glob.glob(os.path.join(APP_DIR, pattern))):
+            name = os.path.relpath(path, APP_DIR).replace(os.sep, "/")
+            with open(path, encoding="utf-8-sig") as f:
+                files[name] = f.read()
+    files[".streamlit/config.toml"] = STREAMLIT_CONFIG
+    return files
+
+
+def script_json(value):
+    # JSON is valid JS, but "</script>" inside an embedded file would end the tag
+    return json.dumps(value, ensure_ascii=False).replace("</", "<\\/")
+
+
+def build_bundle(out_dir="dist", version=STLITE_VERSION, title="Enzyme Inhibitors in Drug Development"):
+    files = collect_files()
+    options = {
+        "requirements": REQUIREMENTS,
+        "entrypoint": ENTRYPOINT,
+        "files": files,
+    }
+    html = PAGE_TEMPLATE.format(title=title, cdn=STLITE_CDN.format(version=version),
+                                options=script_json(options))
+
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, "index.html")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return index_path, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Package the poster as a static stlite bundle.")
+    parser.add_argument("--out", default="dist", help="Output directory")
+    parser.add_argument("--stlite-version", default=STLITE_VERSION, help="@stlite/browser version to load")
+    args = parser.parse_args()
+
+    index_path, files = build_bundle(args.out, args.stlite_version)
+    size = os.path.getsize(index_path)
+    print(f"Bundled {len(files)} files into {index_path} ({size / 1024:.0f} KiB)")
+    print(f"Requirements: {', '.join(REQUIREMENTS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# Pluggable cache backends shared by the figure, curve and fit-result caches.
+# MemoryBackend keeps entries in-process; RedisBackend talks to any
+# Redis-compatible server so replicas behind a load balancer share one cache
+# that survives restarts. Redis stores values as compact bytes (see serialize);
+# MemoryBackend keeps the objects themselves and copies them in and out (see
+# copy_value), which for a figure is several times cheaper than decoding JSON.
+# Either way a cached figure can't be mutated by the caller.
+#
+# Pick the backend with POSTER_CACHE_URL: "memory://" (default) or
+# "redis://host:6379/0". POSTER_CACHE_TTL sets the default TTL in seconds.
+import abc
+import copy
+import functools
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_URL = os.environ.get("POSTER_CACHE_URL", "memory://")
+DEFAULT_TTL = int(os.environ.get("POSTER_CACHE_TTL", 24 * 3600))
+COMPRESS_ABOVE = 1024  # bytes
+
+
+# Serialization: one tag byte, one flags byte, then the payload
+
+def _encode_payload(value):
+    if isinstance(value, np.ndarray):
+        buf = io.BytesIO()
+        np.save(buf, value, allow_pickle=False)
+        return b"N", buf.getvalue()
+    if isinstance(value, tuple):
+        parts = [serialize(v) for v in value]
+        header = struct.pack(f"<I{len(parts)}I", len(parts), *map(len, parts))
+        return b"T", header + b"".join(parts)
+    if type(value).__module__.startswith("plotly.graph_objs"):
+        # plotly encodes numpy arrays as base64 typed arrays, so this stays compact
+        return b"F", value.to_json().encode()
+    if type(value).__name__ == "DataFrame":
+        import pyarrow as pa
+        sink = io.BytesIO()
+        table = pa.Table.from_pandas(value)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return b"D", sink.getvalue()
+    return b"J", json.dumps(value, default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o)).encode()
+
+
+def serialize(value):
+    tag, payload = _encode_payload(value)
+    if len(payload) > COMPRESS_ABOVE:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            return tag + b"z" + compressed
+    return tag + b"-" + payload
+
+
+def deserialize(data):
+    tag, flag, payload = data[:1], data[1:2], data[2:]
+    if flag == b"z":
+        payload = zlib.decompress(payload)
+    if tag == b"N":
+        return np.load(io.BytesIO(payload), allow_pickle=False)
+    if tag == b"T":
+        count = struct.unpack_from("<I", payload)[0]
+        sizes = struct.unpack_from(f"<{count}I", payload, 4)
+        offset = 4 + 4 * count
+        items = []
+        for size in sizes:
+            items.append(deserialize(payload[offset:offset + size]))
+            offset += size
+        return tuple(items)
+    if tag == b"F":
+        import plotly.io as pio
+        return pio.from_json(payload.decode())
+    if tag == b"D":
+        import pyarrow as pa
+        return pa.ipc.open_stream(payload).read_all().to_pandas()
+    if tag == b"J":
+        return json.loads(payload)
+    raise ValueError(f"Unknown cache payload tag: {tag!r}")
+
+
+def copy_value(value):
+    # A private copy of a cached value, without a serialize round trip
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(copy_value(v) for v in value)
+    if type(value).__module__.startswith("plotly.graph_objs"):
+        # to_dict deep-copies, and the figure was validated when it was built
+        return type(value)(value.to_dict(), _validate=False)
+    if type(value).__name__ == "DataFrame":
+        return value.copy()
+    return copy.deepcopy(value)
+
+
+def size_of(value):
+    # Approximate bytes held by a value, for MemoryBackend's budget
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(size_of(v) for v in value)
+    if type(value).__name__ == "DataFrame":
+        return int(value.memory_usage(deep=True).sum())
+    return len(_encode_payload(value)[1])
+
+
+def cache_key(*parts):
+    # Stable across processes (unlike hash()); arrays hash by dtype, shape and bytes
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            digest.update(f"ndarray{part.dtype}{part.shape}".encode())
+            digest.update(part.tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CacheBackend(abc.ABC):
+    # get_many/set_many are the primitives; keys are str, values any
+    # serializable object, ttl in seconds (None = no expiry)
+    @abc.abstractmethod
+    def get_many(self, keys):
+        pass
+
+    @abc.abstractmethod
+    def set_many(self, items, ttl=None):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key):
+        pass
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value, ttl=None):
+        self.set_many([(key, value)], ttl)
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires, value, size), in LRU order
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires, value, _ = entry
+                if expires is not None and expires <= now:
+                    self._remove(key)
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return {key: copy_value(value) for key, value in found.items()}
+
+    def set_many(self, items, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        copies = [(key, copy_value(value)) for key, value in items]
+        sized = [(key, value, size_of(value)) for key, value in copies]
+        with self._lock:
+            for key, value, size in sized:
+                self._remove(key)
+                self._entries[key] = (expires, value, size)
+                self._size += size
+            while self._size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class RedisBackend(CacheBackend):
+    # Needs redis-py (pip install redis). Connection errors degrade to cache
+    # misses so an unreachable Redis slows the poster down but never breaks it.
+    def __init__(self, url, prefix="poster:"):
+        import redis
+        self._errors = (redis.RedisError, OSError)
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        try:
+            values = self.client.mget([self.prefix + key for key in keys])
+        except self._errors:
+            return {}
+        return {key: deserialize(data) for key, data in zip(keys, values) if data is not None}
+
+    def set_many(self, items, ttl=None):
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items:
+                pipe.set(self.prefix + key, serialize(value), ex=int(ttl) if ttl else None)
+            pipe.execute()
+        except self._errors:
+            pass
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except self._errors:
+            pass
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*", count=1000))
+            if keys:
+                self.client.delete(*keys)
+        except self._errors:
+            pass
+
+
+def make_backend(url, namespace="poster"):
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, prefix=f"{namespace}:")
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_cache_backend(namespace="poster", url=None):
+    url = url or CACHE_URL
+    with _backends_lock:
+        key = (os.getpid(), namespace, url)
+        if key not in _backends:
+            _backends[key] = make_backend(url, namespace)
+        return _backends[key]
+
+
+def is_shared(url=None):
+    return not (url or CACHE_URL).startswith("memory://")
+
+
+def memoize(namespace, ttl=DEFAULT_TTL, version="1"):
+    # Like st.cache_data, but through the configured backend. Bump version
+    # when the function's output changes.
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            backend = get_cache_backend(namespace)
+            parts = [*args]
+            for option, value in sorted(kwargs.items()):
+                parts += [option, value]
+            key = f"{name}:{version}:{cache_key(*parts)}"
+            hit = backend.get_many([key])
+            if key in hit:
+                return hit[key]
+            value = fn(*args, **kwargs)
+            backend.set(key, value, ttl)
+            return value
+        return wrapper
+    return decorator
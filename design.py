@@ -0,0 +1,110 @@
+# Optimal experimental design for IC50 assays (Dose-Response Curve tab).
+# A design is a serial dilution: a top concentration, a dilution factor, a
+# number of points and replicates per point, within a well budget. Designs are
+# scored by the Fisher information of the four-parameter Hill model, averaged
+# over prior samples of IC50 (log-uniform) and Hill slope (uniform):
+#   "ic50": expected Var(log10 IC50), c-optimal for the IC50
+#   "D":    expected log det of the parameter covariance (D-optimal)
+#   "I":    expected prediction variance over the prior's concentration range
+#           (I-optimal)
+# Each point of a series adds its own J Jᵀ to the information, so one pass over
+# (top, dilution) × prior samples with a cumulative sum over points scores
+# every series length at once, and replicates only scale the result. Nothing
+# here depends on Streamlit.
+import numpy as np
+import pandas as pd
+
+from kernels import hill_jacobian
+from sensitivity import sobol_sequence
+
+DESIGN_CRITERIA = {"ic50": "Expected IC50 variance", "D": "D-optimal", "I": "I-optimal"}
+DILUTION_FACTORS = (1.5, 2.0, 2.5, 3.0, 10**0.5, 4.0, 5.0, 10.0)
+POINT_COUNTS = range(4, 17)
+REPLICATES = range(1, 5)
+TOP_CONCENTRATIONS = 48  # log-spaced candidates up to the solubility limit
+PRIOR_SAMPLES = 64
+PREDICTION_POINTS = 50
+RIDGE = 1e-9  # keeps designs with all points on one plateau invertible (and scored as useless)
+
+
+def prior_samples(ic50_range, hill_range, n=PRIOR_SAMPLES, seed=0):
+    # (log10 IC50, Hill slope) pairs spread over the prior box by a Sobol sequence
+    unit = sobol_sequence(n, 2, seed)
+    log_low, log_high = np.log10(ic50_range)
+    return log_low + unit[:, 0] * (log_high - log_low), hill_range[0] + unit[:, 1] * (hill_range[1] - hill_range[0])
+
+
+def _inverse_information(log_conc, log_ic50, hill_slope, top, bottom):
+    # Inverse Fisher information (σ = 1, one replicate) for every series prefix:
+    # log_conc (..., points) gives (..., prior, points, 4, 4), entry n being the
+    # design that uses the first n + 1 points
+    log_conc = log_conc[..., None, :]
+    _, jac = hill_jacobian(log_conc, top, bottom, log_ic50[:, None], hill_slope[:, None])
+    information = np.cumsum(jac[..., :, None] * jac[..., None, :], axis=-3)
+    scale = np.trace(information, axis1=-2, axis2=-1)[..., None, None]
+    return np.linalg.inv(information + RIDGE * scale * np.eye(4))
+
+
+def optimal_designs(ic50_range, hill_range, noise_sd=5.0, wells=24, max_conc=100.0, criterion="ic50",
+                    top=100.0, bottom=0.0, min_conc=1e-4):
+    # Every candidate dilution series within the well budget, best first:
+    # top_uM, dilution, n_points, replicates, wells, bottom_uM, the criterion
+    # value and the expected IC50 CV (%). Concentrations in µM, noise in % activity.
+    if criterion not in DESIGN_CRITERIA:
+        raise ValueError(f"Unknown design criterion: {criterion}")
+    log_ic50, hill_slope = prior_samples(ic50_range, hill_range)
+    log_high = np.log10(max_conc)
+    tops = np.logspace(min(np.log10(ic50_range[0]), log_high - 1), log_high, TOP_CONCENTRATIONS)
+    factors = np.asarray(DILUTION_FACTORS)
+    steps = np.arange(max(POINT_COUNTS))
+
+    # (tops, factors, points) log concentrations -> (tops, factors, prior, points, 4, 4)
+    log_conc = np.log10(tops)[:, None, None] - np.log10(factors)[None, :, None] * steps
+    inverse = _inverse_information(log_conc, log_ic50, hill_slope, top, bottom)
+    inverse = inverse[..., [n - 1 for n in POINT_COUNTS], :, :] * noise_sd**2
+
+    if criterion == "D":
+        score = np.linalg.slogdet(inverse)[1]
+    elif criterion == "I":
+        # Prediction variance gᵀ Σ g averaged over a grid spanning the prior
+        # IC50 range ± 1 log: trace(Σ · mean g gᵀ)
+        grid = np.linspace(np.log10(ic50_range[0]) - 1, np.log10(ic50_range[1]) + 1, PREDICTION_POINTS)
+        _, g = hill_jacobian(grid, top, bottom, log_ic50[:, None], hill_slope[:, None])
+        moment = np.einsum("pgi,pgj->pij", g, g) / PREDICTION_POINTS
+        score = np.einsum("...pnij,pji->...pn", inverse, moment)
+    else:
+        score = inverse[..., 2, 2]
+    score = score.mean(axis=-2)  # expectation over the prior: (tops, factors, counts)
+    variance = inverse[..., 2, 2].mean(axis=-2)
+
+    # Replicates divide the covariance: Σ/r (log det drops by 4 ln r)
+    replicates = np.asarray(REPLICATES)
+    if criterion == "D":
+        score = score[..., None] - 4 * np.log(replicates)
+    else:
+        score = score[..., None] / replicates
+    variance = variance[..., None] / replicates
+
+    t, f, n, r = np.meshgrid(tops, factors, np.asarray(POINT_COUNTS), replicates, indexing="ij")
+    lowest = t / f ** (n - 1)
+    keep = (n * r <= wells) & (lowest >= min_conc)
+    designs = pd.DataFrame({
+        "top_uM": t[keep], "dilution": f[keep], "n_points": n[keep], "replicates": r[keep],
+        "wells": (n * r)[keep], "bottom_uM": lowest[keep], "score": score[keep],
+        "ic50_cv_pct": 100 * np.log(10) * np.sqrt(variance[keep]),
+    })
+    return designs.sort_values(["score", "wells"], kind="stable").reset_index(drop=True)
+
+
+def dilution_plan(top_uM, dilution, n_points, replicates):
+    # The bench protocol for one design: one row per concentration, highest
+    # first, each made by diluting the previous one
+    step = np.arange(n_points)
+    conc = top_uM / dilution**step
+    return pd.DataFrame({
+        "step": step + 1,
+        "concentration_uM": conc,
+        "log10_concentration": np.log10(conc),
+        "prepare_from": ["stock"] + [f"step {k} diluted 1:{dilution:.3g}" for k in step[1:]],
+        "replicates": replicates,
+    })
@@ -1,9 +1,44 @@
 ﻿import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
+import io
+import os
+import sys
+import json
 from streamlit_option_menu import option_menu
+from schematics import MECHANISM_SCHEMATICS, mechanism_schematic
+from cache_backend import memoize
+from design import DESIGN_CRITERIA, dilution_plan, optimal_designs
+from pkpd import (PK_MODELS, PK_ROUTES, PK_VARIABILITY, TYPICAL_PK, population_time_course, regimen_grid,
+                  steady_state_summary, virtual_patients)
+from selectivity import PANEL_COLUMNS, analyze_panel, example_panel, read_panel
+from synergy import (CHECKERBOARD_COLUMNS, analyze_checkerboards, example_checkerboards, read_checkerboards,
+                     synergy_summary, synergy_wells)
+from kinetics import (apparent_parameters, cheng_prusoff_ki, hill_slope_estimate, inhibitor_alpha,
+                      inhibitor_for_inhibition, interpolate_ic50)
+# Batch jobs need worker processes, which the in-browser (stlite) build doesn't have
+BATCH_JOBS_AVAILABLE = sys.platform != "emscripten"
+if BATCH_JOBS_AVAILABLE:
+    from fitting import CURVE_CLASSES, CURVE_FLAGS
+    from jobs import (FINISHED, JobQueue, Overloaded, group_dose_response, ic50_batch_chunk, ki_batch_chunk,
+                      refit_curves)
+    from plates import (PLATE_FORMATS, Z_PRIME_PASS, normalize_plates, plate_dose_response, plate_qc,
+                        read_plate_grids, read_plate_map)
+    from results_store import SORT_COLUMNS, ResultsStore
+try:
+    from exports import (CSV_MAX_ROWS, FORMATS, IC50_SCHEMA, KI_SCHEMA, export_file_name, export_tables,
+                         mark_masked_points, points_table, results_table)
+    COLUMNAR_EXPORTS = True
+except ImportError:  # no pyarrow (e.g. some in-browser builds): CSV only
+    CSV_MAX_ROWS = float("inf")
+    COLUMNAR_EXPORTS = False
+from figures import (MECHANISM_COLORS, ace_outcomes_figure, cox2_side_effects_figure, curve_thumbnails_figure,
+                     dose_response_figure, dose_response_sweep_figure, hiv_life_expectancy_figure, ic50_fit_figure,
+                     imatinib_selectivity_figure, inhibitor_requirement_figure, kinome_heatmap_figure,
+                     lineweaver_burk_figure, michaelis_menten_figure, overview_stats_figure, pipeline_figure,
+                     pkpd_attainment_figure, pkpd_time_course_figure, plate_heatmap_figure,
+                     protease_inhibitor_potency_figure, selectivity_scores_figure, sensitivity_figure,
+                     statin_mortality_figure, statin_potency_figure, synergy_surfaces_figure)
 
 # Page configuration
 st.set_page_config(
@@ -13,62 +48,48 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for beautiful styling
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+GUIDES_DIR = os.path.join(APP_DIR, "guides")
+CSS_PATH = os.path.join(APP_DIR, "assets", "poster.css")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+
+@st.cache_data
+def load_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+# Pre-rendered assets written by build_assets.py (empty if it hasn't been run)
+@st.cache_data
+def load_asset_manifest():
+    manifest_path = os.path.join(STATIC_DIR, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+# Custom CSS for beautiful styling (served as a static file once build_assets.py has run)
 def local_css():
-    st.markdown("""
-    <style>
-    .main-header {
-        font-size: 3.5rem;
-        color: #2E86AB;
-        text-align: center;
-        margin-bottom: 2rem;
-        font-weight: 700;
-        background: linear-gradient(45deg, #2E86AB, #A23B72);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    .section-header {
-        font-size: 2rem;
-        color: #2E86AB;
-        border-left: 5px solid #A23B72;
-        padding-left: 1rem;
-        margin: 2rem 0 1rem 0;
-    }
-    .info-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        margin: 1rem 0;
-    }
-    .mechanism-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin: 1rem 0;
-        border-left: 4px solid #A23B72;
-    }
-    .stButton>button {
-        background: linear-gradient(45deg, #2E86AB, #A23B72);
-        color: white;
-        border: none;
-        padding: 0.5rem 2rem;
-        border-radius: 25px;
-        font-weight: 600;
-    }
-    .drug-card {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        border: 1px solid #e9ecef;
-        margin: 0.5rem 0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    css_file = load_asset_manifest().get("poster.css")
+    if css_file:
+        st.markdown(f'<link rel="stylesheet" href="app/static/{css_file}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>\n{load_text(CSS_PATH)}</style>", unsafe_allow_html=True)
 
 local_css()
 
+# Section guides live in guides/*.md and are only read and sent once opened
+def show_guide(label, name):
+    try:
+        guide = st.expander(label, expanded=False, key=f"guide_{name}", on_change="rerun")
+    except TypeError:
+        # Older Streamlit (e.g. the one bundled with stlite) can't report expander
+        # state, so render the guide eagerly
+        guide = st.expander(label, expanded=False)
+        guide.markdown(load_text(os.path.join(GUIDES_DIR, f"{name}.md")))
+        return
+    if guide.open:
+        guide.markdown(load_text(os.path.join(GUIDES_DIR, f"{name}.md")))
+
 # Header with navigation
 def create_header():
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -77,59 +98,7 @@ def create_header():
         st.markdown('<p style="text-align: center; font-size: 1.1rem; color: #666; margin-bottom: 1rem;">An Interactive Educational Platform for Understanding Drug Development; Group member:Fung Yat Kiu (13880442)Lo Yuet Ching (13881997)CHEN Ying Pui(13876834)Chiu Ka Chun(13713800)</p>', unsafe_allow_html=True)
         
         # Complete Application Guide
-        with st.expander("🎯 **START HERE: Complete User Guide**", expanded=False):
-            st.markdown("""
-            ### Welcome! 👋
-            
-            This interactive platform helps you understand enzyme inhibitors in drug development.
-            Perfect for students, researchers, and anyone interested in biochemistry and pharmacology.
-            
-            ---
-            
-            ### 📋 Five Interactive Sections:
-            
-            **1. 🏠 Overview**
-            - Statistics on enzyme inhibitor drugs
-            - Market impact and therapeutic applications
-            - *Best for: Understanding the big picture*
-            
-            **2. ⚙️ Mechanisms**
-            - Interactive simulator for 4 inhibition types
-            - **Dual visualization:** Michaelis-Menten + Lineweaver-Burk plots side-by-side
-            - Adjustable parameters (Km, Vmax, inhibitor strength)
-            - See how each mechanism affects both curve types simultaneously
-            - *Best for: Learning how inhibitors work AND identifying mechanisms*
-            
-            **3. 📚 Drug Development Case Studies**
-            - 5 blockbuster enzyme inhibitor drugs: Discovery to market
-            - Development timelines, clinical trials, and FDA approval stories
-            - Market impact and patient outcomes data
-            - *Best for: Understanding complete drug development process*
-            
-            **4. 🧮 Calculator**
-            - IC50 calculator (with CSV export)
-            - Ki calculator (Cheng-Prusoff equations)
-            - Dose-response curve generator
-            - *Best for: Analyzing your experimental data*
-            
-            **5. 📖 References**
-            - 29 peer-reviewed papers
-            - Online databases and resources
-            - *Best for: Citations and further reading*
-            
-            ---
-            
-            ### 💡 Quick Start Tips:
-            
-            - **Beginners:** Start with Overview → Mechanisms → Case Studies
-            - **Students with data:** Go to Calculator to analyze results
-            - **In-depth learners:** Work through all sections sequentially
-            - **Each section has its own guide** - Look for "📖 How to Use" expandable boxes
-            
-            **All tools are interactive - adjust sliders to see immediate results!**
-            
-            *Select a section from the menu below to begin ⬇️*
-            """)
+        show_guide("🎯 **START HERE: Complete User Guide**", "start_here")
         
         # Navigation
         selected = option_menu(
@@ -153,21 +122,7 @@ def show_overview():
     st.markdown('<div class="section-header">📊 Executive Summary</div>', unsafe_allow_html=True)
     
     # User Guide
-    with st.expander("📖 How to Use This Section", expanded=False):
-        st.markdown("""
-        **Overview Section Guide:**
-        
-        This section provides key statistics about enzyme inhibitors in modern medicine.
-        
-        **What you'll see:**
-        - 📊 **Success statistics** - How many FDA drugs target enzymes
-        - 🎯 **Market data** - Financial impact of enzyme inhibitor drugs
-        - 📈 **Interactive bar chart** - Visual breakdown of therapeutic applications
-        
-        **Simply scroll down to explore the statistics and visualizations.**
-        
-        All data is referenced from peer-reviewed publications (see References section).
-        """)
+    show_guide("📖 How to Use This Section", "overview")
     
     col1, col2 = st.columns([2, 1])
     
@@ -200,14 +155,7 @@ def show_overview():
     
     with col2:
         # Quick stats
-        stats_data = {
-            'Category': ['Approved Drugs', 'Clinical Trials', 'Market Value', 'Success Rate'],
-            'Value': ['250+', '800+', '$150B+', '12%']
-        }
-        df_stats = pd.DataFrame(stats_data)
-        fig = px.bar(df_stats, x='Value', y='Category', orientation='h',
-                    color='Category', color_discrete_sequence=px.colors.qualitative.Set3)
-        fig.update_layout(showlegend=False, height=300, margin=dict(l=0, r=0, t=0, b=0))
+        fig = overview_stats_figure()
         st.plotly_chart(fig, width='stretch')
         
         st.caption("""*Data sources: FDA Drug Approvals Database (2024); ClinicalTrials.gov. 
@@ -220,53 +168,11 @@ def show_overview():
     
     st.write("""This application demonstrates key stages in enzyme inhibitor drug development:""")
     
-    # Create pipeline visualization
-    pipeline_data = pd.DataFrame({
-        'Stage': ['1. Target\nIdentification', '2. Lead\nDiscovery', '3. Lead\nOptimization', 
-                  '4. Preclinical\nTesting', '5. Clinical\nTrials', '6. FDA\nApproval', '7. Post-Market\nMonitoring'],
-        'Duration': ['1-2 years', '2-3 years', '2-3 years', '1-2 years', '6-7 years', '1-2 years', 'Ongoing'],
-        'Success_Rate': [100, 80, 60, 40, 20, 12, 12],
-        'Description': [
-            'Identify enzyme involved in disease',
-            'Screen compounds for inhibition activity',
-            'Improve IC50, Ki, selectivity, ADME properties',
-            'Animal testing for safety and efficacy',
-            'Phase I (safety), II (efficacy), III (large-scale)',
-            'Regulatory review and approval',
-            'Phase IV studies, adverse event monitoring'
-        ]
-    })
-    
     col_a, col_b = st.columns([2, 1])
     
     with col_a:
         # Pipeline flowchart
-        fig_pipeline = go.Figure()
-        
-        colors = ['#2E86AB', '#3FA7D6', '#59C3C3', '#74D3AE', '#92E5A1', '#A8E6A1', '#C6EBBE']
-        
-        for i, row in pipeline_data.iterrows():
-            fig_pipeline.add_trace(go.Bar(
-                y=[row['Stage']],
-                x=[1],
-                orientation='h',
-                name=row['Stage'],
-                text=f"<b>{row['Stage']}</b><br>{row['Duration']}",
-                textposition='inside',
-                marker=dict(color=colors[i]),
-                hovertext=f"{row['Description']}<br>Duration: {row['Duration']}<br>Success Rate: {row['Success_Rate']}%",
-                hoverinfo='text',
-                showlegend=False
-            ))
-        
-        fig_pipeline.update_layout(
-            title='Enzyme Inhibitor Drug Development Stages',
-            xaxis=dict(showticklabels=False, showgrid=False, zeroline=False),
-            yaxis=dict(showgrid=False, autorange='reversed'),
-            height=400,
-            margin=dict(l=10, r=10, t=40, b=10),
-            plot_bgcolor='white'
-        )
+        fig_pipeline = pipeline_figure()
         
         st.plotly_chart(fig_pipeline, use_container_width=True)
     
@@ -292,77 +198,22 @@ def show_overview():
         st.info("""**This app covers:** Stages 1-3 (mechanism understanding, kinetic analysis, potency optimization) 
         and demonstrates successful Stage 6-7 examples through case studies.""")
 
+# Mechanism schematic: pre-rendered SVG when available, live Plotly figure otherwise
+def show_mechanism_schematic(mechanism):
+    slug, _ = MECHANISM_SCHEMATICS[mechanism]
+    svg_file = load_asset_manifest().get(f"schematic_{slug}.svg")
+    if svg_file:
+        st.markdown(f'<img src="app/static/{svg_file}" alt="{mechanism} schematic" style="width: 100%;">',
+                    unsafe_allow_html=True)
+    else:
+        st.plotly_chart(mechanism_schematic(mechanism), use_container_width=True)
+
 # Interactive Mechanisms Section
 def show_mechanisms():
     st.markdown('<div class="section-header">🔬 Inhibition Mechanisms</div>', unsafe_allow_html=True)
     
     # User Guide for Mechanisms
-    with st.expander("📖 How to Use This Interactive Simulator", expanded=False):
-        st.markdown("""
-        **Interactive Enzyme Inhibition Simulator with Dual Visualization**
-        
-        **What's New:** Each inhibition type now shows **BOTH** visualization methods side-by-side:
-        - **Left plot:** Michaelis-Menten curve (hyperbolic)
-        - **Right plot:** Lineweaver-Burk plot (linear transformation)
-        - **Same sliders control both plots** - see the relationship instantly!
-        
-        ---
-        
-        **Step-by-Step Guide:**
-        1. **Select inhibition type** from dropdown (left panel)
-        2. **Read the mechanism description** to understand how it works
-        3. **Adjust Km slider** (0.1-10.0 mM) - substrate binding affinity
-        4. **Adjust Vmax slider** (1-100 µmol/min) - maximum reaction velocity
-        5. **Toggle "Show Inhibitor Effect"** checkbox to compare curves
-        6. **Use Inhibitor Strength (α) slider** (1.0-5.0) to see dose-dependent effects
-        7. **Compare both plots** - see how MM curves transform into LB lines!
-        
-        **Understanding the Parameters:**
-        - **Km:** Lower values = enzyme has higher affinity for substrate
-        - **Vmax:** Higher values = enzyme can work faster
-        - **α (alpha):** Inhibitor strength factor where α = 1 + [I]/Ki (higher = stronger inhibition)
-        
-        **Interpreting the Dual Plots:**
-        
-        **Michaelis-Menten Plot (Left):**
-        - **Blue curve:** Normal enzyme activity (no inhibitor)
-        - **Red dashed curve:** Activity with inhibitor present
-        - Watch how curve shape changes with different mechanisms
-        
-        **Lineweaver-Burk Plot (Right):**
-        - **Linear transformation:** 1/v vs 1/[S]
-        - **Y-intercept = 1/Vmax**
-        - **X-intercept = -1/Km**
-        - **Key advantage:** Line intersection patterns identify mechanisms!
-        
-        **What to Observe for Each Mechanism:**
-        
-        **Competitive Inhibition:**
-        - MM: Can reach same Vmax at high [S], but needs more substrate
-        - LB: Lines intersect on Y-axis (same Vmax, different Km)
-        
-        **Non-competitive Inhibition:**
-        - MM: Lower plateau (Vmax reduced), same curve shape
-        - LB: Lines intersect on X-axis (same Km, different Vmax)
-        
-        **Uncompetitive Inhibition:**
-        - MM: Both Vmax and apparent Km reduced proportionally
-        - LB: Lines are parallel (both intercepts change equally)
-        
-        **Mixed Inhibition:**
-        - MM: Combination of competitive and non-competitive effects
-        - LB: Lines intersect in 2nd quadrant (off both axes)
-        
-        ---
-        
-        **Why This Dual View is Powerful:**
-        - See the **same data** in two complementary ways
-        - MM plots show biological reality (velocity curves)
-        - LB plots reveal mathematical relationships (easier to extract Km, Vmax)
-        - Together they provide complete mechanistic understanding
-        
-        *Try adjusting the sliders and watch how both plots respond together!*
-        """)
+    show_guide("📖 How to Use This Interactive Simulator", "mechanisms")
     
     col1, col2 = st.columns([1, 2])
     
@@ -387,48 +238,6 @@ def show_mechanisms():
             - **Example**: Statins (HMG-CoA reductase inhibitors)
             """)
             
-            # Create schematic diagram for competitive inhibition
-            fig_mech = go.Figure()
-            
-            # Enzyme (rectangle)
-            fig_mech.add_shape(type="rect", x0=0.5, y0=0.3, x1=1.5, y1=0.7,
-                              line=dict(color="RoyalBlue", width=3), fillcolor="lightblue")
-            # Active site (small notch)
-            fig_mech.add_shape(type="rect", x0=0.45, y0=0.45, x1=0.55, y1=0.55,
-                              line=dict(color="red", width=2), fillcolor="lightyellow")
-            
-            # Substrate (circle) - fits active site
-            fig_mech.add_shape(type="circle", x0=0.15, y0=0.45, x1=0.35, y1=0.65,
-                              line=dict(color="green", width=2), fillcolor="lightgreen")
-            
-            # Inhibitor (triangle-like using path) - similar shape to substrate
-            fig_mech.add_shape(type="circle", x0=0.15, y0=0.15, x1=0.35, y1=0.35,
-                              line=dict(color="red", width=2), fillcolor="lightcoral")
-            
-            # Arrow showing competition
-            fig_mech.add_annotation(x=0.25, y=0.55, ax=0.5, ay=0.5, 
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=2, arrowcolor="green")
-            fig_mech.add_annotation(x=0.25, y=0.25, ax=0.5, ay=0.5,
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=2, arrowcolor="red")
-            
-            # Labels
-            fig_mech.add_annotation(x=1.0, y=0.85, text="<b>Enzyme</b>", showarrow=False, font=dict(size=12))
-            fig_mech.add_annotation(x=0.25, y=0.7, text="Substrate", showarrow=False, font=dict(size=10, color="green"))
-            fig_mech.add_annotation(x=0.25, y=0.1, text="Inhibitor", showarrow=False, font=dict(size=10, color="red"))
-            fig_mech.add_annotation(x=0.5, y=0.5, text="Active\nSite", showarrow=False, font=dict(size=8))
-            
-            fig_mech.update_layout(
-                showlegend=False,
-                height=200,
-                margin=dict(l=10, r=10, t=10, b=10),
-                xaxis=dict(range=[0, 2], showgrid=False, showticklabels=False, zeroline=False),
-                yaxis=dict(range=[0, 1], showgrid=False, showticklabels=False, zeroline=False),
-                plot_bgcolor='white'
-            )
-            st.plotly_chart(fig_mech, use_container_width=True)
-            
         elif mechanism == "Non-competitive Inhibition":
             st.write("""
             - Binds to enzyme at site other than active site
@@ -437,52 +246,6 @@ def show_mechanisms():
             - **Example**: Heavy metal ions
             """)
             
-            # Create schematic diagram for non-competitive inhibition
-            fig_mech = go.Figure()
-            
-            # Enzyme (rectangle)
-            fig_mech.add_shape(type="rect", x0=0.5, y0=0.3, x1=1.5, y1=0.7,
-                              line=dict(color="RoyalBlue", width=3), fillcolor="lightblue")
-            # Active site
-            fig_mech.add_shape(type="rect", x0=0.45, y0=0.45, x1=0.55, y1=0.55,
-                              line=dict(color="green", width=2), fillcolor="lightyellow")
-            # Allosteric site
-            fig_mech.add_shape(type="rect", x0=1.45, y0=0.45, x1=1.55, y1=0.55,
-                              line=dict(color="red", width=2), fillcolor="lightpink")
-            
-            # Substrate (circle) - at active site
-            fig_mech.add_shape(type="circle", x0=0.15, y0=0.45, x1=0.35, y1=0.65,
-                              line=dict(color="green", width=2), fillcolor="lightgreen")
-            
-            # Inhibitor (different shape) - at allosteric site
-            fig_mech.add_shape(type="rect", x0=1.65, y0=0.4, x1=1.85, y1=0.6,
-                              line=dict(color="red", width=2), fillcolor="lightcoral")
-            
-            # Arrows
-            fig_mech.add_annotation(x=0.25, y=0.55, ax=0.5, ay=0.5,
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=2, arrowcolor="green")
-            fig_mech.add_annotation(x=1.75, y=0.5, ax=1.5, ay=0.5,
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=2, arrowcolor="red")
-            
-            # Labels
-            fig_mech.add_annotation(x=1.0, y=0.85, text="<b>Enzyme</b>", showarrow=False, font=dict(size=12))
-            fig_mech.add_annotation(x=0.25, y=0.7, text="Substrate", showarrow=False, font=dict(size=10, color="green"))
-            fig_mech.add_annotation(x=1.75, y=0.65, text="Inhibitor", showarrow=False, font=dict(size=10, color="red"))
-            fig_mech.add_annotation(x=0.5, y=0.5, text="Active", showarrow=False, font=dict(size=7))
-            fig_mech.add_annotation(x=1.5, y=0.5, text="Allosteric", showarrow=False, font=dict(size=7))
-            
-            fig_mech.update_layout(
-                showlegend=False,
-                height=200,
-                margin=dict(l=10, r=10, t=10, b=10),
-                xaxis=dict(range=[0, 2], showgrid=False, showticklabels=False, zeroline=False),
-                yaxis=dict(range=[0, 1], showgrid=False, showticklabels=False, zeroline=False),
-                plot_bgcolor='white'
-            )
-            st.plotly_chart(fig_mech, use_container_width=True)
-            
         elif mechanism == "Uncompetitive Inhibition":
             st.write("""
             - Binds only to enzyme-substrate complex
@@ -490,739 +253,721 @@ def show_mechanisms():
             - **Example**: Lithium for certain enzymes
             """)
             
-            # Create schematic diagram for uncompetitive inhibition
-            fig_mech = go.Figure()
-            
-            # Enzyme (rectangle)
-            fig_mech.add_shape(type="rect", x0=0.5, y0=0.3, x1=1.5, y1=0.7,
-                              line=dict(color="RoyalBlue", width=3), fillcolor="lightblue")
-            # Active site with substrate already bound
-            fig_mech.add_shape(type="rect", x0=0.45, y0=0.45, x1=0.55, y1=0.55,
-                              line=dict(color="green", width=2), fillcolor="lightgreen")
-            
-            # Substrate (circle) - BOUND to active site
-            fig_mech.add_shape(type="circle", x0=0.43, y0=0.43, x1=0.57, y1=0.57,
-                              line=dict(color="green", width=2), fillcolor="lightgreen")
-            
-            # New binding site created by ES complex
-            fig_mech.add_shape(type="rect", x0=1.45, y0=0.35, x1=1.55, y1=0.45,
-                              line=dict(color="orange", width=2), fillcolor="lightyellow")
-            
-            # Inhibitor - binds to ES complex only
-            fig_mech.add_shape(type="circle", x0=1.65, y0=0.35, x1=1.85, y1=0.55,
-                              line=dict(color="red", width=2), fillcolor="lightcoral")
-            
-            # Arrow showing inhibitor binding to ES complex
-            fig_mech.add_annotation(x=1.75, y=0.45, ax=1.5, ay=0.4,
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=2, arrowcolor="red")
-            
-            # Labels
-            fig_mech.add_annotation(x=1.0, y=0.85, text="<b>Enzyme-Substrate Complex</b>", showarrow=False, font=dict(size=12))
-            fig_mech.add_annotation(x=0.5, y=0.2, text="ES Complex", showarrow=False, font=dict(size=10, color="green"))
-            fig_mech.add_annotation(x=1.75, y=0.6, text="Inhibitor", showarrow=False, font=dict(size=10, color="red"))
-            fig_mech.add_annotation(x=1.5, y=0.3, text="New\nSite", showarrow=False, font=dict(size=7))
-            
-            fig_mech.update_layout(
-                showlegend=False,
-                height=200,
-                margin=dict(l=10, r=10, t=10, b=10),
-                xaxis=dict(range=[0, 2], showgrid=False, showticklabels=False, zeroline=False),
-                yaxis=dict(range=[0, 1], showgrid=False, showticklabels=False, zeroline=False),
-                plot_bgcolor='white'
-            )
-            st.plotly_chart(fig_mech, use_container_width=True)
-            
         else:  # Mixed Inhibition
             st.write("""
             - Combination of competitive and non-competitive features
             - Binds to both enzyme and enzyme-substrate complex
             - **Example**: Many kinase inhibitors
             """)
-            
-            # Create schematic diagram for mixed inhibition
-            fig_mech = go.Figure()
-            
-            # Two scenarios side by side
-            # Left: Inhibitor binding to free enzyme
-            fig_mech.add_shape(type="rect", x0=0.3, y0=0.55, x1=0.7, y1=0.85,
-                              line=dict(color="RoyalBlue", width=2), fillcolor="lightblue")
-            fig_mech.add_shape(type="rect", x0=0.25, y0=0.65, x1=0.32, y1=0.75,
-                              line=dict(color="red", width=2), fillcolor="lightpink")
-            fig_mech.add_shape(type="circle", x0=0.05, y0=0.65, x1=0.2, y1=0.8,
-                              line=dict(color="red", width=2), fillcolor="lightcoral")
-            fig_mech.add_annotation(x=0.125, y=0.725, ax=0.28, ay=0.7,
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=1.5, arrowcolor="red")
-            
-            # Right: Inhibitor binding to ES complex
-            fig_mech.add_shape(type="rect", x0=1.3, y0=0.55, x1=1.7, y1=0.85,
-                              line=dict(color="RoyalBlue", width=2), fillcolor="lightblue")
-            fig_mech.add_shape(type="circle", x0=1.27, y0=0.67, x1=1.37, y1=0.77,
-                              line=dict(color="green", width=2), fillcolor="lightgreen")
-            fig_mech.add_shape(type="rect", x0=1.68, y0=0.65, x1=1.75, y1=0.75,
-                              line=dict(color="red", width=2), fillcolor="lightpink")
-            fig_mech.add_shape(type="circle", x0=1.8, y0=0.65, x1=1.95, y1=0.8,
-                              line=dict(color="red", width=2), fillcolor="lightcoral")
-            fig_mech.add_annotation(x=1.875, y=0.725, ax=1.72, ay=0.7,
-                                   xref="x", yref="y", axref="x", ayref="y",
-                                   showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=1.5, arrowcolor="red")
-            
-            # Labels
-            fig_mech.add_annotation(x=0.5, y=0.95, text="<b>E + I → EI</b>", showarrow=False, font=dict(size=11))
-            fig_mech.add_annotation(x=1.5, y=0.95, text="<b>ES + I → ESI</b>", showarrow=False, font=dict(size=11))
-            fig_mech.add_annotation(x=0.125, y=0.87, text="Inhibitor", showarrow=False, font=dict(size=8, color="red"))
-            fig_mech.add_annotation(x=1.32, y=0.87, text="Substrate", showarrow=False, font=dict(size=8, color="green"))
-            fig_mech.add_annotation(x=1.875, y=0.87, text="Inhibitor", showarrow=False, font=dict(size=8, color="red"))
-            fig_mech.add_annotation(x=1.0, y=0.4, text="<b>Inhibitor binds to both free enzyme AND ES complex</b>", 
-                                   showarrow=False, font=dict(size=10))
-            
-            fig_mech.update_layout(
-                showlegend=False,
-                height=250,
-                margin=dict(l=10, r=10, t=10, b=10),
-                xaxis=dict(range=[0, 2], showgrid=False, showticklabels=False, zeroline=False),
-                yaxis=dict(range=[0.3, 1], showgrid=False, showticklabels=False, zeroline=False),
-                plot_bgcolor='white'
-            )
-            st.plotly_chart(fig_mech, use_container_width=True)
-            
+        
+        show_mechanism_schematic(mechanism)
+        
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
-        # Interactive kinetics plot
-        st.subheader("📈 Kinetic Effects")
-        
-        # Add reset button at the top
-        col_reset, col_space = st.columns([1, 3])
-        with col_reset:
-            if st.button("🔄 Reset to Defaults", help="Reset all parameters to default values"):
-                # Clear all relevant session state keys
-                keys_to_clear = ['km_slider', 'vmax_slider', 'show_inh_mech', 'inhibitor_conc_slider', 
-                                'ki_slider', 'show_km_line', 'show_vmax_line', 'show_intercepts']
-                for key in keys_to_clear:
-                    if key in st.session_state:
-                        del st.session_state[key]
-                st.rerun()
-        
-        km = st.slider("Km (substrate affinity)", 0.1, 10.0, 1.0, 0.1, key="km_slider",
-                      help="Michaelis constant: substrate concentration at half Vmax (lower = higher affinity)")
-        vmax = st.slider("Vmax (maximum velocity)", 1, 100, 50, 1, key="vmax_slider",
-                        help="Maximum reaction velocity when enzyme is fully saturated with substrate")
-        
-        # Add inhibitor strength control - ENHANCED with [I] and Ki
-        show_inhibitor = st.checkbox("Show Inhibitor Effect", value=True, key="show_inh_mech")
-        
-        if show_inhibitor:
-            st.markdown("**Inhibitor Parameters:**")
-            inhibitor_conc = st.slider("[I] Inhibitor Concentration (µM)", 0.0, 10.0, 2.0, 0.5, 
-                                      key="inhibitor_conc_slider",
-                                      help="Concentration of inhibitor added to the reaction")
-            ki_value = st.slider("Ki (inhibitor binding constant)", 0.5, 5.0, 1.0, 0.1, 
-                                key="ki_slider",
-                                help="Dissociation constant for enzyme-inhibitor complex (lower = stronger binding)")
-            
-            # Calculate alpha from [I] and Ki
-            inhibitor_strength = 1 + (inhibitor_conc / ki_value) if ki_value > 0 else 1.0
-            
-            # For mixed inhibition: add alpha' slider
-            if mechanism == "Mixed Inhibition":
-                alpha_prime_value = st.slider("α' (Alpha Prime - Non-competitive Component)", 
-                                             1.0, 10.0, inhibitor_strength * 0.8, 0.1,
-                                             key="alpha_prime_slider",
-                                             help="Independent parameter controlling Vmax reduction (α' ≠ α for mixed inhibition)")
-                st.info(f"**Calculated α = {inhibitor_strength:.2f}** (affects Km) and **α' = {alpha_prime_value:.2f}** (affects Vmax)")
-            else:
-                alpha_prime_value = inhibitor_strength
-                # Display calculated alpha
-                st.info(f"**Calculated α = {inhibitor_strength:.2f}** (where α = 1 + [I]/Ki)")
-        
-        # Add annotation toggles
-        st.markdown("**Plot Annotations:**")
-        show_km_line = st.checkbox("Show Km reference line", value=False, key="show_km_line",
-                                   help="Vertical line at Km on MM plot")
-        show_vmax_line = st.checkbox("Show Vmax/2 reference line", value=False, key="show_vmax_line",
-                                     help="Horizontal line at Vmax/2 on MM plot")
-        show_intercepts = st.checkbox("Show LB intercept labels", value=True, key="show_intercepts",
-                                     help="Label Y-intercept (1/Vmax) and X-intercept (-1/Km) on LB plot")
-        
-        # Determine color based on mechanism
-        mechanism_colors = {
-            "Competitive Inhibition": "red",
-            "Non-competitive Inhibition": "orange",
-            "Uncompetitive Inhibition": "purple",
-            "Mixed Inhibition": "green"
-        }
-        inhibitor_color = mechanism_colors.get(mechanism, "red")
-        
-        # MM Plot (first, on top)
-        st.markdown("---")
-        st.markdown("**Michaelis-Menten Plot**")
-        
-        # Generate kinetic curves
-        substrate = np.linspace(0.1, 20, 100)
-        velocity_no_inhibitor = vmax * substrate / (km + substrate)
-        
-        fig_mm = go.Figure()
-        fig_mm.add_trace(go.Scatter(x=substrate, y=velocity_no_inhibitor, 
-                               name='No Inhibitor', line=dict(color='blue', width=2)))
-        
-        if show_inhibitor:
-            alpha = inhibitor_strength  # Use calculated value
-            alpha_prime = alpha_prime_value  # Use slider value for mixed inhibition
-            
-            if mechanism == "Competitive Inhibition":
-                velocity_inhibitor = vmax * substrate / (km * alpha + substrate)
-                apparent_km = km * alpha
-                apparent_vmax = vmax
-            elif mechanism == "Non-competitive Inhibition":
-                velocity_inhibitor = (vmax / alpha) * substrate / (km + substrate)
-                apparent_km = km
-                apparent_vmax = vmax / alpha
-            elif mechanism == "Uncompetitive Inhibition":
-                velocity_inhibitor = (vmax / alpha) * substrate / (km / alpha + substrate)
-                apparent_km = km / alpha
-                apparent_vmax = vmax / alpha
-            else:  # Mixed Inhibition
-                velocity_inhibitor = (vmax / alpha_prime) * substrate / ((km * alpha / alpha_prime) + substrate)
-                apparent_km = km * alpha / alpha_prime
-                apparent_vmax = vmax / alpha_prime
-            
-            fig_mm.add_trace(go.Scatter(x=substrate, y=velocity_inhibitor, 
-                               name='With Inhibitor', line=dict(color=inhibitor_color, dash='dash', width=2)))
-        
-        # Add annotation lines if toggled (NO TEXT to avoid overlap)
+        show_kinetic_effects(mechanism)
+
+    show_sensitivity(mechanism)
+    show_dose_planning(mechanism)
+
+def reset_kinetic_parameters():
+    # Clear all relevant session state keys
+    keys_to_clear = ['km_slider', 'vmax_slider', 'show_inh_mech', 'inhibitor_conc_slider', 
+                    'ki_slider', 'show_km_line', 'show_vmax_line', 'show_intercepts']
+    for key in keys_to_clear:
+        if key in st.session_state:
+            del st.session_state[key]
+
+# Kinetic plots run as a fragment so slider moves rerun only this region
+@st.fragment
+def show_kinetic_effects(mechanism):
+    st.subheader("📈 Kinetic Effects")
+    
+    # Add reset button at the top (callback runs before the fragment reruns)
+    col_reset, col_space = st.columns([1, 3])
+    with col_reset:
+        st.button("🔄 Reset to Defaults", help="Reset all parameters to default values",
+                  on_click=reset_kinetic_parameters)
+    
+    km = st.slider("Km (substrate affinity)", 0.1, 10.0, 1.0, 0.1, key="km_slider",
+                  help="Michaelis constant: substrate concentration at half Vmax (lower = higher affinity)")
+    vmax = st.slider("Vmax (maximum velocity)", 1, 100, 50, 1, key="vmax_slider",
+                    help="Maximum reaction velocity when enzyme is fully saturated with substrate")
+    
+    # Add inhibitor strength control - ENHANCED with [I] and Ki
+    show_inhibitor = st.checkbox("Show Inhibitor Effect", value=True, key="show_inh_mech")
+    
+    if show_inhibitor:
+        st.markdown("**Inhibitor Parameters:**")
+        inhibitor_conc = st.slider("[I] Inhibitor Concentration (µM)", 0.0, 10.0, 2.0, 0.5, 
+                                  key="inhibitor_conc_slider",
+                                  help="Concentration of inhibitor added to the reaction")
+        ki_value = st.slider("Ki (inhibitor binding constant)", 0.5, 5.0, 1.0, 0.1, 
+                            key="ki_slider",
+                            help="Dissociation constant for enzyme-inhibitor complex (lower = stronger binding)")
+        
+        # Calculate alpha from [I] and Ki
+        inhibitor_strength = inhibitor_alpha(inhibitor_conc, ki_value)
+        
+        # For mixed inhibition: add alpha' slider
+        if mechanism == "Mixed Inhibition":
+            alpha_prime_value = st.slider("α' (Alpha Prime - Non-competitive Component)", 
+                                         1.0, 10.0, inhibitor_strength * 0.8, 0.1,
+                                         key="alpha_prime_slider",
+                                         help="Independent parameter controlling Vmax reduction (α' ≠ α for mixed inhibition)")
+            st.info(f"**Calculated α = {inhibitor_strength:.2f}** (affects Km) and **α' = {alpha_prime_value:.2f}** (affects Vmax)")
+        else:
+            alpha_prime_value = inhibitor_strength
+            # Display calculated alpha
+            st.info(f"**Calculated α = {inhibitor_strength:.2f}** (where α = 1 + [I]/Ki)")
+    
+    # Add annotation toggles
+    st.markdown("**Plot Annotations:**")
+    show_km_line = st.checkbox("Show Km reference line", value=False, key="show_km_line",
+                               help="Vertical line at Km on MM plot")
+    show_vmax_line = st.checkbox("Show Vmax/2 reference line", value=False, key="show_vmax_line",
+                                 help="Horizontal line at Vmax/2 on MM plot")
+    show_intercepts = st.checkbox("Show LB intercept labels", value=True, key="show_intercepts",
+                                 help="Label Y-intercept (1/Vmax) and X-intercept (-1/Km) on LB plot")
+    
+    inhibitor_color = MECHANISM_COLORS.get(mechanism, "red")
+    
+    if show_inhibitor:
+        alpha, alpha_prime = inhibitor_strength, alpha_prime_value
+        apparent_km, apparent_vmax = apparent_parameters(mechanism, km, vmax, alpha, alpha_prime)
+    else:
+        alpha, alpha_prime = None, None
+    
+    # MM Plot (first, on top)
+    st.markdown("---")
+    st.markdown("**Michaelis-Menten Plot**")
+    
+    fig_mm = michaelis_menten_figure(mechanism, km, vmax, alpha, alpha_prime,
+                                     show_km_line=show_km_line, show_vmax_line=show_vmax_line)
+    st.plotly_chart(fig_mm, use_container_width=True)
+    
+    # Info box for MM plot showing key values (if annotations toggled)
+    if show_km_line or show_vmax_line:
+        mm_info = "**Reference Lines:**\n\n"
         if show_km_line:
-            fig_mm.add_vline(x=km, line_dash="dot", line_color="gray", line_width=2)
+            mm_info += f"🔵 Km = {km:.2f} mM (gray dotted)\n\n"
             if show_inhibitor and mechanism == "Competitive Inhibition":
-                fig_mm.add_vline(x=apparent_km, line_dash="dot", line_color=inhibitor_color, line_width=2)
-        
+                mm_info += f"🔴 Apparent Km = {apparent_km:.2f} mM ({inhibitor_color} dotted)\n\n"
         if show_vmax_line:
-            fig_mm.add_hline(y=vmax/2, line_dash="dot", line_color="gray", line_width=2)
+            mm_info += f"🔵 Vmax/2 = {vmax/2:.2f} µmol/min (gray dotted)\n\n"
             if show_inhibitor:
-                fig_mm.add_hline(y=apparent_vmax/2, line_dash="dot", line_color=inhibitor_color, line_width=2)
-        
-        fig_mm.update_layout(
-            xaxis_title="[S] (mM)",
-            yaxis_title="v (µmol/min)",
-            height=400,
-            showlegend=True,
-            legend=dict(x=0.6, y=0.1),
-            margin=dict(l=10, r=10, t=30, b=10)
-        )
-        
-        # Add gridlines to MM plot with solid black zero lines
-        fig_mm.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
-        fig_mm.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
-        
-        st.plotly_chart(fig_mm, use_container_width=True)
-        
-        # Info box for MM plot showing key values (if annotations toggled)
-        if show_km_line or show_vmax_line:
-            mm_info = "**Reference Lines:**\n\n"
-            if show_km_line:
-                mm_info += f"🔵 Km = {km:.2f} mM (gray dotted)\n\n"
-                if show_inhibitor and mechanism == "Competitive Inhibition":
-                    mm_info += f"🔴 Apparent Km = {apparent_km:.2f} mM ({inhibitor_color} dotted)\n\n"
-            if show_vmax_line:
-                mm_info += f"🔵 Vmax/2 = {vmax/2:.2f} µmol/min (gray dotted)\n\n"
-                if show_inhibitor:
-                    mm_info += f"🔴 Apparent Vmax/2 = {apparent_vmax/2:.2f} µmol/min ({inhibitor_color} dotted)"
-            st.caption(mm_info)
-        
-        # LB Plot (second, below MM plot)
-        st.markdown("---")
-        st.markdown("**Lineweaver-Burk Plot**")
-        
-        # Generate substrate concentrations for LB plot
-        substrate_conc_lb = np.array([0.5, 1, 2, 4, 8, 16])  # mM
-        
-        # Calculate velocities (no inhibitor)
-        velocity_no_inh_lb = vmax * substrate_conc_lb / (km + substrate_conc_lb)
-        
-        # Lineweaver-Burk transformation
-        reciprocal_s = 1 / substrate_conc_lb
-        reciprocal_v_no_inh = 1 / velocity_no_inh_lb
-        
-        # Calculate and store intercepts for annotation
-        y_intercept_no_inh = 1 / vmax
-        x_intercept_no_inh = -1 / km
-        
-        # Calculate slope: slope = (y_intercept - 0) / (0 - x_intercept) = y_intercept / (-x_intercept)
-        slope_no_inh = y_intercept_no_inh / (0 - x_intercept_no_inh)
-        
-        # Find where line crosses y=0 (x-axis): 0 = y_intercept + slope * x
-        # x_at_y0 = -y_intercept / slope
-        x_at_y0_no_inh = -y_intercept_no_inh / slope_no_inh if slope_no_inh != 0 else x_intercept_no_inh
-        
-        # Extend line from x-intercept to where it crosses y=0
-        if x_at_y0_no_inh > x_intercept_no_inh:
-            x_extended_no_inh = np.linspace(x_intercept_no_inh, x_at_y0_no_inh, 100)
-        else:
-            x_extended_no_inh = np.linspace(x_at_y0_no_inh, x_intercept_no_inh, 100)
-        y_extended_no_inh = y_intercept_no_inh + slope_no_inh * x_extended_no_inh
-        
-        fig_lb = go.Figure()
-        
-        # Extend data to include x-intercept for no inhibitor
-        x_no_inh_extended = np.concatenate([[x_intercept_no_inh], reciprocal_s])
-        y_no_inh_extended = np.concatenate([[0], reciprocal_v_no_inh])
-        
-        # Add line connecting from x-intercept through all data points
-        fig_lb.add_trace(go.Scatter(
-            x=x_no_inh_extended, 
-            y=y_no_inh_extended,
-            mode='lines+markers',
-            name='No Inhibitor',
-            line=dict(color='blue', width=2),
-            marker=dict(size=8, color='blue'),
-            showlegend=True
-        ))
-        
-        # Add inhibitor conditions
+                mm_info += f"🔴 Apparent Vmax/2 = {apparent_vmax/2:.2f} µmol/min ({inhibitor_color} dotted)"
+        st.caption(mm_info)
+    
+    # LB Plot (second, below MM plot)
+    st.markdown("---")
+    st.markdown("**Lineweaver-Burk Plot**")
+    
+    # Intercepts for the readout below the plot
+    y_intercept_no_inh = 1 / vmax
+    x_intercept_no_inh = -1 / km
+    if show_inhibitor:
+        y_intercept_inh = 1 / apparent_vmax
+        x_intercept_inh = -1 / apparent_km
+    
+    fig_lb = lineweaver_burk_figure(mechanism, km, vmax, alpha, alpha_prime, show_intercepts=show_intercepts)
+    st.plotly_chart(fig_lb, use_container_width=True)
+    
+    # Info box for LB plot showing intercept values (if annotations toggled)
+    if show_intercepts:
+        lb_info = "**Intercept Values:**\n\n"
+        lb_info += f"🔵 **No Inhibitor:**\n"
+        lb_info += f"  • Y-intercept (⚫) = 1/Vmax = {y_intercept_no_inh:.4f}\n"
+        lb_info += f"  • X-intercept (◼) = -1/Km = {x_intercept_no_inh:.4f}\n\n"
         if show_inhibitor:
-            alpha = inhibitor_strength
-            
+            lb_info += f"🔴 **With Inhibitor:**\n"
+            lb_info += f"  • Y-intercept (⚫) = 1/Vmax' = {y_intercept_inh:.4f}\n"
+            if abs(x_intercept_inh - x_intercept_no_inh) > 0.01:
+                lb_info += f"  • X-intercept (◼) = -1/Km' = {x_intercept_inh:.4f}\n"
+            else:
+                lb_info += f"  • X-intercept (◼) = Same as no inhibitor\n"
+            lb_info += f"\n**Pattern:** "
             if mechanism == "Competitive Inhibition":
-                velocity_inh_lb = vmax * substrate_conc_lb / (km * alpha + substrate_conc_lb)
-                apparent_km_lb = km * alpha
-                apparent_vmax_lb = vmax
+                lb_info += "Lines intersect on Y-axis ✓"
             elif mechanism == "Non-competitive Inhibition":
-                velocity_inh_lb = (vmax / alpha) * substrate_conc_lb / (km + substrate_conc_lb)
-                apparent_km_lb = km
-                apparent_vmax_lb = vmax / alpha
+                lb_info += "Lines intersect on X-axis ✓"
             elif mechanism == "Uncompetitive Inhibition":
-                velocity_inh_lb = (vmax / alpha) * substrate_conc_lb / (km / alpha + substrate_conc_lb)
-                apparent_km_lb = km / alpha
-                apparent_vmax_lb = vmax / alpha
-            else:  # Mixed Inhibition
-                alpha_prime = alpha_prime_value
-                velocity_inh_lb = (vmax / alpha_prime) * substrate_conc_lb / ((km * alpha / alpha_prime) + substrate_conc_lb)
-                apparent_km_lb = km * alpha / alpha_prime
-                apparent_vmax_lb = vmax / alpha_prime
-            
-            reciprocal_v_inh = 1 / velocity_inh_lb
-            
-            # Calculate inhibitor intercepts
-            y_intercept_inh = 1 / apparent_vmax_lb
-            x_intercept_inh = -1 / apparent_km_lb
-            
-            # Extend data to include x-intercept for inhibitor
-            x_inh_extended = np.concatenate([[x_intercept_inh], reciprocal_s])
-            y_inh_extended = np.concatenate([[0], reciprocal_v_inh])
-            
-            # Add line connecting from x-intercept through all data points
-            fig_lb.add_trace(go.Scatter(
-                x=x_inh_extended, 
-                y=y_inh_extended,
-                mode='lines+markers',
-                name='With Inhibitor',
-                line=dict(color=inhibitor_color, width=2, dash='dash'),
-                marker=dict(size=8, color=inhibitor_color),
-                showlegend=True
-            ))
-            
-            # Mark intercepts with simple dots (no text to avoid overlap)
-            if show_intercepts:
-                # Y-intercept marker for no inhibitor
-                fig_lb.add_trace(go.Scatter(
-                    x=[0], y=[y_intercept_no_inh],
-                    mode='markers',
-                    marker=dict(size=10, color='blue', symbol='circle'),
-                    showlegend=False,
-                    hovertext=f"Y-intercept: 1/Vmax = {y_intercept_no_inh:.4f}"
-                ))
-                
-                # X-intercept marker for no inhibitor
-                fig_lb.add_trace(go.Scatter(
-                    x=[x_intercept_no_inh], y=[0],
-                    mode='markers',
-                    marker=dict(size=10, color='blue', symbol='square'),
-                    showlegend=False,
-                    hovertext=f"X-intercept: -1/Km = {x_intercept_no_inh:.4f}"
-                ))
-                
-                # Y-intercept marker for inhibitor
-                fig_lb.add_trace(go.Scatter(
-                    x=[0], y=[y_intercept_inh],
-                    mode='markers',
-                    marker=dict(size=10, color=inhibitor_color, symbol='circle'),
-                    showlegend=False,
-                    hovertext=f"Y-intercept: 1/Vmax' = {y_intercept_inh:.4f}"
-                ))
-                
-                # X-intercept marker for inhibitor (if different)
-                if abs(x_intercept_inh - x_intercept_no_inh) > 0.01:
-                    fig_lb.add_trace(go.Scatter(
-                        x=[x_intercept_inh], y=[0],
-                        mode='markers',
-                        marker=dict(size=10, color=inhibitor_color, symbol='square'),
-                        showlegend=False,
-                        hovertext=f"X-intercept: -1/Km' = {x_intercept_inh:.4f}"
-                    ))
-        else:
-            # Show intercepts even without inhibitor if toggled
-            if show_intercepts:
-                fig_lb.add_trace(go.Scatter(
-                    x=[0], y=[y_intercept_no_inh],
-                    mode='markers',
-                    marker=dict(size=10, color='blue', symbol='circle'),
-                    showlegend=False,
-                    hovertext=f"Y-intercept: 1/Vmax = {y_intercept_no_inh:.4f}"
-                ))
-                fig_lb.add_trace(go.Scatter(
-                    x=[x_intercept_no_inh], y=[0],
-                    mode='markers',
-                    marker=dict(size=10, color='blue', symbol='square'),
-                    showlegend=False,
-                    hovertext=f"X-intercept: -1/Km = {x_intercept_no_inh:.4f}"
-                ))
+                lb_info += "Lines are parallel ✓"
+            else:
+                lb_info += "Lines intersect in 2nd quadrant ✓"
+        st.caption(lb_info)
+    
+    # Add numeric readouts of calculated parameters
+    if show_inhibitor:
+        st.markdown("---")
+        st.markdown("### 📊 Calculated Kinetic Parameters")
         
-        fig_lb.update_layout(
-            xaxis_title='1/[S] (1/mM)',
-            yaxis_title='1/v (min/µmol)',
-            height=400,
-            showlegend=True,
-            legend=dict(x=0.05, y=0.95),
-            margin=dict(l=10, r=10, t=30, b=10)
-        )
+        col_param1, col_param2, col_param3, col_param4 = st.columns(4)
         
-        # Add grid for easier interpretation
-        fig_lb.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
-        fig_lb.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
+        with col_param1:
+            st.metric(
+                label="Km (no inhibitor)",
+                value=f"{km:.2f} mM",
+                help="Michaelis constant - substrate concentration at half Vmax"
+            )
         
-        st.plotly_chart(fig_lb, use_container_width=True)
+        with col_param2:
+            st.metric(
+                label="Apparent Km (with inhibitor)",
+                value=f"{apparent_km:.2f} mM",
+                delta=f"{((apparent_km - km) / km * 100):.1f}%",
+                delta_color="inverse",
+                help="Effective Km in presence of inhibitor"
+            )
         
-        # Info box for LB plot showing intercept values (if annotations toggled)
-        if show_intercepts:
-            lb_info = "**Intercept Values:**\n\n"
-            lb_info += f"🔵 **No Inhibitor:**\n"
-            lb_info += f"  • Y-intercept (⚫) = 1/Vmax = {y_intercept_no_inh:.4f}\n"
-            lb_info += f"  • X-intercept (◼) = -1/Km = {x_intercept_no_inh:.4f}\n\n"
-            if show_inhibitor:
-                lb_info += f"🔴 **With Inhibitor:**\n"
-                lb_info += f"  • Y-intercept (⚫) = 1/Vmax' = {y_intercept_inh:.4f}\n"
-                if abs(x_intercept_inh - x_intercept_no_inh) > 0.01:
-                    lb_info += f"  • X-intercept (◼) = -1/Km' = {x_intercept_inh:.4f}\n"
-                else:
-                    lb_info += f"  • X-intercept (◼) = Same as no inhibitor\n"
-                lb_info += f"\n**Pattern:** "
-                if mechanism == "Competitive Inhibition":
-                    lb_info += "Lines intersect on Y-axis ✓"
-                elif mechanism == "Non-competitive Inhibition":
-                    lb_info += "Lines intersect on X-axis ✓"
-                elif mechanism == "Uncompetitive Inhibition":
-                    lb_info += "Lines are parallel ✓"
-                else:
-                    lb_info += "Lines intersect in 2nd quadrant ✓"
-            st.caption(lb_info)
+        with col_param3:
+            st.metric(
+                label="Vmax (no inhibitor)",
+                value=f"{vmax:.1f} µmol/min",
+                help="Maximum reaction velocity"
+            )
         
-        # Add numeric readouts of calculated parameters
-        if show_inhibitor:
-            st.markdown("---")
-            st.markdown("### 📊 Calculated Kinetic Parameters")
-            
-            col_param1, col_param2, col_param3, col_param4 = st.columns(4)
-            
-            with col_param1:
-                st.metric(
-                    label="Km (no inhibitor)",
-                    value=f"{km:.2f} mM",
-                    help="Michaelis constant - substrate concentration at half Vmax"
-                )
-            
-            with col_param2:
-                st.metric(
-                    label="Apparent Km (with inhibitor)",
-                    value=f"{apparent_km:.2f} mM",
-                    delta=f"{((apparent_km - km) / km * 100):.1f}%",
-                    delta_color="inverse",
-                    help="Effective Km in presence of inhibitor"
-                )
-            
-            with col_param3:
-                st.metric(
-                    label="Vmax (no inhibitor)",
-                    value=f"{vmax:.1f} µmol/min",
-                    help="Maximum reaction velocity"
-                )
-            
-            with col_param4:
-                st.metric(
-                    label="Apparent Vmax (with inhibitor)",
-                    value=f"{apparent_vmax:.1f} µmol/min",
-                    delta=f"{((apparent_vmax - vmax) / vmax * 100):.1f}%",
-                    delta_color="inverse",
-                    help="Effective Vmax in presence of inhibitor"
-                )
-            
-            # Additional metrics row
-            col_eff1, col_eff2, col_eff3 = st.columns(3)
-            
-            with col_eff1:
-                catalytic_eff = vmax / km
-                st.metric(
-                    label="Catalytic Efficiency (Vmax/Km)",
-                    value=f"{catalytic_eff:.2f}",
-                    help="Ratio of Vmax to Km - higher is more efficient"
-                )
-            
-            with col_eff2:
-                apparent_eff = apparent_vmax / apparent_km
-                st.metric(
-                    label="Apparent Efficiency (with inhibitor)",
-                    value=f"{apparent_eff:.2f}",
-                    delta=f"{((apparent_eff - catalytic_eff) / catalytic_eff * 100):.1f}%",
-                    delta_color="inverse",
-                    help="Effective catalytic efficiency with inhibitor"
-                )
-            
-            with col_eff3:
-                fold_change = catalytic_eff / apparent_eff if apparent_eff > 0 else 0
-                st.metric(
-                    label="Fold Inhibition",
-                    value=f"{fold_change:.2f}x",
-                    help="How many times less efficient the enzyme is with inhibitor"
-                )
+        with col_param4:
+            st.metric(
+                label="Apparent Vmax (with inhibitor)",
+                value=f"{apparent_vmax:.1f} µmol/min",
+                delta=f"{((apparent_vmax - vmax) / vmax * 100):.1f}%",
+                delta_color="inverse",
+                help="Effective Vmax in presence of inhibitor"
+            )
         
-        # Add interpretation below both plots
-        st.info(f"""
-        **📊 Interpretation for {mechanism}:**
+        # Additional metrics row
+        col_eff1, col_eff2, col_eff3 = st.columns(3)
         
-        **Michaelis-Menten (left):** {
-            "Vmax unchanged, apparent Km increases (shifts right)" if mechanism == "Competitive Inhibition"
-            else "Vmax decreases, Km unchanged (lower plateau)" if mechanism == "Non-competitive Inhibition"
-            else "Both Vmax and Km decrease proportionally" if mechanism == "Uncompetitive Inhibition"
-            else "Both Vmax and apparent Km change"
-        }
+        with col_eff1:
+            catalytic_eff = vmax / km
+            st.metric(
+                label="Catalytic Efficiency (Vmax/Km)",
+                value=f"{catalytic_eff:.2f}",
+                help="Ratio of Vmax to Km - higher is more efficient"
+            )
         
-        **Lineweaver-Burk (right):** {
-            "Lines intersect on Y-axis (same 1/Vmax, different X-intercept)" if mechanism == "Competitive Inhibition"
-            else "Lines intersect on X-axis (same -1/Km, different Y-intercept)" if mechanism == "Non-competitive Inhibition"
-            else "Lines are parallel (both intercepts change proportionally)" if mechanism == "Uncompetitive Inhibition"
-            else "Lines intersect in 2nd quadrant (both intercepts change differently)"
-        }
-        """)
+        with col_eff2:
+            apparent_eff = apparent_vmax / apparent_km
+            st.metric(
+                label="Apparent Efficiency (with inhibitor)",
+                value=f"{apparent_eff:.2f}",
+                delta=f"{((apparent_eff - catalytic_eff) / catalytic_eff * 100):.1f}%",
+                delta_color="inverse",
+                help="Effective catalytic efficiency with inhibitor"
+            )
+        
+        with col_eff3:
+            fold_change = catalytic_eff / apparent_eff if apparent_eff > 0 else 0
+            st.metric(
+                label="Fold Inhibition",
+                value=f"{fold_change:.2f}x",
+                help="How many times less efficient the enzyme is with inhibitor"
+            )
+    
+    # Add interpretation below both plots
+    st.info(f"""
+    **📊 Interpretation for {mechanism}:**
+    
+    **Michaelis-Menten (left):** {
+        "Vmax unchanged, apparent Km increases (shifts right)" if mechanism == "Competitive Inhibition"
+        else "Vmax decreases, Km unchanged (lower plateau)" if mechanism == "Non-competitive Inhibition"
+        else "Both Vmax and Km decrease proportionally" if mechanism == "Uncompetitive Inhibition"
+        else "Both Vmax and apparent Km change"
+    }
+    
+    **Lineweaver-Burk (right):** {
+        "Lines intersect on Y-axis (same 1/Vmax, different X-intercept)" if mechanism == "Competitive Inhibition"
+        else "Lines intersect on X-axis (same -1/Km, different Y-intercept)" if mechanism == "Non-competitive Inhibition"
+        else "Lines are parallel (both intercepts change proportionally)" if mechanism == "Uncompetitive Inhibition"
+        else "Lines intersect in 2nd quadrant (both intercepts change differently)"
+    }
+    """)
+
+@memoize("figure")
+def get_sensitivity_figure(mechanism, substrate):
+    return run_on_worker(sensitivity_figure, mechanism, substrate)
+
+# Global sensitivity over the slider ranges (fragment: the [S] slider reruns only this)
+@st.fragment
+def show_sensitivity(mechanism):
+    st.markdown("---")
+    if not st.checkbox("🎲 Show global sensitivity analysis (Sobol indices)", key="show_sensitivity",
+                       help="Which inputs drive apparent Km, apparent Vmax and velocity across the slider ranges"):
+        return
+    substrate = st.select_slider("[S] for the velocity output (mM)", options=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0],
+                                 value=1.0, key="sensitivity_substrate")
+    try:
+        with st.spinner("Evaluating about a million parameter sets..."):
+            fig = get_sensitivity_figure(mechanism, substrate)
+    except RuntimeError as e:  # Overloaded, or a worker that died
+        st.error(f"⚠️ Sensitivity analysis not run: {e}")
+        return
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption("Km, Vmax, [I], Ki and α' are sampled over their full slider ranges with a Sobol sequence "
+               "(Saltelli design, 2¹⁷ base samples). **S1** is the share of the output's variance due to one "
+               "input alone; **ST** adds its interactions with the others, so ST − S1 measures interaction. "
+               "Error bars are 95% bootstrap intervals. α' only acts in mixed inhibition.")
+
+# Inverse of the kinetic effects: the [I] needed for a target inhibition (fragment)
+@st.fragment
+def show_dose_planning(mechanism):
+    st.markdown("---")
+    if not st.checkbox("🎯 Show dose planning ([I] needed for a target inhibition)", key="show_dose_planning",
+                       help="Solves for the inhibitor concentration instead of choosing it"):
+        return
+    km = st.session_state.get("km_slider", 1.0)
+    ki = st.session_state.get("ki_slider", 1.0)
+    col_target, col_substrate, col_ratio = st.columns(3)
+    with col_target:
+        target = st.slider("Target inhibition (%)", 5, 99, 50, 1, key="planning_target")
+    with col_substrate:
+        substrate = st.select_slider("[S] (mM)", options=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0], value=1.0,
+                                     key="planning_substrate")
+    with col_ratio:
+        ki_prime_ratio = st.slider("Ki' / Ki (ES-complex binding)", 0.2, 10.0, 2.0, 0.1, key="planning_ki_ratio",
+                                   disabled=mechanism != "Mixed Inhibition",
+                                   help="Mixed inhibition only: α' = 1 + [I]/Ki'")
+    required = inhibitor_for_inhibition(mechanism, target / 100, substrate, km, ki, ki_prime_ratio * ki)
+    st.metric(f"[I] for {target}% inhibition at Km = {km:.2f} mM, Ki = {ki:.2f}, [S] = {substrate:g} mM",
+              f"{float(required):.3g} µM")
+    st.plotly_chart(inhibitor_requirement_figure(mechanism, target, km, ki_prime_ratio, marker=(ki, substrate)),
+                    use_container_width=True)
+    st.caption("Every point of the grid is solved in closed form: v₀/vᵢ = (Km·α + [S]·α') / (Km + [S]) is linear "
+               "in [I] for all four mechanisms. The ✕ marks the current Ki slider and [S]. Competitive "
+               "inhibitors need more [I] at high [S]; uncompetitive ones need more at low [S].")
 
 # IC50/Ki Calculator Section
 def show_calculator():
     st.markdown('<div class="section-header">🧮 IC50 & Ki Calculator</div>', unsafe_allow_html=True)
     
     # User Guide for Calculator
-    with st.expander("📖 How to Use the Calculator Tools", expanded=False):
-        st.markdown("""
-        **Three Powerful Calculation Tools - Choose a Tab:**
-        
-        ---
-        
-        ### **Tab 1: IC50 Calculator** 🧪
-        
-        **Purpose:** Calculate IC50 from your experimental data
-        
-        **Step-by-Step:**
-        1. Select number of data points (3-10 recommended, 5 is good start)
-        2. Enter your **inhibitor concentrations** (μM) in left column
-        3. Enter corresponding **activity percentages** (0-100%) in right column
-        4. IC50 is automatically calculated and displayed with a dose-response curve
-        5. Click **"Download Results as CSV"** to export data
-        
-        **Tips:**
-        - Your data must cross 50% activity for calculation to work
-        - Use log-spaced concentrations for better curve fitting (e.g., 0.1, 1, 10, 100)
-        - Duplicate concentrations will trigger a warning
-        - Lower IC50 = more potent inhibitor
-        
-        **Interpreting Results:**
-        - Very potent: < 0.1 μM
-        - Potent: 0.1-1 μM
-        - Moderate: 1-10 μM
-        - Weak: > 10 μM
-        
-        ---
-        
-        ### **Tab 2: Ki Calculator** ⚖️
-        
-        **Purpose:** Convert IC50 to Ki (inhibition constant) using Cheng-Prusoff equations
-        
-        **Step-by-Step:**
-        1. Select your **inhibition type** (Competitive, Non-competitive, or Uncompetitive)
-        2. Enter your **IC50 value** (μM) from experiments
-        3. Enter **substrate concentration [S]** (μM) used in assay
-        4. Enter **Km value** (μM) for your enzyme
-        5. Ki is automatically calculated with the appropriate formula
-        
-        **Formulas Used:**
-        - Competitive: Ki = IC50 / (1 + [S]/Km)
-        - Non-competitive: Ki = IC50
-        - Uncompetitive: Ki = IC50 / (1 + Km/[S])
-        
-        **Important:** Units must be consistent (all μM or all nM)
-        
-        ---
-        
-        ### **Tab 3: Dose-Response Curve Generator** 📈
-        
-        **Purpose:** Generate theoretical dose-response curves for presentations or teaching
-        
-        **Step-by-Step:**
-        1. Set **Top Activity** (usually 100% for no inhibitor)
-        2. Set **Bottom Activity** (usually 0% for complete inhibition)
-        3. Enter desired **IC50 value** (μM)
-        4. Adjust **Hill Slope** (1.0 is standard, higher = steeper curve)
-        5. Set **Max Concentration** range for X-axis
-        6. View generated curve instantly
-        
-        **Uses:**
-        - Creating example curves for presentations
-        - Understanding Hill equation behavior
-        - Comparing different IC50 values visually
-        
-        ---
-        
-        **All calculators provide instant results as you adjust parameters!**
-        """)
+    show_guide("📖 How to Use the Calculator Tools", "calculator")
     
     st.write("""Calculate inhibition constants and understand drug potency metrics.""")
     
     # Create tabs for different calculators
-    tab1, tab2, tab3 = st.tabs(["IC50 Calculator", "Ki Calculator", "Dose-Response Curve"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["IC50 Calculator", "Ki Calculator", "Dose-Response Curve",
+                                            "Combination Synergy", "PK/PD Simulator"])
     
     with tab1:
-        st.subheader("IC50 Calculator")
-        st.write("**IC50** (Half maximal inhibitory concentration): The concentration of inhibitor required to reduce enzyme activity by 50%.")
-        
-        # Description and importance
-        st.info("""
-        💡 **What is IC50?**  
-        IC50 measures how much inhibitor you need to cut enzyme activity in half. Think of it as the "potency score" 
-        for your drug candidate - lower IC50 means stronger inhibition!
-        """)
-        
-        with st.expander("🎯 Why IC50 Matters in Drug Discovery", expanded=False):
-            st.write("""
-            IC50 is the go-to metric that pharmaceutical companies use to:
-            
-            - **Compare candidates** - Which compound works best?
-            - **Set doses** - How much drug do patients need?
-            - **Predict success** - Lower IC50 often means better drugs
-            - **Track progress** - Are our modifications improving potency?
-            
-            **Real success story:** HIV protease inhibitors with IC50 < 10 nM became life-saving blockbuster drugs, 
-            while those with IC50 > 100 nM didn't make it past early trials. That 10-fold difference changed millions of lives!
-            """)
-        
-        with st.expander("📊 How to Use This Tool", expanded=False):
-            st.write("""
-            **What you'll need:** Data from your enzyme activity assay
-            
-            **Quick steps:**
-            1. Choose how many data points you have (5-7 is ideal)
-            2. Enter your inhibitor concentrations (try a wide range like 0.1, 1, 10, 100 µM)
-            3. Enter the % enzyme activity at each concentration (100% = no inhibitor)
-            4. Watch the calculator plot your dose-response curve and find IC50!
-            5. Download your results as CSV for your records
-            
-            💡 **Pro tip:** Make sure your data crosses 50% activity - test both high and low concentrations!
-            """)
-        
-        col1, col2 = st.columns([1, 1])
+        show_ic50_calculator()
+
+    with tab2:
+        show_ki_calculator()
+
+    with tab3:
+        show_dose_response_generator()
+
+    with tab4:
+        show_synergy_calculator()
+
+    with tab5:
+        show_pkpd_simulator()
+
+# Background batch jobs, shared by all sessions; each session only sees its own
+@st.cache_resource
+def get_job_queue():
+    return JobQueue()
+
+# Heavy interactive computations (Sobol indices, design scoring, synergy
+# surfaces, population PK) go to the job queue's workers ahead of any batch
+# chunk, so busy sessions queue there instead of all computing on script
+# threads. Raises Overloaded when the queue is full. The in-browser build has
+# no workers and computes inline.
+def run_on_worker(fn, *args):
+    if not BATCH_JOBS_AVAILABLE:
+        return fn(*args)
+    return get_job_queue().run(fn, *args).result()
+
+def session_owner():
+    if "job_owner" not in st.session_state:
+        st.session_state.job_owner = os.urandom(8).hex()
+    return st.session_state.job_owner
+
+def read_batch_csv(uploaded, required):
+    df = pd.read_csv(uploaded)
+    df.columns = [c.strip().lower() for c in df.columns]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        st.error(f"CSV is missing column(s): {', '.join(missing)}")
+        return None
+    return df.dropna(subset=required)
+
+def submit_batch_job(kind, fn, items, points=None, **kwargs):
+    try:
+        job_id = get_job_queue().submit(kind, fn, items, owner=session_owner(), **kwargs)
+    except Overloaded as e:
+        st.error(f"⚠️ Batch not started: {e}")
+        return
+    if points is not None:
+        # Kept for the long "points" export table; the job only returns per-compound fits
+        st.session_state.setdefault("batch_points", {})[job_id] = points
+    # Fit options, so that edited curves are refitted the same way
+    st.session_state.setdefault("batch_options", {})[job_id] = kwargs
+
+def show_columnar_downloads(stem, table_names, make_tables, key):
+    # make_tables is only called when a button is clicked, off the script thread
+    formats = ["parquet", "feather"]
+    for col, fmt in zip(st.columns(len(formats)), formats):
+        label, mime = FORMATS[fmt]
+        col.download_button(f"📅 Download as {label}", data=lambda fmt=fmt: export_tables(make_tables(), fmt),
+                            file_name=export_file_name(stem, table_names, fmt),
+                            mime=mime if len(table_names) == 1 else "application/zip", key=f"{key}_{fmt}")
+
+def show_batch_jobs(kind):
+    jobs = get_job_queue().jobs(owner=session_owner(), kind=kind)
+    if not jobs:
+        return
+    active = any(job["state"] not in FINISHED for job in jobs)
+    # Poll only while something is running, so idle sessions don't rerun
+    st.fragment(batch_jobs_panel, run_every=1.0 if active else None)(kind, active)
+
+def batch_export_tables(kind, results_df, points):
+    tables = {"compounds": results_table(results_df, IC50_SCHEMA if kind == "ic50" else KI_SCHEMA)}
+    if points is not None:
+        tables["points"] = points
+    return tables
+
+# Batch results browser: pages, sorts and filters in an indexed store, and only
+# draws curve thumbnails for the rows on the current page
+BROWSER_PAGE_SIZE = 50
+BROWSER_THUMBNAILS = 12
+
+def get_results_store(job_id, results_df, points):
+    stores = st.session_state.setdefault("result_stores", {})
+    if job_id not in stores:
+        stores[job_id] = ResultsStore(results_df, points)
+    return stores[job_id]
+
+@st.fragment
+def show_results_browser(job_id, results_df, points):
+    store = get_results_store(job_id, results_df, points)
+    start_refit(job_id, store)  # retries refits that failed or were rejected
+    if store.refit_error:
+        st.error(f"⚠️ Refit failed, the previous fit is still shown: {store.refit_error}")
+        store.refit_error = None
+    if store.refitting:
+        st.fragment(show_refit_progress, run_every=REFIT_POLL_SECONDS)(store)
+
+    col_search, col_sort, col_order = st.columns([2, 1, 1])
+    search = col_search.text_input("Search compound ID", key=f"browse_search_{job_id}")
+    sort = col_sort.selectbox("Sort by", list(SORT_COLUMNS), index=1, key=f"browse_sort_{job_id}")
+    descending = col_order.toggle("Descending", key=f"browse_desc_{job_id}")
+
+    filters = {"search": search.strip() or None}
+    counts = store.class_counts()
+    if counts:
+        col_class, col_flags = st.columns([3, 2])
+        present = [c for c in CURVE_CLASSES if c in counts]
+        classes = col_class.pills("Curve class", present, selection_mode="multi", default=present,
+                                  format_func=lambda c: f"{c} ({counts[c]:,})", key=f"browse_class_{job_id}")
+        if set(classes) != set(present):
+            filters["classes"] = classes
+        filters["flags"] = col_flags.multiselect(
+            "Only curves flagged", CURVE_FLAGS, format_func=lambda f: f.removeprefix("flag_").replace("_", " "),
+            key=f"browse_flags_{job_id}")
+    low, high = store.value_range("hill_slope")
+    if low is not None and high > low:
+        low, high = float(np.floor(low * 10) / 10), float(np.ceil(high * 10) / 10)
+        hill_range = st.slider("Hill slope", low, high, (low, high), step=0.1, key=f"browse_hill_{job_id}")
+        if hill_range != (low, high):
+            # Only filter once narrowed, so compounds without a slope stay listed by default
+            filters["hill_range"] = hill_range
+
+    total = store.count(**filters)
+    pages = max(1, -(-total // BROWSER_PAGE_SIZE))
+    page_key = f"browse_page_{job_id}"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=page_key)
+    st.caption(f"{total:,} of {len(results_df):,} compounds match · page {page} of {pages}")
+
+    page_df = store.page(page - 1, BROWSER_PAGE_SIZE, sort, descending, **filters)
+    st.dataframe(page_df, hide_index=True)
+
+    if store.has_points and not page_df.empty and st.toggle("Show curve thumbnails", key=f"browse_thumbs_{job_id}"):
+        visible = page_df.head(BROWSER_THUMBNAILS)
+        st.plotly_chart(curve_thumbnails_figure(visible, store.points_for(list(visible["compound"]))),
+                        width='stretch')
+        if len(page_df) > BROWSER_THUMBNAILS:
+            st.caption(f"Thumbnails for the first {BROWSER_THUMBNAILS} rows on this page.")
+
+    if store.has_points and not page_df.empty and st.toggle("Edit points", key=f"browse_edit_{job_id}"):
+        show_point_editor(job_id, store, list(page_df["compound"]))
+
+# Point editor: an edit refits only the compound it belongs to, warm-started
+# from that compound's last fit. The refit runs in the background and is
+# patched into the store when it comes back, so editing never blocks the page.
+REFIT_POLL_SECONDS = 0.5
+
+def refit_edited_points(job_id, store, edits):
+    store.edit_points(edits)
+    start_refit(job_id, store)
+
+def start_refit(job_id, store):
+    # Everything still stale is refitted, including compounds whose last refit failed
+    compounds = store.refit_needed()
+    if not compounds:
+        return
+    curves, initial, point_ids = store.curves(compounds)
+    options = st.session_state.get("batch_options", {}).get(job_id, {})
+    serials = store.begin_refit(compounds)
+    try:
+        future = get_job_queue().run(refit_curves, curves, initial, **options)
+    except Overloaded as e:
+        store.end_refit(serials, str(e))
+        return
+    future.add_done_callback(lambda f: finish_refit(f, store, serials, point_ids))
+
+def finish_refit(future, store, serials, point_ids):
+    # Runs on the job queue's thread, so it only touches the store
+    if future.cancelled():
+        store.end_refit(serials, "cancelled")
+    elif future.exception() is not None:
+        e = future.exception()
+        store.end_refit(serials, f"{type(e).__name__}: {e}")
+    else:
+        store.apply_fits(future.result(), point_ids, serials)
+
+def show_refit_progress(store):
+    # Polls while refits are in flight; once they are all back, one rerun shows them
+    if store.refitting:
+        st.caption(f"⏳ Refitting {len(store.refitting)} edited compound(s); the previous fit is shown until then.")
+    else:
+        st.rerun()
+
+POINT_EDIT_COLUMNS = ("concentration_uM", "activity_pct", "excluded")
+
+def apply_point_edits(job_id, store, point_ids, key):
+    # data_editor callback: submits the refit and returns; edited_rows is
+    # keyed by row position
+    edits = {}
+    for position, changes in st.session_state[key]["edited_rows"].items():
+        changes = {name: value for name, value in changes.items() if name in POINT_EDIT_COLUMNS and value is not None}
+        if changes:
+            edits[point_ids[int(position)]] = changes
+    if edits:
+        refit_edited_points(job_id, store, edits)
+
+def show_point_editor(job_id, store, compounds):
+    compound = st.selectbox("Compound", compounds, key=f"edit_compound_{job_id}")
+    points = store.points_for([compound]).set_index("point_id")
+    points = points[["concentration_uM", "activity_pct", "excluded", "masked"]].astype(
+        {"excluded": bool, "masked": bool})
+    # A refit bumps the revision, which resets the editor to the stored values
+    key = f"edit_{job_id}_{compound}_{store.revisions.get(compound, 0)}"
+    st.data_editor(points, disabled=["masked"], key=key, on_change=apply_point_edits,
+                   args=(job_id, store, points.index.tolist(), key), column_config={
+                       "concentration_uM": st.column_config.NumberColumn("[I] (µM)", min_value=0.0),
+                       "activity_pct": st.column_config.NumberColumn("Activity (%)"),
+                       "excluded": st.column_config.CheckboxColumn("Exclude", help="Leave out of the fit"),
+                       "masked": st.column_config.CheckboxColumn("Outlier", help="Masked by the robust fit"),
+                   })
+    st.caption("Edits refit only this compound; the table, thumbnails and downloads update in place.")
+
+def current_results(store, results_df, points):
+    # After point edits the store holds the current points and the refits,
+    # which are patched into results_df. Called from download callables, so it
+    # only touches the store, not session state.
+    if store is None or not store.edited:
+        return results_df, points
+    frame = store.points_frame()
+    return store.patch_results(results_df), points_table(frame["compound"], frame["concentration_uM"],
+                                                         frame["activity_pct"], frame["masked"], frame["excluded"])
+
+def batch_jobs_panel(kind, was_active):
+    queue = get_job_queue()
+    jobs = queue.jobs(owner=session_owner(), kind=kind)
+    for job in reversed(jobs):
+        label = f"Job {job['id']}: {job['done']}/{job['total']} compounds ({job['state']})"
+        if job["state"] in FINISHED:
+            with st.status(label, state="error" if job["state"] == "failed" else "complete"):
+                if job["error"]:
+                    st.error(job["error"])
+                results_df = pd.DataFrame(queue.result(job["id"]))
+                points = get_batch_points(job["id"], results_df)
+                if not results_df.empty:
+                    if kind == "ic50":
+                        show_results_browser(job["id"], results_df, points)
+                    else:
+                        st.dataframe(results_df, hide_index=True)
+                    # Downloads read the store when clicked, so point edits made in the browser are included
+                    store = st.session_state.get("result_stores", {}).get(job["id"])
+                    if len(results_df) <= CSV_MAX_ROWS:
+                        st.download_button("📅 Download Results as CSV",
+                                           lambda store=store, results_df=results_df, points=points:
+                                           current_results(store, results_df, points)[0].to_csv(index=False),
+                                           file_name=f"{kind}_batch_{job['id']}.csv", mime="text/csv",
+                                           key=f"download_{job['id']}")
+                    if COLUMNAR_EXPORTS:
+                        show_columnar_downloads(
+                            f"{kind}_batch_{job['id']}", ["compounds"] if points is None else ["compounds", "points"],
+                            lambda store=store, results_df=results_df, points=points:
+                            batch_export_tables(kind, *current_results(store, results_df, points)),
+                            key=f"export_{job['id']}")
+        else:
+            col_progress, col_cancel = st.columns([4, 1])
+            col_progress.progress(job["progress"], text=label)
+            col_cancel.button("Cancel", key=f"cancel_{job['id']}", on_click=queue.cancel, args=(job["id"],))
+    if was_active and not any(job["state"] not in FINISHED for job in jobs):
+        # Everything finished: rerun the page once to stop polling
+        st.rerun()
+
+# Batch curve fits: interpolation as in the single-compound calculator, or a
+# four-parameter Hill fit with an optional robust loss and outlier masking
+BATCH_FIT_METHODS = {
+    "Interpolation": None,
+    "Hill fit (least squares)": "linear",
+    "Hill fit (Huber)": "huber",
+    "Hill fit (Tukey)": "tukey",
+}
+
+def batch_fit_options(key):
+    col_method, col_mask = st.columns([2, 1])
+    method = col_method.selectbox("Curve fit", list(BATCH_FIT_METHODS), index=2, key=f"{key}_fit_method",
+                                  help="Huber down-weights large residuals; Tukey ignores gross outliers entirely.")
+    loss = BATCH_FIT_METHODS[method]
+    mask_outliers = col_mask.checkbox("Mask outliers", value=True, disabled=loss is None, key=f"{key}_mask",
+                                      help="Drop up to two points per curve whose residual is far outside "
+                                           "the curve's own scatter (over 4 robust SDs), refitting after each.")
+    return {"loss": loss, "mask_outliers": loss is not None and mask_outliers}
+
+def get_batch_points(job_id, results_df):
+    # Points for the exports and thumbnails, with outliers flagged once the fit is done
+    points = st.session_state.get("batch_points", {}).get(job_id)
+    marked = st.session_state.setdefault("batch_points_marked", set())
+    if points is not None and job_id not in marked and not results_df.empty:
+        points = mark_masked_points(points, results_df)
+        st.session_state["batch_points"][job_id] = points
+        marked.add(job_id)
+    return points
+
+def submit_ic50_batch(df, **fit_options):
+    # Points are kept grouped by compound in the order the fit sees them, so
+    # outlier indices from the fit map straight onto rows of the points table
+    df = df.iloc[np.argsort(df.groupby("compound", sort=False).ngroup().to_numpy(), kind="stable")]
+    submit_batch_job("ic50", ic50_batch_chunk, group_dose_response(df),
+                     points=points_table(df["compound"].astype(str), df["concentration"],
+                                         df["activity"]) if COLUMNAR_EXPORTS else None, **fit_options)
+
+@st.cache_data
+def load_plates(raw_bytes, map_bytes, plate_format):
+    signals = read_plate_grids(raw_bytes.decode("utf-8-sig"), plate_format)
+    roles, compounds, concentrations = read_plate_map(pd.read_csv(io.BytesIO(map_bytes)), plate_format)
+    if roles.shape[0] not in (1, signals.shape[0]):
+        raise ValueError(f"The plate map describes {roles.shape[0]} plates but the export has {signals.shape[0]}")
+    return signals, roles, compounds, concentrations
+
+def show_plate_import():
+    st.write("Upload raw plate-reader grids (one grid per plate, any number of plates) and a plate "
+             "map CSV with columns **well**, **role** (sample / high / low / empty), **compound** and "
+             "**concentration** (µM), plus an optional **plate** column (1, 2, ...) when plates have "
+             "different layouts. Wells are normalized to % activity against each plate's high "
+             "(uninhibited) and low (fully inhibited) controls.")
+    plate_format = st.radio("Plate format", list(PLATE_FORMATS), horizontal=True,
+                            format_func=lambda n: f"{n}-well", key="plate_format")
+    col_raw, col_map = st.columns(2)
+    raw_file = col_raw.file_uploader("Plate-reader export", type=["csv", "txt", "tsv"], key="plate_raw_file")
+    map_file = col_map.file_uploader("Plate map", type="csv", key="plate_map_file")
+    if raw_file is None or map_file is None:
+        return
+
+    try:
+        signals, roles, compounds, concentrations = load_plates(raw_file.getvalue(), map_file.getvalue(),
+                                                                plate_format)
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+        return
+
+    qc = plate_qc(signals, roles)
+    passing = int(qc["pass"].sum())
+    st.markdown(f"#### Plate QC ({passing} of {len(qc)} plates pass Z′ ≥ {Z_PRIME_PASS})")
+    st.dataframe(qc, hide_index=True, column_config={
+        "z_prime": st.column_config.NumberColumn("Z′", format="%.3f"),
+        "signal_to_background": st.column_config.NumberColumn("S/B", format="%.2f"),
+        "cv_high_pct": st.column_config.NumberColumn("CV high (%)", format="%.1f"),
+        "cv_low_pct": st.column_config.NumberColumn("CV low (%)", format="%.1f"),
+    })
+
+    plate = st.selectbox("Show plate", qc["plate"], key="plate_heatmap_plate")
+    st.plotly_chart(plate_heatmap_figure(normalize_plates(signals, roles)[plate - 1],
+                                         title=f"Plate {plate}: normalized activity (%)"), width='stretch')
+
+    only_passing = st.checkbox("Only fit plates that pass QC", value=True, key="plate_only_passing")
+    plates = np.flatnonzero(qc["pass"]) if only_passing else None
+    if plates is not None and plates.size == 0:
+        st.warning("⚠️ No plate passes QC; untick the box above to fit them anyway.")
+        return
+    fit_options = batch_fit_options("plate")
+    if st.button("Fit normalized data", key="plate_fit_start"):
+        submit_ic50_batch(plate_dose_response(signals, roles, compounds, concentrations, plates), **fit_options)
+
+# IC50 Calculator tab (fragment)
+@st.fragment
+def show_ic50_calculator():
+    st.subheader("IC50 Calculator")
+    st.write("**IC50** (Half maximal inhibitory concentration): The concentration of inhibitor required to reduce enzyme activity by 50%.")
+    
+    # Description and importance
+    st.info("""
+    💡 **What is IC50?**  
+    IC50 measures how much inhibitor you need to cut enzyme activity in half. Think of it as the "potency score" 
+    for your drug candidate - lower IC50 means stronger inhibition!
+    """)
+    
+    show_guide("🎯 Why IC50 Matters in Drug Discovery", "ic50_why")
+    
+    show_guide("📊 How to Use This Tool", "ic50_how")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### Input Parameters")
+        
+        st.markdown("#### Inhibitor Concentrations & Activities")
+        num_points = st.slider("Number of data points", 3, 10, 5,
+                              help="More points give better curve fitting (5-7 recommended)")
+        
+        concentrations = []
+        activities = []
+        
+        for i in range(num_points):
+            col_a, col_b = st.columns(2)
+            with col_a:
+                conc = st.number_input(f"[I]_{i+1} (µM)", min_value=0.0, value=float((i+1)*2), 
+                                      step=0.1, key=f"conc_{i}")
+                concentrations.append(conc)
+            with col_b:
+                act = st.number_input(f"Activity_{i+1} (%)", min_value=0.0, max_value=100.0, 
+                                    value=float(max(10, 100 - i*18)), step=1.0, key=f"act_{i}")
+                activities.append(act)
+    
+    with col2:
+        st.markdown("#### Results")
         
-        with col1:
-            st.markdown("#### Input Parameters")
+        if len(concentrations) >= 3:
+            # Validate input data
+            conc_array = np.array(concentrations)
+            act_array = np.array(activities)
             
-            st.markdown("#### Inhibitor Concentrations & Activities")
-            num_points = st.slider("Number of data points", 3, 10, 5,
-                                  help="More points give better curve fitting (5-7 recommended)")
+            # Check for duplicate concentrations
+            unique_conc = np.unique(conc_array)
+            if len(unique_conc) < len(conc_array):
+                st.warning("⚠️ Warning: Duplicate concentration values detected. This may affect curve fitting accuracy.")
             
-            concentrations = []
-            activities = []
+            # Calculate IC50 by interpolation at 50% activity (data sorted by concentration)
+            ic50, conc_sorted, act_sorted = interpolate_ic50(conc_array, act_array)
             
-            for i in range(num_points):
-                col_a, col_b = st.columns(2)
-                with col_a:
-                    conc = st.number_input(f"[I]_{i+1} (µM)", min_value=0.0, value=float((i+1)*2), 
-                                          step=0.1, key=f"conc_{i}")
-                    concentrations.append(conc)
-                with col_b:
-                    act = st.number_input(f"Activity_{i+1} (%)", min_value=0.0, max_value=100.0, 
-                                        value=float(max(10, 100 - i*18)), step=1.0, key=f"act_{i}")
-                    activities.append(act)
-        
-        with col2:
-            st.markdown("#### Results")
-            
-            if len(concentrations) >= 3:
-                # Validate input data
-                conc_array = np.array(concentrations)
-                act_array = np.array(activities)
-                
-                # Check for duplicate concentrations
-                unique_conc = np.unique(conc_array)
-                if len(unique_conc) < len(conc_array):
-                    st.warning("⚠️ Warning: Duplicate concentration values detected. This may affect curve fitting accuracy.")
-                
-                # Fit dose-response curve (Hill equation)
-                # y = Bottom + (Top - Bottom) / (1 + (IC50/x)^HillSlope)
-                # Simplified: assume Hill slope = 1
+            if ic50 is not None:
+                st.success(f"### IC50 = {ic50:.2f} µM")
                 
-                # Calculate IC50 using interpolation
-                # Sort by concentration
-                sorted_indices = np.argsort(conc_array)
-                conc_sorted = conc_array[sorted_indices]
-                act_sorted = act_array[sorted_indices]
+                # Plot the data with a Hill curve (slope 1) through the IC50
+                fig = ic50_fit_figure(conc_sorted, act_sorted, ic50)
+                st.plotly_chart(fig, width='stretch')
                 
-                # Find IC50 (50% activity)
-                if len(act_sorted) > 1 and act_sorted.max() > 50 and act_sorted.min() < 50:
-                    # Check if activities decrease with concentration (typical inhibition)
-                    if act_sorted[0] > act_sorted[-1]:
-                        # Activities decrease: reverse for interpolation
-                        ic50 = np.interp(50, act_sorted[::-1], conc_sorted[::-1])
-                    else:
-                        # Activities increase: interpolate directly
-                        ic50 = np.interp(50, act_sorted, conc_sorted)
-                    
-                    st.success(f"### IC50 = {ic50:.2f} µM")
-                    
-                    # Generate smooth curve
-                    max_conc = max(max(concentrations), 1.0)  # Ensure minimum range
-                    conc_smooth = np.linspace(0.01, max_conc*1.2, 100)
-                    # Hill equation with calculated IC50
-                    hill_slope = 1.0
-                    
-                    # Determine top and bottom based on actual data pattern
-                    if act_sorted[0] > act_sorted[-1]:
-                        # Activities decrease with concentration (typical inhibition)
-                        top = act_sorted[0]
-                        bottom = act_sorted[-1]
-                        # Hill equation for inhibition: activity decreases
-                        act_smooth = bottom + (top - bottom) / (1 + (conc_smooth/ic50)**hill_slope)
-                    else:
-                        # Activities increase with concentration (atypical)
-                        top = act_sorted[-1]
-                        bottom = act_sorted[0]
-                        # Inverse Hill equation
-                        act_smooth = bottom + (top - bottom) / (1 + (ic50/conc_smooth)**hill_slope)
-                    
-                    # Plot
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(x=conc_sorted, y=act_sorted, mode='markers',
-                                           name='Data', marker=dict(size=10, color='red')))
-                    fig.add_trace(go.Scatter(x=conc_smooth, y=act_smooth, mode='lines',
-                                           name='Fit', line=dict(color='blue')))
-                    fig.add_hline(y=50, line_dash="dash", line_color="green", 
-                                annotation_text="IC50")
-                    
-                    fig.update_layout(
-                        title="Dose-Response Curve",
-                        xaxis_title="Inhibitor Concentration (µM)",
-                        yaxis_title="Activity (%)",
-                        height=400,
-                        xaxis_type="log"
-                    )
-                    st.plotly_chart(fig, width='stretch')
-                    
-                    # Interpretation
-                    st.info(f"""**Interpretation:**
+                # Interpretation
+                st.info(f"""**Interpretation:**
 - At {ic50:.2f} µM, the enzyme activity is reduced to 50%
 - Lower IC50 = More potent inhibitor
 - Typical potency ranges:
@@ -1230,138 +975,129 @@ def show_calculator():
   - Potent: 0.1-1 µM  
   - Moderate: 1-10 µM
   - Weak: > 10 µM
-                    """)
-                    
-                    # Export data option
-                    results_df = pd.DataFrame({
-                        'Concentration_uM': conc_sorted,
-                        'Activity_percent': act_sorted,
-                        'IC50_uM': [ic50] * len(conc_sorted)
-                    })
-                    csv = results_df.to_csv(index=False)
-                    st.download_button(
-                        label="📅 Download Results as CSV",
-                        data=csv,
-                        file_name="ic50_results.csv",
-                        mime="text/csv"
-                    )
-                else:
-                    st.warning("⚠️ **Cannot calculate IC50:** Data must cross the 50% activity threshold. "
-                             f"Current range: {act_sorted.min():.1f}% to {act_sorted.max():.1f}%. "
-                             "Please adjust your data points to include values both above and below 50%.")
+                """)
+                
+                # Export data option
+                results_df = pd.DataFrame({
+                    'Concentration_uM': conc_sorted,
+                    'Activity_percent': act_sorted,
+                    'IC50_uM': [ic50] * len(conc_sorted)
+                })
+                csv = results_df.to_csv(index=False)
+                st.download_button(
+                    label="📅 Download Results as CSV",
+                    data=csv,
+                    file_name="ic50_results.csv",
+                    mime="text/csv"
+                )
+                if COLUMNAR_EXPORTS:
+                    show_columnar_downloads("ic50_results", ["compounds", "points"], lambda: {
+                        "compounds": results_table([{"compound": "sample", "IC50_uM": ic50,
+                                                     "hill_slope": hill_slope_estimate(conc_sorted, act_sorted),
+                                                     "n_points": len(conc_sorted),
+                                                     "min_activity": act_sorted.min(),
+                                                     "max_activity": act_sorted.max()}], IC50_SCHEMA),
+                        "points": points_table(["sample"] * len(conc_sorted), conc_sorted, act_sorted),
+                    }, key="ic50_export")
+            else:
+                st.warning("⚠️ **Cannot calculate IC50:** Data must cross the 50% activity threshold. "
+                         f"Current range: {act_sorted.min():.1f}% to {act_sorted.max():.1f}%. "
+                         "Please adjust your data points to include values both above and below 50%.")
+
+    if BATCH_JOBS_AVAILABLE:
+        with st.expander("📦 Batch IC50 from CSV", expanded=False):
+            st.write("Upload a long-format table with columns **compound**, **concentration** (µM) and "
+                     "**activity** (%). Each compound is fitted in the background, so you can keep "
+                     "exploring other sections while it runs.")
+            uploaded = st.file_uploader("Dose-response CSV", type="csv", key="ic50_batch_file")
+            if uploaded is not None:
+                df = read_batch_csv(uploaded, ["compound", "concentration", "activity"])
+                fit_options = batch_fit_options("ic50_batch")
+                if df is not None and st.button("Start batch fit", key="ic50_batch_start"):
+                    submit_ic50_batch(df, **fit_options)
+
+        with st.expander("🧫 Import Plate-Reader Data", expanded=False):
+            show_plate_import()
+
+        show_batch_jobs("ic50")
+
+# Ki Calculator tab (fragment)
+@st.fragment
+def show_ki_calculator():
+    st.subheader("Ki Calculator (Inhibition Constant)")
+    st.write("**Ki**: Dissociation constant of the enzyme-inhibitor complex. Lower Ki = Stronger binding.")
     
-    with tab2:
-        st.subheader("Ki Calculator (Inhibition Constant)")
-        st.write("**Ki**: Dissociation constant of the enzyme-inhibitor complex. Lower Ki = Stronger binding.")
-        
-        # Description and importance
-        st.info("""
-        💡 **What is Ki?**  
-        Ki is the "true" binding strength between your inhibitor and enzyme - it doesn't change with different assay conditions. 
-        Think of it as the fundamental measure of how tightly they stick together!
-        """)
+    # Description and importance
+    st.info("""
+    💡 **What is Ki?**  
+    Ki is the "true" binding strength between your inhibitor and enzyme - it doesn't change with different assay conditions. 
+    Think of it as the fundamental measure of how tightly they stick together!
+    """)
+    
+    show_guide("🎯 Why Ki is Better Than IC50", "ki_why")
+    
+    show_guide("🧮 How to Use This Tool (Cheng-Prusoff Equations)", "ki_how")
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### Input Parameters")
         
-        with st.expander("🎯 Why Ki is Better Than IC50", expanded=False):
-            st.write("""
-            Here's the thing about IC50 - it changes depending on your experiment setup! Same drug, different substrate 
-            concentration? Different IC50. But Ki stays constant:
-            
-            - **IC50 varies with assay conditions** (substrate, enzyme, incubation time)
-            - **Ki is the real deal** - constant for a given inhibitor-enzyme pair
-            - **Fair comparisons** - Compare data from different labs reliably
-            - **Better predictions** - Ki tells you what happens in cells, not just test tubes
-            
-            **Example:** An inhibitor might show IC50 = 10 µM in your assay, but the true Ki could be just 1 µM - 
-            10 times more potent! This happens with competitive inhibitors when you use high substrate concentrations.
-            """)
+        st.info("💡 **Important:** Ensure IC50, [S], and Km are all in the same units (µM).")
         
-        with st.expander("🧮 How to Use This Tool (Cheng-Prusoff Equations)", expanded=False):
-            st.write("""
-            This calculator converts your IC50 into Ki using the proper equation for your inhibition type.
-            
-            **What you'll need:**
-            - IC50 from your experiment (or use Tab 1 calculator)
-            - Substrate concentration [S] you used when measuring IC50
-            - Km value for your enzyme (find it in literature or measure it)
-            - Inhibition mechanism (check out the Mechanisms section if unsure!)
-            
-            **Simple steps:**
-            1. Pick your inhibition type from the dropdown
-            2. Enter your IC50 value (µM)
-            3. Enter the [S] you used in your assay (µM)
-            4. Enter Km for your enzyme (µM)
-            5. Boom! Ki is calculated automatically
-            
-            ⚠️ **Units matter!** Make sure IC50, [S], and Km all use the same units (µM recommended).
-            
-            **Quick formulas:**
-            - **Competitive:** Ki = IC50 ÷ (1 + [S]/Km) → Ki always smaller than IC50
-            - **Non-competitive:** Ki = IC50 → No correction needed!
-            - **Uncompetitive:** Ki = IC50 ÷ (1 + Km/[S]) → Depends on substrate
-            """)
+        inhibition_type = st.selectbox(
+            "Inhibition Type",
+            ["Competitive", "Non-competitive", "Uncompetitive"],
+            key="ki_type"
+        )
         
-        col1, col2 = st.columns([1, 1])
+        ic50_input = st.number_input("IC50 (µM)", min_value=0.01, value=5.0, step=0.1,
+                                    help="Concentration causing 50% inhibition (from your IC50 assay)")
+        substrate_conc = st.number_input("[S] Substrate Concentration (µM)", 
+                                       min_value=0.01, value=10.0, step=1.0,
+                                       help="Substrate concentration used in your IC50 assay")
+        km_input = st.number_input("Km (µM)", min_value=0.01, value=5.0, step=0.1,
+                                  help="Michaelis constant: substrate concentration at half Vmax")
+    
+    with col2:
+        st.markdown("#### Results")
         
-        with col1:
-            st.markdown("#### Input Parameters")
-            
-            st.info("💡 **Important:** Ensure IC50, [S], and Km are all in the same units (µM).")
-            
-            inhibition_type = st.selectbox(
-                "Inhibition Type",
-                ["Competitive", "Non-competitive", "Uncompetitive"],
-                key="ki_type"
-            )
-            
-            ic50_input = st.number_input("IC50 (µM)", min_value=0.01, value=5.0, step=0.1,
-                                        help="Concentration causing 50% inhibition (from your IC50 assay)")
-            substrate_conc = st.number_input("[S] Substrate Concentration (µM)", 
-                                           min_value=0.01, value=10.0, step=1.0,
-                                           help="Substrate concentration used in your IC50 assay")
-            km_input = st.number_input("Km (µM)", min_value=0.01, value=5.0, step=0.1,
-                                      help="Michaelis constant: substrate concentration at half Vmax")
+        # Cheng-Prusoff equation for the selected inhibition type
+        ki = cheng_prusoff_ki(inhibition_type, ic50_input, substrate_conc, km_input)
+        st.session_state["calculated_ki"] = (inhibition_type, ki)  # offered to the PK/PD Simulator tab
         
-        with col2:
-            st.markdown("#### Results")
+        if inhibition_type == "Competitive":
+            st.success(f"### Ki = {ki:.3f} µM")
             
-            # Cheng-Prusoff equation for competitive inhibition:
-            # Ki = IC50 / (1 + [S]/Km)
+            st.markdown("**Calculation:**")
+            st.latex(r"K_i = \frac{IC_{50}}{1 + \frac{[S]}{K_m}}")
             
-            if inhibition_type == "Competitive":
-                ki = ic50_input / (1 + substrate_conc / km_input)
-                st.success(f"### Ki = {ki:.3f} µM")
-                
-                st.markdown("**Calculation:**")
-                st.latex(r"K_i = \frac{IC_{50}}{1 + \frac{[S]}{K_m}}")
-                
-                st.info(f"""**Cheng-Prusoff Equation (Competitive)**
+            st.info(f"""**Cheng-Prusoff Equation (Competitive)**
 - IC50 = {ic50_input} µM
 - [S] = {substrate_conc} µM
 - Km = {km_input} µM
 - **Ki = {ki:.3f} µM**
 
 Ki represents the true binding affinity of the inhibitor to the enzyme.
-                """)
-                
-            elif inhibition_type == "Non-competitive":
-                ki = ic50_input
-                st.success(f"### Ki = {ki:.3f} µM")
-                
-                st.info(f"""**Non-competitive Inhibition**
+            """)
+            
+        elif inhibition_type == "Non-competitive":
+            st.success(f"### Ki = {ki:.3f} µM")
+            
+            st.info(f"""**Non-competitive Inhibition**
 - For non-competitive inhibitors: Ki ≈ IC50
 - **Ki = {ki:.3f} µM**
 
 The inhibitor binds to a site different from the active site.
-                """)
+            """)
+        
+        else:  # Uncompetitive
+            # For uncompetitive inhibition: Ki = IC50 / (1 + Km/[S])
+            st.success(f"### Ki = {ki:.3f} µM")
             
-            else:  # Uncompetitive
-                # For uncompetitive inhibition: Ki = IC50 / (1 + Km/[S])
-                ki = ic50_input / (1 + km_input / substrate_conc)
-                st.success(f"### Ki = {ki:.3f} µM")
-                
-                st.latex(r"K_i = \frac{IC_{50}}{1 + \frac{K_m}{[S]}}")
-                
-                st.info(f"""**Uncompetitive Inhibition**
+            st.latex(r"K_i = \frac{IC_{50}}{1 + \frac{K_m}{[S]}}")
+            
+            st.info(f"""**Uncompetitive Inhibition**
 - IC50 = {ic50_input} µM
 - Km = {km_input} µM  
 - [S] = {substrate_conc} µM
@@ -1369,170 +1105,363 @@ The inhibitor binds to a site different from the active site.
 
 The inhibitor only binds to the enzyme-substrate complex (ES).
 Ki represents the dissociation constant for the ESI complex.
-                """)
-    
-    with tab3:
-        st.subheader("Dose-Response Curve Generator")
-        st.write("Generate beautiful dose-response curves to visualize how inhibitor concentration affects enzyme activity.")
-        
-        # Description and importance
-        st.info("""
-        💡 **What is a Dose-Response Curve?**  
-        It's a graph showing how your inhibitor's activity changes with concentration - the classic S-shaped curve 
-        you see in textbooks! Perfect for planning experiments, making presentations, or understanding how drugs work.
-        """)
-        
-        with st.expander("🎯 Why You'll Love This Tool", expanded=False):
-            st.write("""
-            This generator helps you:
-            
-            - **Plan smarter experiments** - See what concentration range to test before spending money in the lab
-            - **Create presentation slides** - Generate clean, professional curves for your talks and papers
-            - **Explore "what if" scenarios** - Play with IC50 and Hill slope to understand their effects
-            - **Compare different drugs** - Generate multiple curves to see which inhibitor is more potent
-            - **Teach concepts** - Show students how the Hill equation actually looks in practice
-            
-            **Real example:** Before testing a new kinase inhibitor, you can visualize what your data might look like 
-            and choose the right concentration range (like 0.01 to 100 µM) instead of wasting samples!
             """)
+
+    if BATCH_JOBS_AVAILABLE:
+        with st.expander("📦 Batch Ki from CSV", expanded=False):
+            st.write("Upload a table with columns **compound** and **ic50** (µM). Every row is converted "
+                     "with the inhibition type, [S] and Km chosen above.")
+            uploaded = st.file_uploader("IC50 CSV", type="csv", key="ki_batch_file")
+            if uploaded is not None:
+                df = read_batch_csv(uploaded, ["compound", "ic50"])
+                if df is not None and st.button("Start batch conversion", key="ki_batch_start"):
+                    items = list(zip(df["compound"].astype(str), df["ic50"].astype(float)))
+                    submit_batch_job("ki", ki_batch_chunk, items, inhibition_type=inhibition_type,
+                                     substrate_conc=substrate_conc, km=km_input)
+            show_batch_jobs("ki")
+
+# Dose-Response Curve tab (fragment)
+@st.fragment
+def show_dose_response_generator():
+    st.subheader("Dose-Response Curve Generator")
+    st.write("Generate beautiful dose-response curves to visualize how inhibitor concentration affects enzyme activity.")
+    
+    # Description and importance
+    st.info("""
+    💡 **What is a Dose-Response Curve?**  
+    It's a graph showing how your inhibitor's activity changes with concentration - the classic S-shaped curve 
+    you see in textbooks! Perfect for planning experiments, making presentations, or understanding how drugs work.
+    """)
+    
+    show_guide("🎯 Why You'll Love This Tool", "curve_why")
+    
+    show_guide("📈 How to Use This Generator", "curve_how")
+    
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("#### Curve Parameters")
+        
+        top_activity = st.slider("Top Activity (%)", 0, 100, 100, 1,
+                                help="Activity with no inhibitor (usually 100%)")
+        bottom_activity = st.slider("Bottom Activity (%)", 0, 100, 0, 1,
+                                   help="Activity at maximum inhibition (usually 0%)")
+        ic50_curve = st.number_input("IC50 (µM)", min_value=0.01, value=1.0, step=0.1, key="ic50_curve",
+                                    help="Desired IC50 value for the theoretical curve")
+        hill_slope = st.slider("Hill Slope", 0.5, 4.0, 1.0, 0.1,
+                             help="Steepness of curve (1.0 = standard, >1 = cooperative binding, <1 = negative cooperativity)")
+        
+        conc_range_max = st.number_input("Max Concentration (µM)", min_value=0.1, value=100.0, step=1.0,
+                                        help="Maximum concentration to display on X-axis")
+    
+    with col2:
+        st.markdown("#### Generated Curve")
         
-        with st.expander("📈 How to Use This Generator", expanded=False):
-            st.write("""
-            **Super simple - just adjust the sliders!**
-            
-            **Quick steps:**
-            1. **Top Activity** - Usually 100% (enzyme working full speed without inhibitor)
-            2. **Bottom Activity** - Usually 0% (enzyme completely blocked at high concentration)
-            3. **IC50** - The magic number where activity drops to 50% (your inhibitor's potency!)
-            4. **Hill Slope** - Controls curve steepness (start with 1.0, most common value)
-            5. **Max Concentration** - How far right the graph goes (try 100× your IC50)
-            
-            💡 **Pro tip:** Play with the Hill slope slider! At h = 1.0 you get a normal curve. At h = 2.0 
-            it gets steeper (cooperative binding). At h = 0.5 it gets shallower (mixed binding modes).
-            
-            **Hill slope decoder:**
-            - **h = 1.0** → Normal, non-cooperative binding (most common)
-            - **h > 1.0** → Steep curve, multiple binding sites working together
-            - **h < 1.0** → Shallow curve, heterogeneous binding
-            
-            **Drug dev insight:** Ideal drugs have h ≈ 1.0. Very steep curves (h > 3) can be dangerous - 
-            the difference between "effective dose" and "toxic dose" becomes too narrow!
-            """)
-        
-        
-        col1, col2 = st.columns([1, 1])
+        # Validation
+        if bottom_activity > top_activity:
+            st.warning("⚠️ Bottom activity is greater than top activity. Curve will be inverted.")
         
-        with col1:
-            st.markdown("#### Curve Parameters")
-            
-            top_activity = st.slider("Top Activity (%)", 0, 100, 100, 1,
-                                    help="Activity with no inhibitor (usually 100%)")
-            bottom_activity = st.slider("Bottom Activity (%)", 0, 100, 0, 1,
-                                       help="Activity at maximum inhibition (usually 0%)")
-            ic50_curve = st.number_input("IC50 (µM)", min_value=0.01, value=1.0, step=0.1, key="ic50_curve",
-                                        help="Desired IC50 value for the theoretical curve")
-            hill_slope = st.slider("Hill Slope", 0.5, 4.0, 1.0, 0.1,
-                                 help="Steepness of curve (1.0 = standard, >1 = cooperative binding, <1 = negative cooperativity)")
-            
-            conc_range_max = st.number_input("Max Concentration (µM)", min_value=0.1, value=100.0, step=1.0,
-                                            help="Maximum concentration to display on X-axis")
+        # Generate dose-response curve from the Hill equation
+        fig = dose_response_figure(top_activity, bottom_activity, ic50_curve, hill_slope, conc_range_max)
+        st.plotly_chart(fig, width='stretch')
         
-        with col2:
-            st.markdown("#### Generated Curve")
-            
-            # Validation
-            if bottom_activity > top_activity:
-                st.warning("⚠️ Bottom activity is greater than top activity. Curve will be inverted.")
-            
-            # Generate dose-response curve
-            concentrations_curve = np.logspace(-3, np.log10(conc_range_max), 100)
-            
-            # Hill equation: y = Bottom + (Top - Bottom) / (1 + (x/IC50)^HillSlope)
-            response = bottom_activity + (top_activity - bottom_activity) / \
-                      (1 + (concentrations_curve / ic50_curve)**hill_slope)
-            
-            # Calculate actual IC50 activity level (midpoint)
-            ic50_activity_level = (top_activity + bottom_activity) / 2
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=concentrations_curve, y=response, mode='lines',
-                                   line=dict(color='purple', width=3)))
-            fig.add_hline(y=ic50_activity_level, line_dash="dash", line_color="green",
-                        annotation_text=f"IC50 = {ic50_curve} µM")
-            fig.add_vline(x=ic50_curve, line_dash="dash", line_color="green")
-            
-            fig.update_layout(
-                title="Dose-Response Curve",
-                xaxis_title="Inhibitor Concentration (µM)",
-                yaxis_title="Activity (%)",
-                height=400,
-                xaxis_type="log"
-            )
-            st.plotly_chart(fig, width='stretch')
-            
-            st.markdown("**Hill Equation:**")
-            st.latex(r"y = Bottom + \frac{Top - Bottom}{1 + \left(\frac{[I]}{IC_{50}}\right)^{h}}")
-            st.write(f"where h = {hill_slope} (Hill slope)")
+        st.markdown("**Hill Equation:**")
+        st.latex(r"y = Bottom + \frac{Top - Bottom}{1 + \left(\frac{[I]}{IC_{50}}\right)^{h}}")
+        st.write(f"where h = {hill_slope} (Hill slope)")
+
+    st.markdown("---")
+    show_dose_response_sweep(top_activity, bottom_activity, ic50_curve, hill_slope, conc_range_max)
+    show_assay_design(top_activity, bottom_activity, ic50_curve, hill_slope)
+
+def show_dose_response_sweep(top_activity, bottom_activity, ic50_curve, hill_slope, conc_range_max):
+    if not st.checkbox("🗺️ Sweep mode (IC50 × Hill slope × concentration)", key="show_dose_sweep",
+                       help="See whole families of curves as heatmaps instead of one curve"):
+        return
+    col_ic50, col_hill = st.columns(2)
+    with col_ic50:
+        ic50_low = st.number_input("Lowest IC50 (µM)", min_value=1e-4, value=ic50_curve / 100, format="%.4g",
+                                   key="sweep_ic50_low")
+        ic50_high = st.number_input("Highest IC50 (µM)", min_value=1e-4, value=ic50_curve * 100, format="%.4g",
+                                    key="sweep_ic50_high")
+    with col_hill:
+        hill_range = st.slider("Hill slopes", 0.5, 4.0, (0.5, 3.0), 0.1, key="sweep_hill_range")
+        panels = st.select_slider("Panels (one per Hill slope)", options=[1, 2, 3, 4, 6, 9], value=6,
+                                  key="sweep_panels")
+        samples = st.select_slider("Points per axis", options=[100, 200, 1000, 5000], value=200,
+                                   key="sweep_samples",
+                                   help="Sweeps finer than the heatmap are averaged down to it, in chunks, "
+                                        "so even 5000 × 5000 × 9 points stay within a small memory budget")
+    if ic50_high <= ic50_low:
+        st.warning("⚠️ The highest IC50 must be above the lowest.")
+        return
+    fig = dose_response_sweep_figure(top_activity, bottom_activity, (ic50_low, ic50_high), tuple(hill_range), panels,
+                                     conc_range_max, samples)
+    st.plotly_chart(fig, width='stretch')
+    st.caption(f"Each panel is activity over inhibitor concentration (x) and IC50 (y) for one Hill slope, from "
+               f"{samples:,} × {samples:,} × {panels} evaluations of the Hill equation. Along the dashed line "
+               f"[I] = IC50; steeper slopes sharpen the band around it. Your current curve (IC50 = {ic50_curve:g} µM, "
+               f"h = {hill_slope:g}) is one horizontal line of the panel with the nearest slope.")
+
+@st.cache_data
+def get_assay_designs(ic50_range, hill_range, noise_sd, wells, max_conc, criterion, top, bottom):
+    return run_on_worker(optimal_designs, ic50_range, hill_range, noise_sd, wells, max_conc, criterion, top, bottom)
+
+def show_assay_design(top_activity, bottom_activity, ic50_curve, hill_slope):
+    if not st.checkbox("🧪 Design the assay (optimal dilution series)", key="show_assay_design",
+                       help="Choose concentrations and replicates that pin down the IC50 best"):
+        return
+    st.write("Give what you know about the compound as ranges. Every serial dilution that fits your well budget is "
+             "scored by its Fisher information, averaged over those ranges, and the best one becomes a bench plan.")
+    col_prior, col_assay = st.columns(2)
+    with col_prior:
+        ic50_low = st.number_input("Lowest plausible IC50 (µM)", min_value=1e-4, value=ic50_curve / 10, format="%.4g",
+                                   key="design_ic50_low")
+        ic50_high = st.number_input("Highest plausible IC50 (µM)", min_value=1e-4, value=ic50_curve * 10,
+                                    format="%.4g", key="design_ic50_high")
+        hill_range = st.slider("Plausible Hill slopes", 0.5, 4.0,
+                               (max(0.5, hill_slope - 0.5), min(4.0, hill_slope + 0.5)), 0.1, key="design_hill_range")
+    with col_assay:
+        noise_sd = st.number_input("Assay noise (SD, % activity)", min_value=0.5, value=5.0, step=0.5,
+                                   key="design_noise")
+        wells = st.number_input("Wells per compound", min_value=4, max_value=64, value=24, step=1, key="design_wells")
+        max_conc = st.number_input("Highest usable concentration (µM)", min_value=0.01, value=100.0,
+                                   help="Solubility or stock limit", key="design_max_conc")
+        criterion = st.radio("Optimize for", list(DESIGN_CRITERIA), format_func=DESIGN_CRITERIA.get, horizontal=True,
+                             key="design_criterion")
+    if ic50_high < ic50_low:
+        st.warning("⚠️ The highest IC50 must be at least the lowest.")
+        return
+    if top_activity == bottom_activity:
+        st.warning("⚠️ Top and bottom activity are equal, so the curve carries no IC50 information.")
+        return
+
+    try:
+        designs = get_assay_designs((ic50_low, ic50_high), tuple(hill_range), noise_sd, int(wells), max_conc,
+                                    criterion, float(top_activity), float(bottom_activity))
+    except RuntimeError as e:  # Overloaded, or a worker that died
+        st.error(f"⚠️ Designs not scored: {e}")
+        return
+    if designs.empty:
+        st.warning("⚠️ No dilution series fits these limits. Allow more wells or a higher concentration.")
+        return
+    best = designs.iloc[0]
+    col_top, col_series, col_cv = st.columns(3)
+    col_top.metric("Top concentration", f"{best['top_uM']:.3g} µM")
+    n_points, replicates = int(best["n_points"]), int(best["replicates"])
+    col_series.metric("Series", f"{n_points} × 1:{best['dilution']:.3g}, {replicates} rep.",
+                      help=f"{n_points * replicates} wells")
+    col_cv.metric("Expected IC50 CV", f"{best['ic50_cv_pct']:.1f}%",
+                  help="Averaged over the IC50 and Hill ranges, from the Fisher information")
+    plan = dilution_plan(best["top_uM"], best["dilution"], n_points, replicates)
+    st.dataframe(plan.drop(columns="log10_concentration"), hide_index=True, width='stretch',
+                 column_config={"concentration_uM": st.column_config.NumberColumn("Concentration (µM)",
+                                                                                  format="%.4g")})
+    st.download_button("📥 Download Dilution Plan (CSV)", plan.to_csv(index=False), "dilution_plan.csv", "text/csv",
+                       key="download_dilution_plan")
+    with st.expander(f"Runners-up ({len(designs):,} designs scored)"):
+        st.dataframe(designs.head(10).drop(columns="score"), hide_index=True, width='stretch')
+
+@st.cache_data
+def analyze_synergy(df):
+    names, drugs, conc_a, conc_b, activity = read_checkerboards(df)
+    summary, surfaces = run_on_worker(analyze_checkerboards, conc_a, conc_b, activity)
+    return synergy_summary(names, drugs, summary), conc_a, conc_b, surfaces
+
+# Combination Synergy tab (fragment)
+@st.fragment
+def show_synergy_calculator():
+    st.subheader("Combination Synergy (Checkerboard)")
+    st.write("Do two inhibitors work better together than expected? Upload checkerboard plates (a dose matrix of "
+             "drug A × drug B, including each drug alone) and every combination is analysed at once.")
+    show_guide("📈 How to read the results", "synergy")
+
+    source = st.radio("Data", ["Example plates", "Upload CSV"], horizontal=True, key="synergy_source")
+    if source == "Upload CSV":
+        uploaded = st.file_uploader("Checkerboard CSV: combination, conc_a, conc_b, activity (optional drug_a, "
+                                    "drug_b); one row per well, zero doses for the single agents", type="csv",
+                                    key="synergy_upload")
+        if uploaded is None:
+            return
+        df = read_batch_csv(uploaded, list(CHECKERBOARD_COLUMNS))
+        if df is None:
+            return
+    else:
+        count = st.slider("Example combinations", 1, 48, 12, key="synergy_examples",
+                          help="Simulated 8 × 8 checkerboards with a known Greco α (shown in the name)")
+        df = example_checkerboards(count)
+        st.download_button("📥 Download Example CSV (template)", df.to_csv(index=False), "checkerboard_example.csv",
+                           "text/csv", key="download_synergy_example")
+
+    try:
+        with st.spinner("Fitting single agents and response surfaces..."):
+            summary, conc_a, conc_b, surfaces = analyze_synergy(df)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    except RuntimeError as e:  # Overloaded, or a worker that died
+        st.error(f"⚠️ Checkerboards not analysed: {e}")
+        return
+
+    st.dataframe(summary, hide_index=True, width='stretch', column_config={
+        "hsa_score": st.column_config.NumberColumn("HSA", format="%.1f"),
+        "bliss_score": st.column_config.NumberColumn("Bliss", format="%.1f"),
+        "loewe_score": st.column_config.NumberColumn("Loewe", format="%.1f"),
+        "greco_alpha": st.column_config.NumberColumn("Greco α", format="%.2f"),
+        "greco_rmse_pct": st.column_config.NumberColumn("Surface RMSE (%)", format="%.1f"),
+        "ic50_a_uM": st.column_config.NumberColumn("IC50 A (µM)", format="%.3g"),
+        "ic50_b_uM": st.column_config.NumberColumn("IC50 B (µM)", format="%.3g"),
+        "hill_a": st.column_config.NumberColumn("Hill A", format="%.2f"),
+        "hill_b": st.column_config.NumberColumn("Hill B", format="%.2f"),
+        "emax_a_pct": st.column_config.NumberColumn("Emax A (%)", format="%.0f"),
+        "emax_b_pct": st.column_config.NumberColumn("Emax B (%)", format="%.0f"),
+    })
+    names = summary["combination"].tolist()
+    col_csv, col_wells = st.columns(2)
+    col_csv.download_button("📥 Download Scores (CSV)", summary.to_csv(index=False), "synergy_scores.csv",
+                            "text/csv", key="download_synergy_scores")
+    col_wells.download_button("📥 Download Surfaces (CSV)",
+                              lambda: synergy_wells(names, conc_a, conc_b, surfaces).to_csv(index=False),
+                              "synergy_surfaces.csv", "text/csv", key="download_synergy_wells")
+
+    index = st.selectbox("Combination", range(len(names)), format_func=names.__getitem__, key="synergy_plate")
+    drugs = (summary["drug_a"].iloc[index], summary["drug_b"].iloc[index])
+    st.plotly_chart(synergy_surfaces_figure(conc_a[index], conc_b[index], {k: v[index] for k, v in surfaces.items()},
+                                            drugs, title=names[index]), width='stretch')
+
+PKPD_MECHANISMS = {"Competitive": "Competitive Inhibition", "Non-competitive": "Non-competitive Inhibition"}
+PKPD_INTERVALS = [4, 6, 8, 12, 24, 48, 72, 168]
+
+# Population PK/PD curves go through the cache backend, so replicas sharing
+# Redis simulate each regimen grid once
+@memoize("curve")
+def get_pkpd_summary(doses, intervals, n_patients, typical, cv, model, route, mechanism, ki, substrate_ratio,
+                     target, molecular_weight, fraction_unbound):
+    patients = virtual_patients(n_patients, typical, {name: cv for name in PK_VARIABILITY})
+    return run_on_worker(steady_state_summary, regimen_grid(doses, intervals), patients, mechanism, ki,
+                         substrate_ratio, target, model, route, molecular_weight, fraction_unbound)
+
+@memoize("curve")
+def get_pkpd_time_course(dose, interval, days, n_patients, typical, cv, model, route, mechanism, ki,
+                         substrate_ratio, molecular_weight, fraction_unbound):
+    patients = virtual_patients(n_patients, typical, {name: cv for name in PK_VARIABILITY})
+    n_doses = int(np.ceil(days * 24 / interval))
+    return run_on_worker(population_time_course, patients, dose, interval, n_doses, days * 24, mechanism, ki,
+                         substrate_ratio, model, route, molecular_weight, fraction_unbound)
+
+def use_calculated_ki():
+    inhibition_type, ki = st.session_state["calculated_ki"]
+    st.session_state["pkpd_ki"] = float(ki)
+    if inhibition_type in PKPD_MECHANISMS:
+        st.session_state["pkpd_type"] = inhibition_type
+
+# PK/PD Simulator tab (fragment)
+@st.fragment
+def show_pkpd_simulator():
+    st.subheader("PK/PD Simulator (Ki → Target Occupancy)")
+    st.write("How much drug, how often? A virtual patient population is dosed with every regimen on a grid, and "
+             "the free plasma concentration is turned into target occupancy through the inhibitor's Ki.")
+    show_guide("📈 How it works", "pkpd")
+
+    # Defaults go through session state, which "Use Ki from the Ki Calculator" overwrites
+    st.session_state.setdefault("pkpd_type", "Competitive")
+    st.session_state.setdefault("pkpd_ki", 0.05)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        inhibition_type = st.selectbox("Mechanism", list(PKPD_MECHANISMS), key="pkpd_type")
+        ki = st.number_input("Ki (µM)", min_value=0.0001, step=0.01, format="%.4f", key="pkpd_ki")
+        st.button("Use Ki from the Ki Calculator", key="pkpd_use_ki", on_click=use_calculated_ki,
+                  disabled="calculated_ki" not in st.session_state)
+    with col2:
+        substrate_ratio = st.number_input("In vivo [S]/Km", min_value=0.0, value=1.0, step=0.5, key="pkpd_substrate",
+                                          disabled=inhibition_type != "Competitive",
+                                          help="Substrate level at the target; only competitive inhibitors feel it")
+        target = st.slider("Target occupancy (%)", 50, 99, 90, key="pkpd_target")
+    with col3:
+        molecular_weight = st.number_input("Molecular weight (g/mol)", 100.0, 2000.0, 400.0, 10.0, key="pkpd_mw")
+        fraction_unbound = st.slider("Fraction unbound in plasma", 0.01, 1.0, 0.1, 0.01, key="pkpd_fu")
+
+    col_model, col_route, col_patients = st.columns(3)
+    model = col_model.radio("PK model", PK_MODELS, key="pkpd_model")
+    route = col_route.radio("Route", PK_ROUTES, key="pkpd_route")
+    n_patients = col_patients.slider("Virtual patients", 100, 5000, 1000, 100, key="pkpd_patients")
+    with st.expander("⚙️ Population PK parameters", expanded=False):
+        col_a, col_b, col_c = st.columns(3)
+        typical = {
+            "cl": col_a.number_input("Clearance CL (L/h)", 0.1, 500.0, TYPICAL_PK["cl"], key="pkpd_cl"),
+            "v1": col_b.number_input("Central volume V (L)", 1.0, 5000.0, TYPICAL_PK["v1"], key="pkpd_v1"),
+            "ka": col_c.number_input("Absorption rate ka (1/h)", 0.01, 20.0, TYPICAL_PK["ka"], key="pkpd_ka",
+                                     disabled=route != "Oral"),
+            "q": col_a.number_input("Intercompartmental CL Q (L/h)", 0.1, 500.0, TYPICAL_PK["q"], key="pkpd_q",
+                                    disabled=model != "2-compartment"),
+            "v2": col_b.number_input("Peripheral volume V2 (L)", 1.0, 5000.0, TYPICAL_PK["v2"], key="pkpd_v2",
+                                     disabled=model != "2-compartment"),
+            "f": col_c.slider("Bioavailability F", 0.05, 1.0, TYPICAL_PK["f"], 0.05, key="pkpd_f",
+                              disabled=route != "Oral"),
+        }
+        cv = st.slider("Between-patient variability (CV %)", 0, 80, 30, 5, key="pkpd_cv") / 100
+
+    col_doses, col_intervals = st.columns(2)
+    dose_range = col_doses.select_slider("Dose range (mg)", options=[1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000],
+                                         value=(10, 1000), key="pkpd_dose_range")
+    intervals = col_intervals.multiselect("Dosing intervals (h)", PKPD_INTERVALS, default=[6, 8, 12, 24, 48],
+                                          key="pkpd_intervals")
+    if not intervals or dose_range[0] == dose_range[1]:
+        st.warning("Choose at least one interval and a dose range.")
+        return
+    doses = tuple(float(d) for d in np.round(np.geomspace(*dose_range, 20), 3))
+    mechanism = PKPD_MECHANISMS[inhibition_type]
+    try:
+        with st.spinner(f"Simulating {len(doses) * len(intervals)} regimens × {n_patients:,} patients..."):
+            summary = get_pkpd_summary(doses, tuple(sorted(intervals)), n_patients, typical, cv, model, route,
+                                       mechanism, ki, substrate_ratio, target / 100, molecular_weight,
+                                       fraction_unbound)
+    except RuntimeError as e:  # Overloaded, or a worker that died
+        st.error(f"⚠️ Regimens not simulated: {e}")
+        return
+    st.plotly_chart(pkpd_attainment_figure(summary, target), width='stretch')
+
+    # Lowest dose per interval that keeps 90% of patients at target
+    reached = summary[summary["attainment_pct"] >= 90].sort_values("dose_mg").groupby("interval_h").head(1)
+    if reached.empty:
+        st.info(f"No regimen on the grid keeps 90% of patients at {target}% occupancy - try higher doses, "
+                "shorter intervals or a more potent Ki.")
+    else:
+        st.markdown(f"**Lowest dose per interval with ≥ 90% of patients at {target}% trough occupancy:**")
+        st.dataframe(reached[["interval_h", "dose_mg", "daily_dose_mg", "trough_uM", "trough_occupancy_pct"]],
+                     hide_index=True, width='stretch', column_config={
+                         "interval_h": st.column_config.NumberColumn("Every (h)", format="%g"),
+                         "dose_mg": st.column_config.NumberColumn("Dose (mg)", format="%.3g"),
+                         "daily_dose_mg": st.column_config.NumberColumn("Daily dose (mg)", format="%.3g"),
+                         "trough_uM": st.column_config.NumberColumn("Median free trough (µM)", format="%.3g"),
+                         "trough_occupancy_pct": st.column_config.NumberColumn("Median trough occupancy (%)",
+                                                                               format="%.1f"),
+                     })
+    st.download_button("📥 Download All Regimens (CSV)", summary.to_csv(index=False), "pkpd_regimens.csv",
+                       "text/csv", key="download_pkpd")
+
+    st.markdown("#### Time course of one regimen")
+    col_dose, col_interval, col_days = st.columns(3)
+    dose = col_dose.select_slider("Dose (mg)", options=doses, value=doses[len(doses) // 2], key="pkpd_course_dose")
+    interval = col_interval.selectbox("Every (h)", sorted(intervals), key="pkpd_course_interval")
+    days = col_days.slider("Days", 1, 28, 7, key="pkpd_days")
+    try:
+        times, concentration, occupancy = get_pkpd_time_course(dose, interval, days, n_patients, typical, cv, model,
+                                                               route, mechanism, ki, substrate_ratio,
+                                                               molecular_weight, fraction_unbound)
+    except RuntimeError as e:  # Overloaded, or a worker that died
+        st.error(f"⚠️ Time course not simulated: {e}")
+        return
+    st.plotly_chart(pkpd_time_course_figure(times, concentration, occupancy, target,
+                                            title=f"{dose:.3g} mg every {interval} h ({route.lower()})"),
+                    width='stretch')
 
 # References Section
 def show_references():
     st.markdown('<div class="section-header">📚 References & Resources</div>', unsafe_allow_html=True)
     
     # User Guide for References
-    with st.expander("📖 How to Use This Reference Library", expanded=False):
-        st.markdown("""
-        **Comprehensive Scientific References**
-        
-        All data, equations, and claims in this application are supported by peer-reviewed scientific literature.
-        
-        **What's included in each tab:**
-        
-        ---
-        
-        **Tab 1: Key Papers** 📄
-        - **29 peer-reviewed publications** from top journals
-        - All citations in **APA 7th edition format**
-        - **DOI links** for direct access to papers
-        - Organized by topic:
-          - Enzyme inhibition theory
-          - Statins and cholesterol drugs
-          - HIV protease inhibitors
-          - ACE inhibitors
-          - Kinase inhibitors
-          - COX-2 inhibitors
-        
-        **How to use:**
-        - Click DOI links to access full papers (may require institutional access)
-        - Copy citations for your own reports or publications
-        - All references are authoritative sources from journals like NEJM, Nature, Blood, JAMA
-        
-        ---
-        
-        **Tab 2: Online Resources** 🌐
-        - **Free databases:**
-          - PubChem (chemical structures)
-          - DrugBank (drug information)
-          - BRENDA (enzyme data)
-          - ChEMBL (bioactivity data)
-          - PDB (protein structures)
-        - **Educational resources:**
-          - Khan Academy tutorials
-          - NCBI Bookshelf (free textbooks)
-        - **Professional organizations**
-        
-        **All resources are free to access!**
-        
-        ---
-        
-        **Tab 3: Citation** 📝
-        - How to cite this educational tool
-        - GitHub repository link
-        - License information
-        
-        ---
-        
-        **Note:** All references have been verified for accuracy and accessibility. DOI links are functional as of December 2025.
-        """)
+    show_guide("📖 How to Use This Reference Library", "references")
     
     st.write("""This educational tool is based on established principles in biochemistry and pharmacology.""")
     
@@ -1693,68 +1622,87 @@ decisions. The case study data presented are approximate values derived from pub
 literature for illustrative purposes. Always consult current medical literature and 
 guidelines for clinical applications.""")
 
+@st.cache_data
+def get_example_panel(n_compounds, n_kinases):
+    return example_panel(n_compounds, n_kinases)
+
+@st.cache_data
+def get_kinome_analysis(df, compound_clusters, kinase_clusters):
+    compounds, kinases, potency = read_panel(df)
+    return analyze_panel(compounds, kinases, potency, compound_clusters, kinase_clusters)
+
+# Kinome-scale selectivity of a compounds × kinases panel (fragment)
+@st.fragment
+def show_kinome_selectivity():
+    st.markdown("---")
+    if not st.checkbox("🧬 Show kinome-scale selectivity (panel of compounds × kinases)", key="show_kinome",
+                       help="Selectivity scores and clustered profiles for a whole kinase panel"):
+        return
+    source = st.radio("Panel", ["Example panel", "Upload CSV"], horizontal=True, key="kinome_source")
+    if source == "Upload CSV":
+        uploaded = st.file_uploader("Panel CSV: compound, kinase, potency_nm (IC50, Ki or Kd in nM); one row per "
+                                    "measurement, untested pairs left out", type="csv", key="kinome_upload")
+        if uploaded is None:
+            return
+        df = read_batch_csv(uploaded, list(PANEL_COLUMNS))
+        if df is None:
+            return
+    else:
+        col_compounds, col_kinases = st.columns(2)
+        n_compounds = col_compounds.slider("Compounds", 100, 5000, 1000, 100, key="kinome_compounds")
+        n_kinases = col_kinases.slider("Kinases", 50, 500, 300, 50, key="kinome_kinases")
+        df = get_example_panel(n_compounds, n_kinases)
+
+    col_rows, col_cols = st.columns(2)
+    compound_clusters = col_rows.slider("Compound clusters", 2, 30, 10, key="kinome_compound_clusters")
+    kinase_clusters = col_cols.slider("Kinase clusters", 2, 20, 8, key="kinome_kinase_clusters")
+    try:
+        with st.spinner("Scoring and clustering the panel..."):
+            table, ordered = get_kinome_analysis(df, compound_clusters, kinase_clusters)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Compounds", f"{len(table):,}")
+    col2.metric("Kinases", f"{len(ordered['kinases']):,}")
+    col3.metric("Pairs tested", f"{table['kinases_tested'].sum() / (len(table) * len(ordered['kinases'])):.0%}")
+    st.plotly_chart(kinome_heatmap_figure(ordered["profiles"], ordered["compounds"], ordered["kinases"],
+                                          ordered["compound_clusters"], ordered["kinase_clusters"]),
+                    width='stretch')
+    st.caption("Rows and columns are grouped by k-means on which kinases each compound hits (and which compounds "
+               "hit each kinase), then ordered along the main axis of variation. Untested pairs and anything "
+               "weaker than 10 µM show as pIC50 5. Large panels are averaged into blocks for display; hover for "
+               "the compounds and kinases in a block.")
+    st.plotly_chart(selectivity_scores_figure(table), width='stretch')
+    st.dataframe(table, hide_index=True, width='stretch', column_config={
+        "s_100nM": st.column_config.NumberColumn("S(100 nM)", format="%.3f"),
+        "s_1uM": st.column_config.NumberColumn("S(1 µM)", format="%.3f"),
+        "s_3uM": st.column_config.NumberColumn("S(3 µM)", format="%.3f"),
+        "gini": st.column_config.NumberColumn("Gini", format="%.2f"),
+        "entropy": st.column_config.NumberColumn("Entropy", format="%.2f"),
+        "primary_nM": st.column_config.NumberColumn("Primary (nM)", format="%.3g"),
+        "window_log": st.column_config.NumberColumn("Window (log)", format="%.2f"),
+    })
+    st.download_button("📥 Download Selectivity Scores (CSV)", table.to_csv(index=False), "kinome_selectivity.csv",
+                       "text/csv", key="download_kinome")
+    st.caption("**S(x)**: fraction of tested kinases with potency below x (Karaman et al., 2008). **Gini**: 0 hits "
+               "all kinases equally, near 1 hits one (Graczyk, 2007). **Entropy** of the affinities: lower is more "
+               "selective (Uitdehaag & Zaman, 2011). **Window**: log units between the primary kinase and the "
+               "next-best one.")
+
 # Case Studies Section
 def show_case_studies():
     st.markdown('<div class="section-header">💊 Successful Drug Case Studies</div>', unsafe_allow_html=True)
     
     # User Guide for Case Studies
-    with st.expander("📖 How to Explore Case Studies", expanded=False):
-        st.markdown("""
-        **Real-World Drug Success Stories**
-        
-        **What's included:**
-        This section showcases **5 blockbuster enzyme inhibitor drugs** that revolutionized medicine.
-        
-        **How to navigate:**
-        1. **Select a drug class** from the radio buttons above
-        2. **Read the drug card** (left panel) for key facts:
-           - Drug name and target enzyme
-           - Inhibition mechanism
-           - FDA approval date
-           - Market impact
-        3. **Study "How It Works"** section to understand the mechanism
-        4. **Analyze interactive charts** (right panel) showing:
-           - Clinical efficacy data
-           - Patient outcomes over time
-           - Comparative potency
-        
-        **The 5 Case Studies:**
-        
-        **1. Statins (Cholesterol)** 💊
-        - Example: Lipitor (Atorvastatin)
-        - Best-selling drug of all time
-        - Reduces cardiac deaths significantly
-        
-        **2. HIV Protease Inhibitors** 🦠
-        - Transformed HIV from fatal to manageable
-        - Increased life expectancy from ~1 year to near-normal
-        - Structure-based drug design success story
-        
-        **3. ACE Inhibitors (Blood Pressure)** ❤️
-        - Examples: Lisinopril, Enalapril
-        - One of most prescribed drug classes
-        - Inspired by snake venom peptides
-        
-        **4. Kinase Inhibitors (Cancer)** 🎗️
-        - Example: Gleevec (Imatinib)
-        - Revolutionized cancer treatment
-        - 95% remission rate in CML
-        
-        **5. COX-2 Inhibitors (Pain)** 🩹
-        - Selective pain relief
-        - Reduced GI side effects vs traditional NSAIDs
-        - Example of targeted drug design
-        
-        **Each case includes:**
-        - ✅ Mechanism of action
-        - ✅ Clinical trial data
-        - ✅ Interactive visualizations
-        - ✅ Real-world impact statistics
-        - ✅ References to original research
-        
-        *Click through each drug to see how enzyme inhibitor design led to life-saving medications!*
-        """)
+    show_guide("📖 How to Explore Case Studies", "case_studies")
     
+    show_case_study_details()
+
+# Case study selector and charts run as a fragment
+@st.fragment
+def show_case_study_details():
     case_study = st.radio(
         "Select Drug Case Study:",
         ["Statins (Cholesterol)", "HIV Protease Inhibitors", "ACE Inhibitors (Blood Pressure)", 
@@ -1813,13 +1761,7 @@ mevalonate, thereby reducing cholesterol production in the liver (Istvan & Deise
         
         with col2:
             # Efficacy chart - Heart disease mortality decline (2000-2019)
-            data = {'Year': [2000, 2005, 2010, 2015, 2019],
-                   'Heart Disease Deaths per 100,000': [257.6, 216.8, 179.1, 168.5, 161.5]}
-            df = pd.DataFrame(data)
-            fig = px.line(df, x='Year', y='Heart Disease Deaths per 100,000', 
-                         title="Age-Adjusted Heart Disease Mortality in the US (2000-2019)",
-                         markers=True)
-            fig.update_layout(height=350)
+            fig = statin_mortality_figure()
             st.plotly_chart(fig, width='stretch')
             st.caption("""*Data source: CDC NCHS Data Brief #425 (Sawyer & Flagg, 2021). Age-adjusted heart disease 
             death rates per 100,000 U.S. standard population. ICD-10 codes I00-I09, I11, I13, I20-I51. 
@@ -1827,15 +1769,7 @@ mevalonate, thereby reducing cholesterol production in the liver (Istvan & Deise
             DOI: 10.15620/cdc:112339. See References section for full citations.*""")
             
             # Market comparison
-            statin_data = pd.DataFrame({
-                'Drug': ['Rosuvastatin\n(20 mg)', 'Simvastatin\n(40 mg)'],
-                'LDL Reduction (%)': [50, 30],
-                'Type': ['High Potency', 'Moderate Potency']
-            })
-            fig2 = px.bar(statin_data, x='Drug', y='LDL Reduction (%)', 
-                         color='Type', title='Comparative Potency of Statins',
-                         color_discrete_map={'High Potency': '#FF6B6B', 'Moderate Potency': '#4ECDC4'})
-            fig2.update_layout(height=300)
+            fig2 = statin_potency_figure()
             st.plotly_chart(fig2, width='stretch')
             st.caption("""*Data from large-scale randomized controlled trials. Rosuvastatin 20 mg: 50% LDL reduction 
             (Ridker et al., 2008, JUPITER trial, NEJM). Simvastatin 40 mg: ~30% LDL reduction 
@@ -1894,17 +1828,7 @@ polyproteins, blocking the maturation of infectious viral particles (Kohl et al.
         
         with col2:
             # HIV survival timeline
-            survival_data = pd.DataFrame({
-                'Era': ['Pre-1996\n(No ART)', '1996-1999\n(Early ART)', 
-                       '2000-2002\n(Improved ART)', '2003-2005\n(Modern ART)'],
-                'Life Expectancy at Age 20 (years)': [36, 39, 50, 63],
-                'Order': [1, 2, 3, 4]
-            })
-            fig = px.bar(survival_data, x='Era', y='Life Expectancy at Age 20 (years)',
-                        title='Life Expectancy for 20-Year-Olds Starting HIV Treatment',
-                        color='Life Expectancy at Age 20 (years)',
-                        color_continuous_scale='Viridis')
-            fig.update_layout(height=350, showlegend=False)
+            fig = hiv_life_expectancy_figure()
             st.plotly_chart(fig, width='stretch')
             st.caption("""*Data source: Antiretroviral Therapy Cohort Collaboration (2008). 
             Life expectancy estimates for 20-year-olds starting ART with CD4 count 200 cells/µL. 
@@ -1913,14 +1837,7 @@ polyproteins, blocking the maturation of infectious viral particles (Kohl et al.
             
             # Drug potency comparison
             st.markdown("**Protease Inhibitor Potency (IC50 values for viral inhibition):**")
-            pi_data = pd.DataFrame({
-                'Drug': ['Ritonavir', 'Saquinavir', 'Indinavir', 'Lopinavir'],
-                'IC50 (nM)': [15, 5, 10, 8]
-            })
-            fig2 = px.bar(pi_data, x='Drug', y='IC50 (nM)', 
-                         title='IC50 for Viral Production Inhibition (Lower = More Potent)',
-                         log_y=True)
-            fig2.update_layout(height=300)
+            fig2 = protease_inhibitor_potency_figure()
             st.plotly_chart(fig2, width='stretch')
             st.caption("""*Representative IC50 values for HIV viral production inhibition. 
             Source: Flexner (1998) reports IC50 range of 2-60 nM for viral production. 
@@ -1992,14 +1909,7 @@ in the ACE active site, preventing substrate binding (Cushman & Ondetti, 1991).
             st.caption("""*Source: HOPE Study blood pressure data. Yusuf S, et al. (2000). N Engl J Med. 342(3):145-153.*""")
             
             # Cardiovascular outcomes
-            outcome_data = pd.DataFrame({
-                'Outcome': ['Heart Attack', 'Stroke', 'Heart Failure', 'CV Death'],
-                'Risk Reduction (%)': [20, 32, 23, 26]
-            })
-            fig2 = px.bar(outcome_data, x='Outcome', y='Risk Reduction (%)',
-                         title='Cardiovascular Risk Reduction with Ramipril (HOPE Trial)',
-                         color='Risk Reduction (%)', color_continuous_scale='Greens')
-            fig2.update_layout(height=300, showlegend=False)
+            fig2 = ace_outcomes_figure()
             st.plotly_chart(fig2, width='stretch')
             st.caption("""*Source: Heart Outcomes Prevention Evaluation (HOPE) Study. Yusuf S, et al. (2000). Effects of ramipril (10 mg/day) 
             on cardiovascular events in 9,297 high-risk patients over 5 years. N Engl J Med. 342(3):145-153. DOI: 10.1056/NEJM200001203420301. 
@@ -2083,18 +1993,12 @@ cancer cell proliferation and survival (Druker et al., 2001).
             
             # Kinase inhibitor selectivity
             st.markdown("**Selectivity Profile:**")
-            selectivity_data = pd.DataFrame({
-                'Target': ['BCR-ABL', 'PDGFR', 'c-KIT', 'Off-targets'],
-                'IC50 (nM)': [260, 380, 410, 5000],
-                'Type': ['Primary', 'Secondary', 'Secondary', 'Non-target']
-            })
-            fig2 = px.bar(selectivity_data, x='Target', y='IC50 (nM)',
-                         title='Imatinib Selectivity (Lower = More Potent)',
-                         color='Type', log_y=True)
-            fig2.update_layout(height=300)
+            fig2 = imatinib_selectivity_figure()
             st.plotly_chart(fig2, width='stretch')
             st.caption("""*Data source: Deininger et al. (2005) The development of imatinib as a therapeutic agent. 
             Blood 105(7):2640-2653. See References section for full citation.*""")
+
+        show_kinome_selectivity()
     
     else:  # COX-2 Inhibitors (Pain)
         col1, col2 = st.columns([1, 1])
@@ -2172,22 +2076,7 @@ demonstrating importance of long-term safety monitoring even after FDA approval.
             """)
             
             # Side effect comparison
-            side_effects = pd.DataFrame({
-                'Side Effect': ['GI Ulcers', 'GI Bleeding', 'Dyspepsia'],
-                'Traditional NSAIDs (%)': [1.4, 1.0, 15],
-                'COX-2 Inhibitors (%)': [0.4, 0.3, 8]
-            })
-            fig2 = go.Figure()
-            fig2.add_trace(go.Bar(name='Traditional NSAIDs', 
-                                x=side_effects['Side Effect'], 
-                                y=side_effects['Traditional NSAIDs (%)']))
-            fig2.add_trace(go.Bar(name='COX-2 Inhibitors', 
-                                x=side_effects['Side Effect'], 
-                                y=side_effects['COX-2 Inhibitors (%)']))
-            fig2.update_layout(title='Gastrointestinal Side Effects Comparison',
-                             yaxis_title='Incidence (%)',
-                             barmode='group',
-                             height=300)
+            fig2 = cox2_side_effects_figure()
             st.plotly_chart(fig2, width='stretch')
             st.caption("""*Data sources: CLASS Study (Silverstein et al., 2000) & VIGOR Trial (Bombardier et al., 2000). 
             See References section for full citations.*""")
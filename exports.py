@@ -0,0 +1,149 @@
+# Columnar exports for calculator results. Results are written as two tables
+# with fixed Arrow schemas: one row per compound, plus a long table of the
+# measured points, so the IC50 isn't repeated on every point row. Parquet
+# (zstd) and Feather (lz4) keep float64 values exact; CSV stays available for
+# small results.
+import io
+import zipfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+IC50_SCHEMA = pa.schema([
+    pa.field("compound", pa.string(), nullable=False),
+    pa.field("ic50_uM", pa.float64(), metadata={"description": "null when the data never crosses 50%"}),
+    pa.field("hill_slope", pa.float64()),
+    pa.field("n_points", pa.int32()),
+    pa.field("min_activity_pct", pa.float64()),
+    pa.field("max_activity_pct", pa.float64()),
+    # Four-parameter Hill fits only (null for interpolated IC50s)
+    pa.field("top_pct", pa.float64()),
+    pa.field("bottom_pct", pa.float64()),
+    pa.field("rmse_pct", pa.float64()),
+    pa.field("n_masked", pa.int32(), metadata={"description": "points excluded as outliers"}),
+    # Curve classification (fitting.classify_curves)
+    pa.field("curve_class", pa.dictionary(pa.int8(), pa.string()),
+             metadata={"description": "complete, partial, inactive or inverted"}),
+    pa.field("efficacy_pct", pa.float64(), metadata={"description": "activity lost across the tested range"}),
+    pa.field("r_squared", pa.float64()),
+    pa.field("flag_extrapolated", pa.bool_(), metadata={"description": "IC50 outside the tested range"}),
+    pa.field("flag_poor_fit", pa.bool_()),
+    pa.field("flag_low_efficacy", pa.bool_()),
+])
+
+KI_SCHEMA = pa.schema([
+    pa.field("compound", pa.string(), nullable=False),
+    pa.field("ic50_uM", pa.float64()),
+    pa.field("ki_uM", pa.float64()),
+])
+
+POINTS_SCHEMA = pa.schema([
+    pa.field("compound", pa.dictionary(pa.int32(), pa.string()), nullable=False),
+    pa.field("concentration_uM", pa.float64()),
+    pa.field("activity_pct", pa.float64()),
+    pa.field("masked", pa.bool_(), metadata={"description": "excluded from the fit as an outlier"}),
+    pa.field("excluded", pa.bool_(), metadata={"description": "excluded from the fit by hand"}),
+])
+
+# Result dict keys (see jobs.py) -> schema column names
+RESULT_COLUMNS = {"IC50_uM": "ic50_uM", "Ki_uM": "ki_uM", "min_activity": "min_activity_pct",
+                  "max_activity": "max_activity_pct", "top": "top_pct", "bottom": "bottom_pct", "rmse": "rmse_pct"}
+
+FORMATS = {
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "feather": ("Feather", "application/vnd.apache.arrow.file"),
+    "csv": ("CSV", "text/csv"),
+}
+
+CSV_MAX_ROWS = 5_000  # beyond this CSV is slow to write and large to download
+
+
+def _column(values, field):
+    # float64 numpy columns are wrapped without copying; NaN becomes null
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, type=pa.string()).dictionary_encode().cast(field.type)
+    if pa.types.is_floating(field.type):
+        values = np.asarray(values, dtype=np.float64)
+        mask = np.isnan(values)
+        return pa.array(values, type=field.type, mask=mask if mask.any() else None)
+    return pa.array(values, type=field.type)
+
+
+def results_table(rows, schema):
+    # rows: list of result dicts or a DataFrame, with jobs.py column names
+    columns = {}
+    if hasattr(rows, "columns"):
+        data = {RESULT_COLUMNS.get(name, name): rows[name].to_numpy() for name in rows.columns}
+    else:
+        data = {}
+        for name in (rows[0] if rows else {}):
+            data[RESULT_COLUMNS.get(name, name)] = [row[name] for row in rows]
+    for field in schema:
+        if field.name in data:
+            columns[field.name] = _column(data[field.name], field)
+        else:
+            columns[field.name] = pa.nulls(len(rows), type=field.type)
+    return pa.table(columns, schema=schema)
+
+
+def points_table(compounds, concentrations, activities, masked=None, excluded=None):
+    def flags(values):
+        return np.zeros(len(activities), dtype=bool) if values is None else np.asarray(values, dtype=bool)
+
+    return pa.table({
+        "compound": _column(compounds, POINTS_SCHEMA.field("compound")),
+        "concentration_uM": _column(concentrations, POINTS_SCHEMA.field("concentration_uM")),
+        "activity_pct": _column(activities, POINTS_SCHEMA.field("activity_pct")),
+        "masked": flags(masked),
+        "excluded": flags(excluded),
+    }, schema=POINTS_SCHEMA)
+
+
+def mark_masked_points(points, results):
+    # Sets the "masked" flags from the per-compound outlier indices of a batch
+    # fit (jobs.fit_hill_curves). Points must be grouped by compound, in the
+    # same within-compound order the fit saw them.
+    if "masked" not in results:
+        return points
+    compounds = points.column("compound").to_pandas().astype(str).to_numpy()
+    names, starts = np.unique(compounds, return_index=True)
+    start = dict(zip(names.tolist(), starts.tolist()))
+    flags = np.zeros(len(compounds), dtype=bool)
+    for compound, indices in zip(results["compound"], results["masked"]):
+        if isinstance(indices, list) and indices and compound in start:
+            flags[start[compound] + np.asarray(indices)] = True
+    return points.set_column(points.schema.get_field_index("masked"), POINTS_SCHEMA.field("masked"),
+                             pa.array(flags))
+
+
+def write_table(table, fmt):
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+    elif fmt == "feather":
+        feather.write_feather(table, sink, compression="lz4")
+    elif fmt == "csv":
+        pa_csv.write_csv(table.cast(pa.schema([f.with_type(pa.string()) if pa.types.is_dictionary(f.type) else f
+                                               for f in table.schema])), sink)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return sink.getvalue()
+
+
+def export_tables(tables, fmt):
+    # tables: {name: pa.Table}. One table is returned as-is; several are zipped
+    # uncompressed, since Parquet/Feather are already compressed.
+    if len(tables) == 1:
+        return write_table(next(iter(tables.values())), fmt).to_pybytes()
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, table in tables.items():
+            archive.writestr(f"{name}.{fmt}", memoryview(write_table(table, fmt)))
+    return buf.getvalue()
+
+
+def export_file_name(stem, tables, fmt):
+    return f"{stem}.{fmt}" if len(tables) == 1 else f"{stem}_{fmt}.zip"
@@ -0,0 +1,751 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from cache_backend import memoize
+from kinetics import (MECHANISMS, apparent_parameters, hill_response, hill_sweep, inhibitor_for_inhibition,
+                      interpolate_ic50, michaelis_menten)
+from plates import row_label
+from schematics import MECHANISM_SCHEMATICS
+from selectivity import PIC50_FLOOR, block_means
+from sensitivity import SENSITIVITY_OUTPUTS, sobol_indices
+
+# Figure builders for every section of the poster. They only take plain
+# parameters and return Plotly figures, so the Streamlit app and the headless
+# export (render_poster.py) draw exactly the same charts. Builders are memoized
+# through cache_backend, so replicas sharing a Redis cache draw each figure once.
+
+
+# Overview Section
+@memoize("figure")
+def overview_stats_figure():
+    # Quick stats
+    stats_data = {
+        'Category': ['Approved Drugs', 'Clinical Trials', 'Market Value', 'Success Rate'],
+        'Value': ['250+', '800+', '$150B+', '12%']
+    }
+    df_stats = pd.DataFrame(stats_data)
+    fig = px.bar(df_stats, x='Value', y='Category', orientation='h',
+                color='Category', color_discrete_sequence=px.colors.qualitative.Set3)
+    fig.update_layout(showlegend=False, height=300, margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+
+@memoize("figure")
+def pipeline_figure():
+    pipeline_data = pd.DataFrame({
+        'Stage': ['1. Target\nIdentification', '2. Lead\nDiscovery', '3. Lead\nOptimization',
+                  '4. Preclinical\nTesting', '5. Clinical\nTrials', '6. FDA\nApproval', '7. Post-Market\nMonitoring'],
+        'Duration': ['1-2 years', '2-3 years', '2-3 years', '1-2 years', '6-7 years', '1-2 years', 'Ongoing'],
+        'Success_Rate': [100, 80, 60, 40, 20, 12, 12],
+        'Description': [
+            'Identify enzyme involved in disease',
+            'Screen compounds for inhibition activity',
+            'Improve IC50, Ki, selectivity, ADME properties',
+            'Animal testing for safety and efficacy',
+            'Phase I (safety), II (efficacy), III (large-scale)',
+            'Regulatory review and approval',
+            'Phase IV studies, adverse event monitoring'
+        ]
+    })
+
+    # Pipeline flowchart
+    fig_pipeline = go.Figure()
+
+    colors = ['#2E86AB', '#3FA7D6', '#59C3C3', '#74D3AE', '#92E5A1', '#A8E6A1', '#C6EBBE']
+
+    for i, row in pipeline_data.iterrows():
+        fig_pipeline.add_trace(go.Bar(
+            y=[row['Stage']],
+            x=[1],
+            orientation='h',
+            name=row['Stage'],
+            text=f"<b>{row['Stage']}</b><br>{row['Duration']}",
+            textposition='inside',
+            marker=dict(color=colors[i]),
+            hovertext=f"{row['Description']}<br>Duration: {row['Duration']}<br>Success Rate: {row['Success_Rate']}%",
+            hoverinfo='text',
+            showlegend=False
+        ))
+
+    fig_pipeline.update_layout(
+        title='Enzyme Inhibitor Drug Development Stages',
+        xaxis=dict(showticklabels=False, showgrid=False, zeroline=False),
+        yaxis=dict(showgrid=False, autorange='reversed'),
+        height=400,
+        margin=dict(l=10, r=10, t=40, b=10),
+        plot_bgcolor='white'
+    )
+    return fig_pipeline
+
+# Mechanisms Section
+MECHANISM_COLORS = {
+    "Competitive Inhibition": "red",
+    "Non-competitive Inhibition": "orange",
+    "Uncompetitive Inhibition": "purple",
+    "Mixed Inhibition": "green"
+}
+
+# Substrate concentrations (mM) used for the Lineweaver-Burk points
+LB_SUBSTRATE = np.array([0.5, 1, 2, 4, 8, 16])
+
+
+@memoize("figure")
+def michaelis_menten_figure(mechanism, km, vmax, alpha=None, alpha_prime=None,
+                            show_km_line=False, show_vmax_line=False):
+    # alpha=None draws the uninhibited curve only
+    inhibitor_color = MECHANISM_COLORS.get(mechanism, "red")
+    show_inhibitor = alpha is not None
+
+    # Generate kinetic curves
+    substrate = np.linspace(0.1, 20, 100)
+    velocity_no_inhibitor = michaelis_menten(substrate, km, vmax)
+
+    fig_mm = go.Figure()
+    fig_mm.add_trace(go.Scatter(x=substrate, y=velocity_no_inhibitor,
+                           name='No Inhibitor', line=dict(color='blue', width=2)))
+
+    if show_inhibitor:
+        apparent_km, apparent_vmax = apparent_parameters(mechanism, km, vmax, alpha, alpha_prime)
+        velocity_inhibitor = michaelis_menten(substrate, apparent_km, apparent_vmax)
+        fig_mm.add_trace(go.Scatter(x=substrate, y=velocity_inhibitor,
+                           name='With Inhibitor', line=dict(color=inhibitor_color, dash='dash', width=2)))
+
+    # Add annotation lines if toggled (NO TEXT to avoid overlap)
+    if show_km_line:
+        fig_mm.add_vline(x=km, line_dash="dot", line_color="gray", line_width=2)
+        if show_inhibitor and mechanism == "Competitive Inhibition":
+            fig_mm.add_vline(x=apparent_km, line_dash="dot", line_color=inhibitor_color, line_width=2)
+
+    if show_vmax_line:
+        fig_mm.add_hline(y=vmax/2, line_dash="dot", line_color="gray", line_width=2)
+        if show_inhibitor:
+            fig_mm.add_hline(y=apparent_vmax/2, line_dash="dot", line_color=inhibitor_color, line_width=2)
+
+    fig_mm.update_layout(
+        xaxis_title="[S] (mM)",
+        yaxis_title="v (µmol/min)",
+        height=400,
+        showlegend=True,
+        legend=dict(x=0.6, y=0.1),
+        margin=dict(l=10, r=10, t=30, b=10)
+    )
+
+    # Add gridlines to MM plot with solid black zero lines
+    fig_mm.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
+    fig_mm.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
+    return fig_mm
+
+
+def lineweaver_burk_points(km, vmax):
+    # (1/[S], 1/v) at LB_SUBSTRATE, preceded by the x-intercept (-1/Km, 0), filled
+    # in place rather than concatenated
+    x = np.empty(LB_SUBSTRATE.size + 1)
+    y = np.empty_like(x)
+    x[0], y[0] = -1 / km, 0
+    np.reciprocal(LB_SUBSTRATE, out=x[1:])
+    np.reciprocal(michaelis_menten(LB_SUBSTRATE, km, vmax, out=y[1:]), out=y[1:])
+    return x, y
+
+
+@memoize("figure")
+def lineweaver_burk_figure(mechanism, km, vmax, alpha=None, alpha_prime=None, show_intercepts=True):
+    inhibitor_color = MECHANISM_COLORS.get(mechanism, "red")
+
+    # Intercepts for annotation
+    y_intercept_no_inh = 1 / vmax
+    x_intercept_no_inh = -1 / km
+
+    fig_lb = go.Figure()
+
+    # Lineweaver-Burk points, led by the x-intercept for no inhibitor
+    x_no_inh_extended, y_no_inh_extended = lineweaver_burk_points(km, vmax)
+
+    # Add line connecting from x-intercept through all data points
+    fig_lb.add_trace(go.Scatter(
+        x=x_no_inh_extended,
+        y=y_no_inh_extended,
+        mode='lines+markers',
+        name='No Inhibitor',
+        line=dict(color='blue', width=2),
+        marker=dict(size=8, color='blue'),
+        showlegend=True
+    ))
+
+    if alpha is not None:
+        apparent_km, apparent_vmax = apparent_parameters(mechanism, km, vmax, alpha, alpha_prime)
+
+        # Calculate inhibitor intercepts
+        y_intercept_inh = 1 / apparent_vmax
+        x_intercept_inh = -1 / apparent_km
+
+        # Lineweaver-Burk points, led by the x-intercept for inhibitor
+        x_inh_extended, y_inh_extended = lineweaver_burk_points(apparent_km, apparent_vmax)
+
+        fig_lb.add_trace(go.Scatter(
+            x=x_inh_extended,
+            y=y_inh_extended,
+            mode='lines+markers',
+            name='With Inhibitor',
+            line=dict(color=inhibitor_color, width=2, dash='dash'),
+            marker=dict(size=8, color=inhibitor_color),
+            showlegend=True
+        ))
+
+    # Mark intercepts with simple dots (no text to avoid overlap)
+    if show_intercepts:
+        fig_lb.add_trace(go.Scatter(
+            x=[0], y=[y_intercept_no_inh],
+            mode='markers',
+            marker=dict(size=10, color='blue', symbol='circle'),
+            showlegend=False,
+            hovertext=f"Y-intercept: 1/Vmax = {y_intercept_no_inh:.4f}"
+        ))
+        fig_lb.add_trace(go.Scatter(
+            x=[x_intercept_no_inh], y=[0],
+            mode='markers',
+            marker=dict(size=10, color='blue', symbol='square'),
+            showlegend=False,
+            hovertext=f"X-intercept: -1/Km = {x_intercept_no_inh:.4f}"
+        ))
+
+        if alpha is not None:
+            fig_lb.add_trace(go.Scatter(
+                x=[0], y=[y_intercept_inh],
+                mode='markers',
+                marker=dict(size=10, color=inhibitor_color, symbol='circle'),
+                showlegend=False,
+                hovertext=f"Y-intercept: 1/Vmax' = {y_intercept_inh:.4f}"
+            ))
+
+            # X-intercept marker for inhibitor (if different)
+            if abs(x_intercept_inh - x_intercept_no_inh) > 0.01:
+                fig_lb.add_trace(go.Scatter(
+                    x=[x_intercept_inh], y=[0],
+                    mode='markers',
+                    marker=dict(size=10, color=inhibitor_color, symbol='square'),
+                    showlegend=False,
+                    hovertext=f"X-intercept: -1/Km' = {x_intercept_inh:.4f}"
+                ))
+
+    fig_lb.update_layout(
+        xaxis_title='1/[S] (1/mM)',
+        yaxis_title='1/v (min/µmol)',
+        height=400,
+        showlegend=True,
+        legend=dict(x=0.05, y=0.95),
+        margin=dict(l=10, r=10, t=30, b=10)
+    )
+
+    # Add grid for easier interpretation
+    fig_lb.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
+    fig_lb.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray', zeroline=True, zerolinewidth=2, zerolinecolor='black')
+    return fig_lb
+
+
+@memoize("figure")
+def sensitivity_figure(mechanism, substrate=1.0):
+    # First-order (S1) and total (ST) Sobol indices of each output over the
+    # slider ranges, with bootstrap 95% intervals as error bars
+    indices = sobol_indices(mechanism, substrate)
+    fig = make_subplots(rows=1, cols=len(SENSITIVITY_OUTPUTS), shared_yaxes=True,
+                        subplot_titles=[f"{name} at [S] = {substrate:g} mM" if name == "Velocity" else name
+                                        for name in SENSITIVITY_OUTPUTS])
+    for col, output in enumerate(SENSITIVITY_OUTPUTS, start=1):
+        rows = indices[indices["output"] == output]
+        for index, name, color in (("S1", "First-order (S1)", "#2E86AB"), ("ST", "Total (ST)", "#F18F01")):
+            fig.add_trace(go.Bar(x=rows["input"], y=rows[index], name=name,
+                                 marker_color=color, legendgroup=index, showlegend=col == 1,
+                                 error_y=dict(type="data", array=rows[f"{index}_conf"], thickness=1.5)),
+                          row=1, col=col)
+    fig.update_layout(barmode="group", height=360, margin=dict(l=10, r=10, t=40, b=10),
+                      legend=dict(orientation="h", y=-0.15), plot_bgcolor="white")
+    fig.update_yaxes(range=[0, 1.05], gridcolor="lightgray")
+    fig.update_yaxes(title_text="Sobol index", row=1, col=1)
+    return fig
+
+
+# Ki (µM) and [S] (mM) axes of the dose-planning heatmap
+PLANNING_KI_RANGE = (0.01, 100.0)
+PLANNING_SUBSTRATE_RANGE = (0.01, 100.0)
+
+
+@memoize("figure")
+def inhibitor_requirement_figure(mechanism, inhibition_pct, km, ki_prime_ratio=2.0, resolution=200,
+                                 marker=None):
+    # [I] needed for inhibition_pct % inhibition over a log grid of Ki × [S], in
+    # one vectorized solve; colored by log10 [I]. Mixed inhibition uses
+    # Ki' = ki_prime_ratio · Ki. marker=(ki, substrate) marks the current sliders.
+    ki = np.logspace(*np.log10(PLANNING_KI_RANGE), resolution)
+    substrate = np.logspace(*np.log10(PLANNING_SUBSTRATE_RANGE), resolution)
+    required = inhibitor_for_inhibition(mechanism, inhibition_pct / 100, substrate[None, :], km, ki[:, None],
+                                        ki_prime_ratio * ki[:, None])
+    log_required = np.log10(required).astype(np.float32)
+    decades = np.arange(np.floor(log_required.min()), np.ceil(log_required.max()) + 1)
+    fig = go.Figure(go.Heatmap(
+        x=substrate, y=ki, z=log_required, colorscale="Viridis",
+        colorbar=dict(title="[I] needed (µM)", tickvals=decades, ticktext=[f"{10**d:g}" for d in decades]),
+        customdata=required.astype(np.float32), hovertemplate="[S] = %{x:.3g} mM<br>Ki = %{y:.3g} µM<br>[I] = %{customdata:.3g} µM"
+                                            "<extra></extra>"))
+    fig.add_vline(x=km, line_dash="dot", line_color="white", annotation_text="Km", annotation_font_color="white")
+    if marker is not None:
+        fig.add_trace(go.Scatter(x=[marker[1]], y=[marker[0]], mode="markers", showlegend=False, hoverinfo="skip",
+                                 marker=dict(size=12, color="red", symbol="x")))
+    fig.update_layout(title=f"[I] for {inhibition_pct:g}% inhibition ({mechanism})", height=420,
+                      xaxis=dict(type="log", title="[S] (mM)"), yaxis=dict(type="log", title="Ki (µM)"),
+                      margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+# IC50/Ki Calculator Section
+@memoize("figure")
+def ic50_fit_figure(conc_sorted, act_sorted, ic50):
+    # Data points plus a Hill curve (slope 1) through the interpolated IC50
+    max_conc = max(conc_sorted.max(), 1.0)  # Ensure minimum range
+    conc_smooth = np.linspace(0.01, max_conc*1.2, 100)
+    hill_slope = 1.0
+
+    # Determine top and bottom based on actual data pattern
+    if act_sorted[0] > act_sorted[-1]:
+        # Activities decrease with concentration (typical inhibition)
+        top, bottom = act_sorted[0], act_sorted[-1]
+        act_smooth = hill_response(conc_smooth, top, bottom, ic50, hill_slope)
+    else:
+        # Activities increase with concentration (atypical): inverse Hill equation
+        top, bottom = act_sorted[-1], act_sorted[0]
+        act_smooth = hill_response(conc_smooth, top, bottom, ic50, -hill_slope)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=conc_sorted, y=act_sorted, mode='markers',
+                           name='Data', marker=dict(size=10, color='red')))
+    fig.add_trace(go.Scatter(x=conc_smooth, y=act_smooth, mode='lines',
+                           name='Fit', line=dict(color='blue')))
+    fig.add_hline(y=50, line_dash="dash", line_color="green",
+                annotation_text="IC50")
+
+    fig.update_layout(
+        title="Dose-Response Curve",
+        xaxis_title="Inhibitor Concentration (µM)",
+        yaxis_title="Activity (%)",
+        height=400,
+        xaxis_type="log"
+    )
+    return fig
+
+
+def curve_thumbnails_figure(fits, points, columns=4):
+    # Small multiples for one page of batch results: each compound's points
+    # plus a Hill curve through its IC50 (slope 1 when no slope was estimated,
+    # 100-0% plateaus unless fitted). Points masked as outliers or excluded by
+    # hand are drawn as grey crosses.
+    compounds = list(fits["compound"])
+    rows = max(1, -(-len(compounds) // columns))
+    fig = make_subplots(rows=rows, cols=columns, subplot_titles=compounds,
+                        horizontal_spacing=0.04, vertical_spacing=0.12 / rows)
+    by_compound = dict(tuple(points.groupby("compound")))
+    for i, fit in enumerate(fits.to_dict("records")):
+        row, col = i // columns + 1, i % columns + 1
+        data = by_compound.get(fit["compound"])
+        if data is None or data.empty:
+            continue
+        conc = data["concentration_uM"].to_numpy(float)
+        masked = data["masked"].to_numpy(bool) if "masked" in data else np.zeros(len(data), dtype=bool)
+        if "excluded" in data:
+            masked |= data["excluded"].to_numpy(bool)
+        fig.add_trace(go.Scatter(x=conc[~masked], y=data["activity_pct"][~masked], mode='markers',
+                                 marker=dict(size=5, color='red')), row=row, col=col)
+        if masked.any():
+            fig.add_trace(go.Scatter(x=conc[masked], y=data["activity_pct"][masked], mode='markers',
+                                     marker=dict(size=6, color='grey', symbol='x')), row=row, col=col)
+        positive = conc[conc > 0]
+
+        def fitted(name, default):
+            value = fit.get(name)
+            return default if value is None or np.isnan(value) else value
+
+        ic50 = fitted("ic50_uM", None)
+        if ic50 is not None and positive.size:
+            conc_smooth = np.logspace(np.log10(positive.min()), np.log10(positive.max()), 50)
+            response = hill_response(conc_smooth, fitted("top_pct", 100), fitted("bottom_pct", 0), ic50,
+                                     fitted("hill_slope", 1.0))
+            fig.add_trace(go.Scatter(x=conc_smooth, y=response, mode='lines', line=dict(color='blue', width=1.5)),
+                          row=row, col=col)
+    fig.update_xaxes(type="log", showticklabels=False)
+    fig.update_yaxes(range=[-5, 110], showticklabels=False)
+    fig.update_annotations(font_size=10)
+    fig.update_layout(height=160 * rows, showlegend=False, margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+def plate_heatmap_figure(activity, title="Normalized activity (%)"):
+    # One plate's percent activity as a well grid (rows A.., columns 1..)
+    rows, cols = activity.shape
+    fig = go.Figure(go.Heatmap(z=activity, x=list(range(1, cols + 1)), y=[row_label(r) for r in range(rows)],
+                               colorscale="RdBu", zmin=0, zmax=120, colorbar=dict(title="%")))
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(title=title, height=max(250, 18 * rows + 100), xaxis=dict(dtick=max(1, cols // 12)))
+    return fig
+
+
+# Checkerboard panels: effects (%) on one color scale, excess over each
+# reference on a diverging one centred on zero
+SYNERGY_PANELS = [("observed", "Observed inhibition"), ("Greco fit", "Greco response surface"),
+                  ("Loewe", "Loewe additivity"), ("HSA excess", "Excess over HSA"),
+                  ("Bliss excess", "Excess over Bliss"), ("Loewe excess", "Excess over Loewe")]
+
+
+def synergy_surfaces_figure(conc_a, conc_b, surfaces, drugs=("A", "B"), title=None):
+    # One combination's checkerboard: conc_a (m,), conc_b (n,) and (m, n)
+    # surfaces from synergy.analyze_checkerboards, as fractions; NaN padding
+    # is dropped. Doses are evenly spaced labels, as on the plate.
+    rows, cols = np.isfinite(conc_a), np.isfinite(conc_b)
+    x = [f"{c:.3g}" for c in conc_b[cols]]
+    y = [f"{c:.3g}" for c in conc_a[rows]]
+    panels = [(key, name) for key, name in SYNERGY_PANELS if key in surfaces]
+    fig = make_subplots(rows=2, cols=3, subplot_titles=[name for _, name in panels],
+                        horizontal_spacing=0.06, vertical_spacing=0.14)
+    for k, (key, name) in enumerate(panels):
+        z = 100 * surfaces[key][np.ix_(rows, cols)]
+        fig.add_trace(go.Heatmap(x=x, y=y, z=z, coloraxis="coloraxis2" if "excess" in key else "coloraxis",
+                                 hovertemplate=f"{drugs[0]} = %{{y}} µM<br>{drugs[1]} = %{{x}} µM<br>"
+                                               f"{name} = %{{z:.1f}}%<extra></extra>"),
+                      row=k // 3 + 1, col=k % 3 + 1)
+    fig.update_xaxes(title_text=f"{drugs[1]} (µM)", type="category", row=2)
+    fig.update_yaxes(title_text=f"{drugs[0]} (µM)", type="category", col=1)
+    fig.update_yaxes(type="category")
+    fig.update_layout(
+        title=title, height=640, margin=dict(l=10, r=10, t=60, b=10),
+        coloraxis=dict(colorscale="Viridis", cmin=0, cmax=100,
+                       colorbar=dict(title="Inhibition (%)", x=1.02, y=0.78, len=0.45)),
+        coloraxis2=dict(colorscale="RdBu_r", cmid=0, colorbar=dict(title="Excess (%)", x=1.02, y=0.22, len=0.45)))
+    return fig
+
+
+@memoize("figure")
+def dose_response_figure(top_activity, bottom_activity, ic50_curve, hill_slope, conc_range_max):
+    concentrations_curve = np.logspace(-3, np.log10(conc_range_max), 100)
+    response = hill_response(concentrations_curve, top_activity, bottom_activity, ic50_curve, hill_slope)
+
+    # Calculate actual IC50 activity level (midpoint)
+    ic50_activity_level = (top_activity + bottom_activity) / 2
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=concentrations_curve, y=response, mode='lines',
+                           line=dict(color='purple', width=3)))
+    fig.add_hline(y=ic50_activity_level, line_dash="dash", line_color="green",
+                annotation_text=f"IC50 = {ic50_curve} µM")
+    fig.add_vline(x=ic50_curve, line_dash="dash", line_color="green")
+
+    fig.update_layout(
+        title="Dose-Response Curve",
+        xaxis_title="Inhibitor Concentration (µM)",
+        yaxis_title="Activity (%)",
+        height=400,
+        xaxis_type="log"
+    )
+    return fig
+
+
+SWEEP_DISPLAY_BINS = 200  # heatmap cells per axis; finer sweeps are averaged down to this
+
+
+def _bin_centers(log_values, bins):
+    # Mean log10 value of each of hill_sweep's equal-count bins, back in µM
+    edges = np.linspace(0, log_values.size, min(bins, log_values.size) + 1).astype(int)
+    return 10 ** (np.add.reduceat(log_values, edges[:-1]) / np.diff(edges))
+
+
+@memoize("figure")
+def dose_response_sweep_figure(top_activity, bottom_activity, ic50_range, hill_range, panels, conc_range_max,
+                               samples=SWEEP_DISPLAY_BINS):
+    # Small multiples of activity over concentration × IC50, one panel per Hill
+    # slope, from samples points per axis (averaged down to display bins)
+    log_conc = np.linspace(-3, np.log10(conc_range_max), samples)
+    log_ic50 = np.linspace(*np.log10(ic50_range), samples)
+    slopes = np.linspace(*hill_range, panels)
+    bins = (SWEEP_DISPLAY_BINS, SWEEP_DISPLAY_BINS) if samples > SWEEP_DISPLAY_BINS else None
+    activity = hill_sweep(10**log_conc, 10**log_ic50, slopes, top_activity, bottom_activity, bins=bins)
+    conc = _bin_centers(log_conc, SWEEP_DISPLAY_BINS)
+    ic50 = _bin_centers(log_ic50, SWEEP_DISPLAY_BINS)
+
+    columns = min(3, panels)
+    rows = -(-panels // columns)
+    fig = make_subplots(rows=rows, cols=columns, shared_xaxes=True, shared_yaxes=True,
+                        subplot_titles=[f"h = {h:.2g}" for h in slopes],
+                        horizontal_spacing=0.04, vertical_spacing=0.12 if rows > 1 else 0.0)
+    for k, h in enumerate(slopes):
+        row, col = k // columns + 1, k % columns + 1
+        fig.add_trace(go.Heatmap(x=conc, y=ic50, z=activity[:, k, :], coloraxis="coloraxis",
+                                 hovertemplate=f"h = {h:.2g}<br>" + "[I] = %{x:.3g} µM<br>IC50 = %{y:.3g} µM<br>"
+                                               "Activity = %{z:.1f}%<extra></extra>"),
+                      row=row, col=col)
+        # Where [I] = IC50 the activity is halfway between top and bottom
+        fig.add_trace(go.Scatter(x=[max(conc[0], ic50[0]), min(conc[-1], ic50[-1])],
+                                 y=[max(conc[0], ic50[0]), min(conc[-1], ic50[-1])], mode="lines",
+                                 line=dict(color="white", dash="dash", width=1), hoverinfo="skip",
+                                 showlegend=False),
+                      row=row, col=col)
+    fig.update_xaxes(type="log")
+    fig.update_yaxes(type="log")
+    fig.update_xaxes(title_text="[I] (µM)", row=rows)
+    fig.update_yaxes(title_text="IC50 (µM)", col=1)
+    fig.update_layout(coloraxis=dict(colorscale="RdYlBu", cmin=min(top_activity, bottom_activity),
+                                     cmax=max(top_activity, bottom_activity), colorbar=dict(title="Activity (%)")),
+                      height=260 * rows + 80, margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+# Case Studies Section
+@memoize("figure")
+def pkpd_time_course_figure(times, concentration, occupancy, target_pct, title=None):
+    # Population bands from pkpd.population_time_course: free concentration
+    # (top) and occupancy (bottom), 5th-95th percentile shaded around the median
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        subplot_titles=["Free plasma concentration", "Target occupancy"])
+    for row, (values, unit, color) in enumerate([(concentration, "µM", "#1f77b4"), (occupancy, "%", "#d62728")], 1):
+        low, median, high = values
+        fig.add_trace(go.Scatter(x=np.r_[times, times[::-1]], y=np.r_[high, low[::-1]], fill="toself",
+                                 fillcolor=color, opacity=0.2, line=dict(width=0), hoverinfo="skip",
+                                 name=f"5th-95th percentile ({unit})"), row=row, col=1)
+        fig.add_trace(go.Scatter(x=times, y=median, line=dict(color=color, width=2), name=f"Median ({unit})",
+                                 hovertemplate=f"t = %{{x:.1f}} h<br>%{{y:.3g}} {unit}<extra></extra>"),
+                      row=row, col=1)
+    fig.add_hline(y=target_pct, line=dict(color="black", dash="dash"), row=2, col=1,
+                  annotation_text=f"target {target_pct:g}%", annotation_position="bottom right")
+    fig.update_yaxes(title_text="Free [I] (µM)", row=1, col=1)
+    fig.update_yaxes(title_text="Occupancy (%)", range=[0, 100], row=2, col=1)
+    fig.update_xaxes(title_text="Time (h)", row=2, col=1)
+    fig.update_layout(title=title, height=560, hovermode="x unified", margin=dict(l=10, r=10, t=60, b=10))
+    return fig
+
+
+def pkpd_attainment_figure(summary, target_pct):
+    # Share of patients at or above the target occupancy at trough, dose ×
+    # interval, from pkpd.steady_state_summary on a regimen grid
+    grid = summary.pivot(index="dose_mg", columns="interval_h", values="attainment_pct")
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=[f"q{h:g}h" for h in grid.columns], y=[f"{d:.3g}" for d in grid.index],
+        colorscale="RdYlGn", zmin=0, zmax=100, colorbar=dict(title="Patients (%)"),
+        hovertemplate="%{y} mg %{x}<br>%{z:.1f}% of patients at target<extra></extra>"))
+    fig.update_xaxes(title_text="Dosing interval", type="category")
+    fig.update_yaxes(title_text="Dose (mg)", type="category")
+    fig.update_layout(title=f"Patients with trough occupancy ≥ {target_pct:g}% at steady state", height=480,
+                      margin=dict(l=10, r=10, t=60, b=10))
+    return fig
+
+
+@memoize("figure")
+def statin_mortality_figure():
+    # Efficacy chart - Heart disease mortality decline (2000-2019)
+    data = {'Year': [2000, 2005, 2010, 2015, 2019],
+           'Heart Disease Deaths per 100,000': [257.6, 216.8, 179.1, 168.5, 161.5]}
+    df = pd.DataFrame(data)
+    fig = px.line(df, x='Year', y='Heart Disease Deaths per 100,000',
+                 title="Age-Adjusted Heart Disease Mortality in the US (2000-2019)",
+                 markers=True)
+    fig.update_layout(height=350)
+    return fig
+
+
+@memoize("figure")
+def statin_potency_figure():
+    # Market comparison
+    statin_data = pd.DataFrame({
+        'Drug': ['Rosuvastatin\n(20 mg)', 'Simvastatin\n(40 mg)'],
+        'LDL Reduction (%)': [50, 30],
+        'Type': ['High Potency', 'Moderate Potency']
+    })
+    fig = px.bar(statin_data, x='Drug', y='LDL Reduction (%)',
+                 color='Type', title='Comparative Potency of Statins',
+                 color_discrete_map={'High Potency': '#FF6B6B', 'Moderate Potency': '#4ECDC4'})
+    fig.update_layout(height=300)
+    return fig
+
+
+@memoize("figure")
+def hiv_life_expectancy_figure():
+    # HIV survival timeline
+    survival_data = pd.DataFrame({
+        'Era': ['Pre-1996\n(No ART)', '1996-1999\n(Early ART)',
+               '2000-2002\n(Improved ART)', '2003-2005\n(Modern ART)'],
+        'Life Expectancy at Age 20 (years)': [36, 39, 50, 63],
+        'Order': [1, 2, 3, 4]
+    })
+    fig = px.bar(survival_data, x='Era', y='Life Expectancy at Age 20 (years)',
+                title='Life Expectancy for 20-Year-Olds Starting HIV Treatment',
+                color='Life Expectancy at Age 20 (years)',
+                color_continuous_scale='Viridis')
+    fig.update_layout(height=350, showlegend=False)
+    return fig
+
+
+@memoize("figure")
+def protease_inhibitor_potency_figure():
+    pi_data = pd.DataFrame({
+        'Drug': ['Ritonavir', 'Saquinavir', 'Indinavir', 'Lopinavir'],
+        'IC50 (nM)': [15, 5, 10, 8]
+    })
+    fig = px.bar(pi_data, x='Drug', y='IC50 (nM)',
+                 title='IC50 for Viral Production Inhibition (Lower = More Potent)',
+                 log_y=True)
+    fig.update_layout(height=300)
+    return fig
+
+
+@memoize("figure")
+def ace_outcomes_figure():
+    # Cardiovascular outcomes
+    outcome_data = pd.DataFrame({
+        'Outcome': ['Heart Attack', 'Stroke', 'Heart Failure', 'CV Death'],
+        'Risk Reduction (%)': [20, 32, 23, 26]
+    })
+    fig = px.bar(outcome_data, x='Outcome', y='Risk Reduction (%)',
+                 title='Cardiovascular Risk Reduction with Ramipril (HOPE Trial)',
+                 color='Risk Reduction (%)', color_continuous_scale='Greens')
+    fig.update_layout(height=300, showlegend=False)
+    return fig
+
+
+@memoize("figure")
+def imatinib_selectivity_figure():
+    selectivity_data = pd.DataFrame({
+        'Target': ['BCR-ABL', 'PDGFR', 'c-KIT', 'Off-targets'],
+        'IC50 (nM)': [260, 380, 410, 5000],
+        'Type': ['Primary', 'Secondary', 'Secondary', 'Non-target']
+    })
+    fig = px.bar(selectivity_data, x='Target', y='IC50 (nM)',
+                 title='Imatinib Selectivity (Lower = More Potent)',
+                 color='Type', log_y=True)
+    fig.update_layout(height=300)
+    return fig
+
+
+def _block_labels(names, edges):
+    # One category label per block: the name, or first … last (count)
+    return [names[a] if b - a == 1 else f"{names[a]} … {names[b - 1]} ({b - a})" for a, b in zip(edges, edges[1:])]
+
+
+def _cluster_breaks(clusters, edges):
+    # Block positions (between categories) where the cluster number changes
+    changes = np.flatnonzero(np.diff(clusters)) + 1
+    return np.unique(np.searchsorted(edges, changes, side="right") - 1) - 0.5
+
+
+def kinome_heatmap_figure(profiles, compounds, kinases, compound_clusters, kinase_clusters,
+                          bins=SWEEP_DISPLAY_BINS):
+    # Clustered pIC50 matrix from selectivity.analyze_panel, averaged down to at
+    # most bins × bins blocks; lines separate the clusters
+    row_edges, col_edges, z = block_means(profiles, (bins, bins))
+    y = _block_labels(compounds, row_edges)
+    x = _block_labels(kinases, col_edges)
+    fig = go.Figure(go.Heatmap(
+        z=z, x=x, y=y, colorscale="Viridis", zmin=PIC50_FLOOR, zmax=max(9.0, float(z.max())),
+        colorbar=dict(title="pIC50"),
+        hovertemplate="%{y}<br>%{x}<br>pIC50 = %{z:.2f}<extra></extra>"))
+    line = dict(color="white", width=1)
+    for position in _cluster_breaks(compound_clusters, row_edges):
+        fig.add_hline(y=position, line=line)
+    for position in _cluster_breaks(kinase_clusters, col_edges):
+        fig.add_vline(x=position, line=line)
+    averaged = len(y) < len(compounds) or len(x) < len(kinases)
+    fig.update_xaxes(title_text="Kinase", type="category", showticklabels=len(x) <= 60)
+    fig.update_yaxes(title_text="Compound", type="category", showticklabels=len(y) <= 60, autorange="reversed")
+    fig.update_layout(
+        title=f"pIC50 of {len(compounds):,} compounds × {len(kinases):,} kinases"
+              + (f" (averaged to {len(y)} × {len(x)} blocks)" if averaged else ""),
+        height=640, margin=dict(l=10, r=10, t=60, b=10))
+    return fig
+
+
+def selectivity_scores_figure(table):
+    # One point per compound: Gini against S(1 µM), colored by cluster
+    fig = go.Figure(go.Scattergl(
+        x=table["s_1uM"], y=table["gini"], mode="markers", text=table["compound"],
+        customdata=table[["primary_kinase", "primary_nM"]],
+        marker=dict(size=5, color=table["cluster"], colorscale="Turbo", opacity=0.7,
+                    colorbar=dict(title="Cluster")),
+        hovertemplate="%{text}<br>S(1 µM) = %{x:.3f}<br>Gini = %{y:.2f}<br>"
+                      "Primary: %{customdata[0]} (%{customdata[1]:.3g} nM)<extra></extra>"))
+    fig.update_layout(title="Selectivity scores (top left = most selective)", height=400,
+                      xaxis_title="S(1 µM): fraction of kinases hit below 1 µM", yaxis_title="Gini coefficient")
+    return fig
+
+
+@memoize("figure")
+def cox2_side_effects_figure():
+    # Side effect comparison
+    side_effects = pd.DataFrame({
+        'Side Effect': ['GI Ulcers', 'GI Bleeding', 'Dyspepsia'],
+        'Traditional NSAIDs (%)': [1.4, 1.0, 15],
+        'COX-2 Inhibitors (%)': [0.4, 0.3, 8]
+    })
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Traditional NSAIDs',
+                        x=side_effects['Side Effect'],
+                        y=side_effects['Traditional NSAIDs (%)']))
+    fig.add_trace(go.Bar(name='COX-2 Inhibitors',
+                        x=side_effects['Side Effect'],
+                        y=side_effects['COX-2 Inhibitors (%)']))
+    fig.update_layout(title='Gastrointestinal Side Effects Comparison',
+                     yaxis_title='Incidence (%)',
+                     barmode='group',
+                     height=300)
+    return fig
+
+
+# Default IC50 calculator inputs (same as the app's number_input defaults)
+DEFAULT_IC50_CONCENTRATIONS = [float((i+1)*2) for i in range(5)]
+DEFAULT_IC50_ACTIVITIES = [float(max(10, 100 - i*18)) for i in range(5)]
+
+
+def default_ic50_figure():
+    ic50, conc_sorted, act_sorted = interpolate_ic50(DEFAULT_IC50_CONCENTRATIONS, DEFAULT_IC50_ACTIVITIES)
+    return ic50_fit_figure(conc_sorted, act_sorted, ic50)
+
+
+def _mechanism_figures():
+    # Each mechanism at the simulator's default sliders ([I] = 2 µM, Ki = 1)
+    figures = []
+    for mechanism in MECHANISMS:
+        slug, schematic = MECHANISM_SCHEMATICS[mechanism]
+        alpha = 3.0
+        alpha_prime = alpha * 0.8 if mechanism == "Mixed Inhibition" else alpha
+        figures.append((f"schematic_{slug}", schematic))
+        figures.append((f"michaelis_menten_{slug}",
+                        lambda m=mechanism, a=alpha, ap=alpha_prime: michaelis_menten_figure(m, 1.0, 50, a, ap)))
+        figures.append((f"lineweaver_burk_{slug}",
+                        lambda m=mechanism, a=alpha, ap=alpha_prime: lineweaver_burk_figure(m, 1.0, 50, a, ap)))
+    return figures
+
+
+# Every poster figure at its default parameters, by section, in page order
+POSTER_FIGURES = {
+    "overview": [
+        ("executive_summary", overview_stats_figure),
+        ("development_pipeline", pipeline_figure),
+    ],
+    "mechanisms": _mechanism_figures(),
+    "case_studies": [
+        ("statin_mortality", statin_mortality_figure),
+        ("statin_potency", statin_potency_figure),
+        ("hiv_life_expectancy", hiv_life_expectancy_figure),
+        ("protease_inhibitor_potency", protease_inhibitor_potency_figure),
+        ("ace_outcomes", ace_outcomes_figure),
+        ("imatinib_selectivity", imatinib_selectivity_figure),
+        ("cox2_side_effects", cox2_side_effects_figure),
+    ],
+    "calculator": [
+        ("ic50_calculator", default_ic50_figure),
+        ("dose_response_curve", lambda: dose_response_figure(100, 0, 1.0, 1.0, 100.0)),
+    ],
+}
+
+
+def build_figure(section, name):
+    # Look a figure up by name (used by worker processes, which can't receive lambdas)
+    for figure_name, builder in POSTER_FIGURES[section]:
+        if figure_name == name:
+            return builder()
+    raise KeyError(f"No figure {name!r} in section {section!r}")
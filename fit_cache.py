@@ -0,0 +1,154 @@
+# Persistent, content-addressed cache of fit results. Entries are keyed by a
+# hash of (model, fitter version, input arrays, options), so re-uploading the
+# same plate export returns its fits without refitting. Backed by SQLite in WAL
+# mode, which lets several Streamlit/worker processes read and write the same
+# file; the total size is kept under a limit by evicting least-recently-used
+# entries. FitCache implements the CacheBackend interface; get_fit_cache()
+# returns the shared Redis backend instead when POSTER_CACHE_URL points at one.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from cache_backend import CacheBackend, get_cache_backend, is_shared
+
+DEFAULT_PATH = os.environ.get("FIT_CACHE_PATH",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fit_cache.sqlite"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fits (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS fits_last_access ON fits (last_access);
+"""
+
+
+def fit_key(model, version, *arrays, **options):
+    # Arrays are hashed by dtype, shape and bytes, so 1 and 1.0 hash the same
+    # once converted, but 1.0 and 1.0000001 don't
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{version}\0".encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=float)
+        digest.update(f"{array.shape}\0".encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _encode(value):
+    # Results are small dicts of scalars/lists; NaN survives as JSON's NaN token
+    return json.dumps(value, default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o))
+
+
+class FitCache(CacheBackend):
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(fits)")}
+        if "expires" not in columns:  # caches written before TTL support
+            conn.execute("ALTER TABLE fits ADD COLUMN expires REAL")
+
+    def _connect(self):
+        # One connection per thread; SQLite connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        # {key: value} for the keys present; touches them for LRU
+        if not keys:
+            return {}
+        conn = self._connect()
+        now = time.time()
+        found = {}
+        for start in range(0, len(keys), 500):  # stay under SQLite's parameter limit
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(f"SELECT key, value FROM fits WHERE key IN ({placeholders}) "
+                                "AND (expires IS NULL OR expires > ?)", [*batch, now]).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        if found:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("UPDATE fits SET last_access = ? WHERE key = ?", [(now, k) for k in found])
+                conn.execute("COMMIT")
+            except sqlite3.OperationalError:
+                # A busy writer only costs LRU precision, not correctness
+                conn.execute("ROLLBACK")
+        return found
+
+    def set_many(self, items, ttl=None, model=""):
+        # items: iterable of (key, value)
+        now = time.time()
+        expires = now + ttl if ttl else None
+        rows = []
+        for key, value in items:
+            encoded = _encode(value)
+            rows.append((key, model, encoded, len(encoded), now, now, expires))
+        if not rows:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM fits WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM fits").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the least recently used entries until we're back under 90% of the limit
+        excess = total - int(self.max_bytes * 0.9)
+        cutoff = conn.execute(
+            "SELECT last_access FROM (SELECT last_access, SUM(size) OVER (ORDER BY last_access) AS running "
+            "FROM fits) WHERE running >= ? ORDER BY last_access LIMIT 1", (excess,)).fetchone()
+        if cutoff is not None:
+            conn.execute("DELETE FROM fits WHERE last_access <= ?", cutoff)
+
+    def stats(self):
+        count, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fits").fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes, "path": self.path}
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM fits WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM fits")
+
+
+_caches = {}
+
+
+def get_fit_cache(path=DEFAULT_PATH):
+    # Per process (the job queue's workers each open their own connections)
+    if is_shared():
+        return get_cache_backend("fit")
+    key = (os.getpid(), path)
+    if key not in _caches:
+        _caches[key] = FitCache(path)
+    return _caches[key]
@@ -0,0 +1,290 @@
+# Vectorized four-parameter Hill fits for batches of dose-response curves.
+# Every compound's points sit in one row of a NaN-padded (compounds, points)
+# array and all curves take their Levenberg-Marquardt steps together through
+# batched 4x4 solves. Robust losses (Huber, Tukey) are applied by iteratively
+# reweighting residuals, and outliers can be masked one worst point per round.
+# Nothing here depends on Streamlit.
+import numpy as np
+
+from kernels import hill_cost, hill_model, hill_normal_equations
+
+LOSSES = ("linear", "huber", "tukey")
+HUBER_K = 1.345   # 95% efficiency under normal errors
+TUKEY_C = 4.685   # ditto
+MIN_POINTS = 4    # never mask below this many points (four parameters)
+OUTLIER_THRESHOLD = 4.0  # |residual| / RSDR beyond which a point is masked
+
+
+def pad_curves(curves):
+    # [(concentrations, activities), ...] -> two (n, max_points) arrays, NaN-padded
+    width = max((len(c) for c, _ in curves), default=0)
+    conc = np.full((len(curves), width), np.nan)
+    act = np.full((len(curves), width), np.nan)
+    for i, (c, a) in enumerate(curves):
+        conc[i, :len(c)] = c
+        act[i, :len(a)] = a
+    return conc, act
+
+
+def robust_scale(residuals, used):
+    # Robust SD of the residuals (RSDR): the 68.27th percentile of |residual|,
+    # corrected for the four fitted parameters. Unlike the MAD it doesn't
+    # collapse when a robust fit passes exactly through half of a short curve.
+    n_used = used.sum(axis=1)
+    spread = np.nanpercentile(np.where(used, np.abs(residuals), np.nan), 68.27, axis=1)
+    return np.maximum(spread * n_used / np.maximum(n_used - 4, 1), 1e-6)
+
+
+def robust_weights(residuals, scale, loss):
+    u = np.abs(residuals) / scale[:, None]
+    if loss == "huber":
+        return np.where(u <= HUBER_K, 1.0, HUBER_K / np.maximum(u, 1e-12))
+    if loss == "tukey":
+        return np.where(u < TUKEY_C, (1 - (u / TUKEY_C) ** 2) ** 2, 0.0)
+    return np.ones_like(residuals)
+
+
+def initial_parameters(conc, act, used):
+    # All curves at once: plateaus from the extremes, slope sign from the trend
+    # (first vs last third of the points) and IC50 from the first 50% crossing
+    # in concentration order
+    n, m = conc.shape
+    order = np.argsort(np.where(used, conc, np.inf), axis=1, kind="stable")
+    c = np.take_along_axis(conc, order, axis=1)
+    a = np.take_along_axis(act, order, axis=1)
+    # Used points now lead each row, sorted by concentration
+    k = used.sum(axis=1)[:, None]
+    position = np.arange(m)
+    first = position < k
+    a_used = np.where(first, a, np.nan)
+
+    third = np.maximum(1, k // 3)
+    head, tail = first & (position < third), first & (position >= k - third)
+    decreasing = (np.where(head, a, 0).sum(axis=1) / head.sum(axis=1)
+                  >= np.where(tail, a, 0).sum(axis=1) / tail.sum(axis=1))
+    high = np.max(np.where(first, a, -np.inf), axis=1)
+    low = np.min(np.where(first, a, np.inf), axis=1)
+
+    # Fallback IC50: the geometric middle of the positive concentrations
+    positive = first & (c > 0)
+    with np.errstate(invalid="ignore"):
+        middle = np.sqrt(np.min(np.where(positive, c, np.inf), axis=1) * np.max(np.where(positive, c, 0), axis=1))
+    middle = np.where(positive.any(axis=1), middle, 1.0)
+
+    # Linear interpolation on each pair of neighbours; a trailing NaN column
+    # keeps the pair axis non-empty for one-point rows
+    s = np.c_[a_used - 50, np.full(n, np.nan)]
+    c = np.c_[c, np.full(n, np.nan)]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = s[:, :-1] / (s[:, :-1] - s[:, 1:])
+        crosses = (t >= 0) & (t <= 1)  # padding and flat pairs give NaN or inf
+        j = np.argmax(crosses, axis=1)
+        rows = np.arange(n)
+        ic50 = c[rows, j] + t[rows, j] * (c[rows, j + 1] - c[rows, j])
+        found = crosses.any(axis=1) & (high > 50) & (low < 50) & (ic50 > 0)
+    ic50 = np.where(found, ic50, middle)
+    return np.stack([np.where(decreasing, high, low), np.where(decreasing, low, high), np.log10(ic50),
+                     np.ones(n)], axis=1)
+
+
+def _solve_each(system, rhs):
+    # Fallback when the batched solve fails: singular systems get the
+    # least-squares step (pinv) and non-finite ones no step, so only the
+    # offending curves stall and the rest of the batch keeps its exact steps
+    step = np.zeros_like(rhs)
+    finite = np.isfinite(system).all(axis=(1, 2)) & np.isfinite(rhs).all(axis=1)
+    singular = finite.copy()
+    singular[finite] = np.linalg.matrix_rank(system[finite]) < system.shape[-1]
+    regular = finite & ~singular
+    try:
+        step[regular] = np.linalg.solve(system[regular], rhs[regular][..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        singular |= regular  # numerically singular after all
+    step[singular] = (np.linalg.pinv(system[singular]) @ rhs[singular][..., None])[..., 0]
+    return step
+
+
+def _lm(log_conc, act, used, weights, params, max_iter, bounds):
+    # Weighted Levenberg-Marquardt on all curves at once; returns updated params.
+    # The model, Jacobian and normal equations come from kernels.py.
+    damping = np.full(params.shape[0], 1e-2)
+    w = np.where(used, weights, 0.0)
+    y_safe = np.where(used, act, 0.0)
+
+    current = hill_cost(log_conc, y_safe, w, params)
+    active = np.ones(params.shape[0], dtype=bool)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        jtj, jtr = hill_normal_equations(log_conc, y_safe, w, params)
+        diag = np.einsum("nii->ni", jtj)
+        system = jtj + damping[:, None, None] * np.einsum("ni,ij->nij", diag + 1e-9, np.eye(4))
+        try:
+            step = np.linalg.solve(system, jtr[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step = _solve_each(system, jtr)
+        step[~active] = 0
+        trial = np.clip(params + step, bounds[0], bounds[1])
+        trial_cost = hill_cost(log_conc, y_safe, w, trial)
+        better = trial_cost < current
+        # Converged once the relative improvement is negligible
+        done = better & ((current - trial_cost) <= 1e-10 * (1 + current))
+        params = np.where(better[:, None], trial, params)
+        current = np.where(better, trial_cost, current)
+        damping = np.where(better, damping / 3, damping * 4)
+        active &= ~done & (damping < 1e10)
+    return params
+
+
+def fit_hill_batch(conc, act, loss="linear", mask_outliers=False, outlier_threshold=OUTLIER_THRESHOLD,
+                   max_outliers=2, max_iter=60, irls_rounds=4, initial=None, exclude=None):
+    # conc, act: NaN-padded (n, points) arrays. Returns a dict of per-curve
+    # arrays (top, bottom, ic50, hill_slope, rmse, n_used, n_masked) and the
+    # boolean outlier mask (n, points). initial: optional (n, 4) array of
+    # (top, bottom, ic50, hill_slope) to warm-start from, e.g. the previous fit
+    # of an edited curve; rows with NaNs start from the data instead. exclude:
+    # optional (n, points) mask of points left out by hand.
+    if loss not in LOSSES:
+        raise ValueError(f"Unknown loss {loss!r}, expected one of {LOSSES}")
+    conc = np.asarray(conc, dtype=float)
+    act = np.asarray(act, dtype=float)
+    valid = np.isfinite(conc) & np.isfinite(act) & (conc > 0)
+    if exclude is not None:
+        valid &= ~np.asarray(exclude, dtype=bool)
+    n = conc.shape[0]
+    fittable = valid.sum(axis=1) >= MIN_POINTS
+    log_conc = np.log10(np.where(valid, conc, 1.0))
+
+    outliers = np.zeros_like(valid)
+    result = {key: np.full(n, np.nan) for key in ("top", "bottom", "ic50", "hill_slope", "rmse")}
+    result["n_used"] = valid.sum(axis=1)
+    if not fittable.any():
+        result["n_masked"] = np.zeros(n, dtype=int)
+        return result, outliers
+
+    rows = np.flatnonzero(fittable)
+    lc, y, ok = log_conc[rows], act[rows], valid[rows]
+    span = np.nanmax(np.where(ok, y, np.nan), axis=1) - np.nanmin(np.where(ok, y, np.nan), axis=1)
+    lc_min = np.nanmin(np.where(ok, lc, np.nan), axis=1)
+    lc_max = np.nanmax(np.where(ok, lc, np.nan), axis=1)
+    pad = np.maximum(span, 1.0) * 2
+    y_min = np.nanmin(np.where(ok, y, np.nan), axis=1)
+    y_max = np.nanmax(np.where(ok, y, np.nan), axis=1)
+    # IC50 may sit up to two decades outside the tested range
+    bounds = (np.stack([y_min - pad, y_min - pad, lc_min - 2, np.full(len(rows), -10.0)], axis=1),
+              np.stack([y_max + pad, y_max + pad, lc_max + 2, np.full(len(rows), 10.0)], axis=1))
+
+    masked = np.zeros_like(ok)
+    params = initial_parameters(np.where(ok, 10 ** lc, np.nan), y, ok)
+    if initial is not None:
+        warm = np.array(initial, dtype=float)[rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            warm[:, 2] = np.log10(warm[:, 2])
+        usable = np.isfinite(warm).all(axis=1)
+        params[usable] = np.clip(warm[usable], bounds[0][usable], bounds[1][usable])
+    for round_ in range(max_outliers + 1 if mask_outliers else 1):
+        used = ok & ~masked
+        weights = np.ones_like(y)
+        params = _lm(lc, y, used, weights, params, max_iter, bounds)
+        if loss != "linear":
+            for _ in range(irls_rounds):
+                fitted, _ = hill_model(lc, *(params[:, k:k + 1] for k in range(4)))
+                residuals = np.where(used, y - fitted, np.nan)
+                weights = robust_weights(np.nan_to_num(residuals), robust_scale(residuals, used), loss)
+                params = _lm(lc, y, used, weights, params, max_iter, bounds)
+        if not mask_outliers or round_ == max_outliers:
+            break
+        # Mask the single worst point per curve if it is beyond the threshold
+        fitted, _ = hill_model(lc, *(params[:, k:k + 1] for k in range(4)))
+        residuals = np.where(used, y - fitted, np.nan)
+        z = np.abs(residuals) / robust_scale(residuals, used)[:, None]
+        z = np.where(used, z, -np.inf)
+        worst = np.argmax(z, axis=1)
+        flag = (z[np.arange(len(rows)), worst] > outlier_threshold) & (used.sum(axis=1) > MIN_POINTS + 1)
+        if not flag.any():
+            break
+        masked[np.flatnonzero(flag), worst[flag]] = True
+
+    used = ok & ~masked
+    fitted, _ = hill_model(lc, *(params[:, k:k + 1] for k in range(4)))
+    rmse = np.sqrt(np.nanmean(np.where(used, (y - fitted) ** 2, np.nan), axis=1))
+    result["top"][rows], result["bottom"][rows] = params[:, 0], params[:, 1]
+    result["ic50"][rows], result["hill_slope"][rows] = 10 ** params[:, 2], params[:, 3]
+    result["rmse"][rows] = rmse
+    outliers[rows] = masked
+    result["n_used"] = valid.sum(axis=1) - outliers.sum(axis=1)
+    result["n_masked"] = outliers.sum(axis=1)
+    return result, outliers
+
+
+# Curve classes for triaging screening batches
+COMPLETE, PARTIAL, INACTIVE, INVERTED = "complete", "partial", "inactive", "inverted"
+CURVE_CLASSES = (COMPLETE, PARTIAL, INACTIVE, INVERTED)
+CURVE_FLAGS = ("flag_extrapolated", "flag_poor_fit", "flag_low_efficacy")
+ACTIVE_EFFICACY = 20.0  # % activity lost across the tested range to count as active
+FULL_EFFICACY = 80.0    # below this an active curve is flagged as low efficacy
+ASYMPTOTE_COVERAGE = 0.8  # fraction of the transition the tested range must reach at each end
+R2_MIN = 0.8
+
+
+def classify_curves(conc, act, used, top, bottom, ic50, hill_slope):
+    # conc, act, used: (n, points) arrays; top, bottom, ic50, hill_slope: (n,)
+    # fitted parameters, NaN where unknown. Plateaus default to the mean
+    # activity at the lowest and highest concentration and the slope to 1, so
+    # interpolated IC50s are classified the same way as Hill fits.
+    # Efficacy is the modelled activity lost between the lowest and highest
+    # tested concentrations; a curve is complete when it is active, its IC50
+    # lies inside the tested range, at least two points sit on each asymptote
+    # and the model fits (R² ≥ R2_MIN). Flags only apply to active curves.
+    # Returns a dict of (n,) arrays.
+    used = used & np.isfinite(conc) & np.isfinite(act) & (conc > 0)
+    has_points = used.any(axis=1)
+    c = np.where(used, conc, np.nan)
+    with np.errstate(all="ignore"):
+        c_min = np.nanmin(np.where(has_points[:, None], c, 1.0), axis=1)
+        c_max = np.nanmax(np.where(has_points[:, None], c, 1.0), axis=1)
+        at_min = used & (conc == c_min[:, None])
+        at_max = used & (conc == c_max[:, None])
+        edge_low = np.nansum(np.where(at_min, act, 0), axis=1) / at_min.sum(axis=1)
+        edge_high = np.nansum(np.where(at_max, act, 0), axis=1) / at_max.sum(axis=1)
+
+        top = np.where(np.isfinite(top), top, edge_low)
+        bottom = np.where(np.isfinite(bottom), bottom, edge_high)
+        slope = np.where(np.isfinite(hill_slope), hill_slope, 1.0)
+        fitted = np.isfinite(ic50) & (ic50 > 0)
+        safe_ic50 = np.where(fitted, ic50, 1.0)
+
+        def fraction(x):
+            # Fraction of the way from top to bottom at concentrations x, shaped (n, k)
+            return 1 - 1 / (1 + (x / safe_ic50[:, None]) ** slope[:, None])
+
+        model = bottom[:, None] + (top - bottom)[:, None] * (1 - fraction(conc))
+        at_c_min, at_c_max = fraction(c_min[:, None])[:, 0], fraction(c_max[:, None])[:, 0]
+        efficacy = np.where(fitted, (top - bottom) * (at_c_max - at_c_min), edge_low - edge_high)
+
+        y = np.where(used, act, np.nan)
+        ss_res = np.nansum(np.where(used, (act - model) ** 2, 0), axis=1)
+        ss_tot = np.nansum((y - np.nanmean(y, axis=1, keepdims=True)) ** 2, axis=1)
+        r_squared = np.where(fitted & (ss_tot > 0), 1 - ss_res / ss_tot, np.nan)
+
+    inside = fitted & (ic50 >= c_min) & (ic50 <= c_max)
+    # Each asymptote needs at least two points on it, not just a fitted plateau
+    along = fraction(conc)
+    covered = ((used & (along <= 1 - ASYMPTOTE_COVERAGE)).sum(axis=1) >= 2) & \
+              ((used & (along >= ASYMPTOTE_COVERAGE)).sum(axis=1) >= 2)
+    good_fit = r_squared >= R2_MIN
+    active = efficacy >= ACTIVE_EFFICACY
+
+    curve_class = np.full(len(efficacy), PARTIAL, dtype=object)
+    curve_class[active & inside & covered & good_fit] = COMPLETE
+    curve_class[~active] = INACTIVE
+    curve_class[efficacy <= -ACTIVE_EFFICACY] = INVERTED
+    curve_class[~has_points] = INACTIVE
+    return {
+        "curve_class": curve_class,
+        "efficacy_pct": efficacy,
+        "r_squared": r_squared,
+        "flag_extrapolated": active & fitted & ~inside,
+        "flag_poor_fit": active & fitted & ~good_fit,
+        "flag_low_efficacy": active & (efficacy < FULL_EFFICACY),
+    }
@@ -0,0 +1,434 @@
+# Background job queue for batch fits. A job is a list of items processed in
+# chunks on a worker pool; progress and cancellation are checked between
+# chunks, so a Streamlit rerun only ever submits or polls and never blocks on
+# the fit itself. Nothing here depends on Streamlit.
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from fit_cache import fit_key, get_fit_cache
+from fitting import OUTLIER_THRESHOLD, classify_curves, fit_hill_batch, pad_curves
+from kinetics import cheng_prusoff_ki, hill_slope_estimate, interpolate_ic50
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Overloaded(RuntimeError):
+    # Raised at submission when a session or the whole queue is over its quota
+    pass
+
+
+class Job:
+    def __init__(self, kind, owner, fn, items, kwargs):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.owner = owner
+        self.fn = fn
+        self.items = items
+        self.kwargs = kwargs
+        self.total = len(items)
+        self.next_start = 0
+        self.in_flight = 0  # chunks submitted and not yet back
+        self.done = 0
+        self.state = QUEUED
+        self.error = None
+        self.results = []  # in item order, up to the first chunk still outstanding
+        self.early = {}  # chunk start -> results of chunks that came back out of order
+        self.submitted = time.time()
+        self.finished = None
+        self.cancel_requested = False
+
+    @property
+    def remaining(self):
+        return self.total - self.done
+
+    def snapshot(self):
+        return {"id": self.id, "kind": self.kind, "state": self.state, "done": self.done,
+                "total": self.total, "progress": self.done / self.total if self.total else 1.0,
+                "error": self.error, "submitted": self.submitted, "finished": self.finished}
+
+
+class JobQueue:
+    # Chunk-level scheduler over one process pool. Interactive tasks (run) are
+    # dispatched before any batch chunk; batch jobs (submit) are served
+    # round-robin across sessions, and across a session's jobs, one chunk per
+    # turn while a worker is free. A lone job can use every worker, but a
+    # session's 1536-well plate can't starve anyone else and is preemptible at
+    # chunk boundaries. Work beyond the quotas is rejected with Overloaded instead of
+    # queueing without bound.
+    def __init__(self, workers=None, chunk_size=64, max_session_jobs=2, max_session_items=20_000,
+                 max_pending_items=100_000, max_interactive=64, keep_finished=50, finished_ttl=3600):
+        # Leave a core for the Streamlit script threads
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.chunk_size = chunk_size
+        self.max_session_jobs = max_session_jobs
+        self.max_session_items = max_session_items
+        self.max_pending_items = max_pending_items
+        self.max_interactive = max_interactive
+        # Finished jobs kept per session, and for at most finished_ttl seconds
+        self.keep_finished = keep_finished
+        self.finished_ttl = finished_ttl
+
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Re-entrant: a done callback can fire inline while the dispatcher holds the lock
+        self._cond = threading.Condition(threading.RLock())
+        self._jobs = {}
+        self._sessions = OrderedDict()  # owner -> active jobs, in round-robin order
+        self._interactive = deque()
+        self._in_flight = 0
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch, name="fit-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    # Submission and admission control
+
+    def submit(self, kind, fn, items, owner=None, **kwargs):
+        # Batch work: fn(chunk, **kwargs) -> list of results, one per item; must be picklable
+        items = list(items)
+        with self._cond:
+            active = self._sessions.get(owner, [])
+            if len(active) >= self.max_session_jobs:
+                raise Overloaded(f"at most {self.max_session_jobs} batch jobs per session can run at once")
+            session_items = sum(job.remaining for job in active) + len(items)
+            if session_items > self.max_session_items:
+                raise Overloaded(f"batch too large for one session ({session_items} > {self.max_session_items} items)")
+            pending_items = sum(job.remaining for jobs in self._sessions.values() for job in jobs) + len(items)
+            if pending_items > self.max_pending_items:
+                raise Overloaded("the server is busy with other batches, try again shortly")
+
+            job = Job(kind, owner, fn, items, kwargs)
+            self._jobs[job.id] = job
+            self._sessions.setdefault(owner, []).append(job)
+            self._prune()
+            if not items:
+                self._finish(job, DONE)
+            self._cond.notify()
+        return job.id
+
+    def run(self, fn, *args, **kwargs):
+        # Interactive work: one task ahead of all batch chunks; returns a Future
+        future = Future()
+        with self._cond:
+            if len(self._interactive) >= self.max_interactive:
+                raise Overloaded("too many interactive tasks queued")
+            self._interactive.append((fn, args, kwargs, future))
+            self._cond.notify()
+        return future
+
+    # Dispatch
+
+    def _dispatch(self):
+        with self._cond:
+            while not self._closed:
+                task = self._next_task() if self._in_flight < self.workers else None
+                if task is None:
+                    self._cond.wait()
+                    continue
+                fn, args, kwargs, on_done = task
+                self._in_flight += 1
+                try:
+                    pool_future = self._pool.submit(fn, *args, **kwargs)
+                except RuntimeError as e:
+                    # BrokenProcessPool after a worker died, or a pool shut down
+                    # under us: fail this task through its own callback and carry
+                    # on with a fresh pool
+                    failed = Future()
+                    failed.set_exception(e)
+                    on_done(failed)
+                    self._replace_pool()
+                    continue
+                pool_future.add_done_callback(on_done)
+
+    def _replace_pool(self):
+        # Tasks still on the old pool fail or are cancelled through their callbacks
+        old, self._pool = self._pool, ProcessPoolExecutor(max_workers=self.workers)
+        old.shutdown(wait=False, cancel_futures=True)
+
+    def _next_task(self):
+        while self._interactive:
+            fn, args, kwargs, future = self._interactive.popleft()
+            if future.set_running_or_notify_cancel():
+                return fn, args, kwargs, lambda f, future=future: self._interactive_done(f, future)
+
+        # Rotate through sessions, and through each session's jobs; each gets
+        # at most one chunk per turn. A cancelled job takes no new chunks.
+        for _ in range(len(self._sessions)):
+            owner, jobs = next(iter(self._sessions.items()))
+            self._sessions.move_to_end(owner)
+            for job in jobs:
+                if job.cancel_requested or job.next_start >= job.total:
+                    continue
+                start = job.next_start
+                chunk = job.items[start:start + self.chunk_size]
+                job.next_start += len(chunk)
+                job.in_flight += 1
+                job.state = RUNNING
+                jobs.remove(job)
+                jobs.append(job)
+                return job.fn, (chunk,), job.kwargs, lambda f, job=job, start=start: self._chunk_done(f, job, start)
+        return None
+
+    def _interactive_done(self, pool_future, future):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+        if pool_future.cancelled():
+            future.cancel()
+        elif pool_future.exception() is not None:
+            future.set_exception(pool_future.exception())
+        else:
+            future.set_result(pool_future.result())
+
+    def _chunk_done(self, pool_future, job, start):
+        with self._cond:
+            self._in_flight -= 1
+            job.in_flight -= 1
+            if job.state in FINISHED:
+                pass  # a sibling chunk already failed the job
+            elif pool_future.cancelled():
+                self._finish(job, CANCELLED)
+            elif pool_future.exception() is not None:
+                e = pool_future.exception()
+                job.error = f"{type(e).__name__}: {e}"
+                self._finish(job, FAILED)
+            else:
+                results = pool_future.result()
+                job.early[start] = results
+                job.done += len(results)
+                while len(job.results) in job.early:
+                    job.results.extend(job.early.pop(len(job.results)))
+                if job.cancel_requested and not job.in_flight:
+                    self._finish(job, CANCELLED)
+                elif job.done >= job.total:
+                    self._finish(job, DONE)
+            self._cond.notify()
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished = time.time()
+        job.items = None
+        # Partial results keep whatever came back past a gap, still in item order
+        for start in sorted(job.early):
+            job.results.extend(job.early.pop(start))
+        jobs = self._sessions.get(job.owner, [])
+        if job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del self._sessions[job.owner]
+
+    def _prune(self):
+        # Per session, so one busy session can't push everyone else's results
+        # out; the age limit bounds what sessions that have gone away leave behind
+        expired = time.time() - self.finished_ttl
+        by_owner = {}
+        for job in sorted((j for j in self._jobs.values() if j.state in FINISHED), key=lambda j: j.finished):
+            by_owner.setdefault(job.owner, []).append(job)
+        for finished in by_owner.values():
+            for i, job in enumerate(finished):
+                if i < len(finished) - self.keep_finished or job.finished < expired:
+                    del self._jobs[job.id]
+
+    # Queries
+
+    def status(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def cancel(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED:
+                return False
+            job.cancel_requested = True
+            if not job.in_flight:
+                self._finish(job, CANCELLED)
+            # otherwise the in-flight chunks finish and the job stops there
+            return True
+
+    def result(self, job_id):
+        # Partial results are available while running and after cancellation
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return list(job.results) if job else None
+
+    def jobs(self, owner=None, kind=None):
+        with self._cond:
+            selected = [j for j in self._jobs.values()
+                        if (owner is None or j.owner == owner) and (kind is None or j.kind == kind)]
+            return [j.snapshot() for j in sorted(selected, key=lambda j: j.submitted)]
+
+    def load(self):
+        with self._cond:
+            return {"workers": self.workers, "in_flight": self._in_flight,
+                    "interactive_queued": len(self._interactive), "sessions": len(self._sessions),
+                    "pending_items": sum(job.remaining for jobs in self._sessions.values() for job in jobs)}
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            for job in list(self._jobs.values()):
+                if job.state not in FINISHED:
+                    job.cancel_requested = True
+                    if not job.in_flight:
+                        self._finish(job, CANCELLED)
+            self._cond.notify()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Batch tasks (run in the worker processes)
+
+def group_dose_response(df, compound_col="compound", conc_col="concentration", act_col="activity"):
+    # Long table -> [(compound, concentrations, activities)], one entry per compound
+    return [(str(compound), group[conc_col].to_numpy(float), group[act_col].to_numpy(float))
+            for compound, group in df.groupby(compound_col, sort=False)]
+
+
+IC50_MODEL = "ic50-interpolation"
+IC50_FITTER_VERSION = "2"  # bump when interpolate_ic50 changes, to invalidate cached fits
+
+
+def fit_ic50(concentrations, activities):
+    ic50, conc_sorted, act_sorted = interpolate_ic50(concentrations, activities)
+    return {
+        "n_points": len(conc_sorted),
+        "IC50_uM": np.nan if ic50 is None else ic50,
+        "hill_slope": hill_slope_estimate(conc_sorted, act_sorted),
+        "min_activity": float(act_sorted.min()) if len(act_sorted) else np.nan,
+        "max_activity": float(act_sorted.max()) if len(act_sorted) else np.nan,
+    }
+
+
+HILL_MODEL = "ic50-hill4"
+HILL_FITTER_VERSION = "3"  # bump when fitting.fit_hill_batch changes
+
+
+def fit_hill_curves(curves, loss="huber", mask_outliers=True, initial=None, exclude=None):
+    # Four-parameter Hill fits for a list of (concentrations, activities), all
+    # curves at once. "masked" lists the indices (into each curve's points, in
+    # input order) of the points dropped as outliers. initial and exclude are
+    # passed on to fit_hill_batch (exclude as one boolean array per curve).
+    conc, act = pad_curves(curves)
+    if exclude is not None:
+        exclude = pad_curves([(flags, flags) for flags in exclude])[0] == 1
+    fits, outliers = fit_hill_batch(conc, act, loss=loss, mask_outliers=mask_outliers, initial=initial,
+                                    exclude=exclude)
+    rows = []
+    for i, (concentrations, activities) in enumerate(curves):
+        finite = np.isfinite(activities)
+        if exclude is not None:
+            finite &= ~exclude[i, :len(activities)]
+        rows.append({
+            "n_points": int(np.count_nonzero(finite & np.isfinite(concentrations))),
+            "IC50_uM": float(fits["ic50"][i]),
+            "hill_slope": float(fits["hill_slope"][i]),
+            "min_activity": float(activities[finite].min()) if finite.any() else np.nan,
+            "max_activity": float(activities[finite].max()) if finite.any() else np.nan,
+            "top": float(fits["top"][i]),
+            "bottom": float(fits["bottom"][i]),
+            "rmse": float(fits["rmse"][i]),
+            "n_masked": int(fits["n_masked"][i]),
+            "masked": np.flatnonzero(outliers[i, :len(concentrations)]).tolist(),
+        })
+    return rows
+
+
+def batch_fit_key(concentrations, activities, loss=None, mask_outliers=False):
+    if loss is None:
+        return fit_key(IC50_MODEL, IC50_FITTER_VERSION, concentrations, activities)
+    return fit_key(HILL_MODEL, HILL_FITTER_VERSION, concentrations, activities, loss=loss,
+                   mask_outliers=mask_outliers, threshold=OUTLIER_THRESHOLD)
+
+
+def ic50_batch_chunk(chunk, use_cache=True, loss=None, mask_outliers=False):
+    # loss=None keeps the interpolated IC50; "linear", "huber" or "tukey" fit the
+    # four-parameter Hill equation instead, optionally masking outliers
+    keys = [batch_fit_key(concentrations, activities, loss, mask_outliers) for _, concentrations, activities in chunk]
+    cache = None
+    cached = {}
+    if use_cache:
+        try:
+            cache = get_fit_cache()
+            cached = cache.get_many(keys)
+        except (sqlite3.Error, OSError):
+            cache = None  # an unwritable cache shouldn't fail the fit
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if loss is None:
+        fresh_fits = [fit_ic50(chunk[i][1], chunk[i][2]) for i in missing]
+    else:
+        # Cache misses are fitted together in one vectorized call
+        fresh_fits = fit_hill_curves([chunk[i][1:] for i in missing], loss, mask_outliers) if missing else []
+    fresh = [(keys[i], fit) for i, fit in zip(missing, fresh_fits)]
+    fits = {**cached, **dict(fresh)}
+
+    rows = [{"compound": compound, **fits[key], "cached": key in cached}
+            for (compound, _, _), key in zip(chunk, keys)]
+    # Classified on every run rather than cached, so changing a threshold
+    # doesn't invalidate stored fits
+    for row, classes in zip(rows, classify_rows(chunk, rows)):
+        row.update(classes)
+
+    if cache is not None and fresh:
+        try:
+            cache.set_many(fresh)
+        except (sqlite3.Error, OSError):
+            pass
+    return rows
+
+
+def classify_rows(chunk, rows, exclude=None):
+    # Curve class, efficacy, R² and flags for a chunk's fit rows, all curves at once
+    conc, act = pad_curves([(concentrations, activities) for _, concentrations, activities in chunk])
+    used = np.isfinite(conc)
+    for i, row in enumerate(rows):
+        used[i, row.get("masked") or []] = False
+        if exclude is not None:
+            used[i, :len(exclude[i])] &= ~np.asarray(exclude[i], dtype=bool)
+
+    def param(name):
+        return np.array([row.get(name, np.nan) for row in rows], dtype=float)
+
+    classes = classify_curves(conc, act, used, param("top"), param("bottom"), param("IC50_uM"), param("hill_slope"))
+    return [{name: values[i].item() if hasattr(values[i], "item") else values[i] for name, values in classes.items()}
+            for i in range(len(rows))]
+
+
+def refit_curves(curves, initial=None, loss=None, mask_outliers=False, use_cache=True):
+    # Interactive refit of edited curves: [(compound, concentrations, activities,
+    # excluded)], warm-started from initial ((n, 4) previous top, bottom, IC50,
+    # slope) when given. Fits of the edited data are written to the fit cache,
+    # so re-running the same batch picks them up.
+    chunk = [(compound, concentrations, activities) for compound, concentrations, activities, _ in curves]
+    exclude = [np.asarray(excluded, dtype=bool) for *_, excluded in curves]
+    if loss is None:
+        fits = [fit_ic50(concentrations[~excluded], activities[~excluded])
+                for (_, concentrations, activities), excluded in zip(chunk, exclude)]
+    else:
+        fits = fit_hill_curves([c[1:] for c in chunk], loss, mask_outliers, initial=initial, exclude=exclude)
+    rows = [{"compound": compound, **fit, "cached": False} for (compound, _, _), fit in zip(chunk, fits)]
+    for row, classes in zip(rows, classify_rows(chunk, rows, exclude)):
+        row.update(classes)
+
+    if use_cache and not any(excluded.any() for excluded in exclude):
+        # Hand-excluded points aren't part of the cache key, so only plain edits are stored
+        try:
+            get_fit_cache().set_many((batch_fit_key(concentrations, activities, loss, mask_outliers), fit)
+                                     for (_, concentrations, activities), fit in zip(chunk, fits))
+        except (sqlite3.Error, OSError):
+            pass
+    return rows
+
+
+def ki_batch_chunk(chunk, inhibition_type, substrate_conc, km):
+    return [{"compound": compound, "IC50_uM": ic50,
+             "Ki_uM": cheng_prusoff_ki(inhibition_type, ic50, substrate_conc, km)}
+            for compound, ic50 in chunk]
+
@@ -0,0 +1,193 @@
+# Numerical kernels for the hot loops: the Michaelis-Menten rate law over large
+# arrays, and the Hill model, Jacobian and normal equations inside the batch
+# fitter. With Numba installed these are compiled on first use (and cached on
+# disk), fusing each expression into one pass with no temporaries; without
+# it, or with POSTER_JIT=0, the NumPy versions run instead. Both give the same
+# results to rounding. The plain Hill equation stays with NumPy: it is one
+# power per point, and NumPy's SIMD power beats a compiled scalar loop
+# (see bench_kernels.py).
+#
+# Workspace hands out reusable scratch buffers, so a sweep that evaluates the
+# same shapes over and over allocates once.
+import os
+import threading
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # optional; the in-browser build never has it
+    numba = None
+
+JIT_ENABLED = numba is not None and os.environ.get("POSTER_JIT", "1") != "0"
+JIT_MIN_SIZE = 10_000  # below this the call overhead outweighs the saved temporaries
+LN10 = np.log(10)
+EXPONENT_LIMIT = 300.0  # keeps 10^x finite in float64
+
+
+def backend():
+    return "numba" if JIT_ENABLED else "numpy"
+
+
+# NumPy versions (reference implementations and fallback)
+
+def hill_model(log_conc, top, bottom, log_ic50, hill_slope):
+    # y = bottom + (top - bottom) / (1 + 10^(h·(log[I] - log IC50)))
+    # Parameters broadcast against log_conc as (n, 1) columns
+    u = np.power(10.0, np.clip(hill_slope * (log_conc - log_ic50), -EXPONENT_LIMIT, EXPONENT_LIMIT))
+    return bottom + (top - bottom) / (1 + u), u
+
+
+def hill_jacobian(log_conc, top, bottom, log_ic50, hill_slope):
+    # d y / d (top, bottom, log IC50, h), shape (n, points, 4)
+    y, u = hill_model(log_conc, top, bottom, log_ic50, hill_slope)
+    f = 1 / (1 + u)
+    dfu = f * f * u * LN10 * (top - bottom)
+    jac = np.stack([f, 1 - f, dfu * hill_slope, -dfu * (log_conc - log_ic50)], axis=-1)
+    return y, jac
+
+
+def _columns(params):
+    return tuple(params[:, k:k + 1] for k in range(4))
+
+
+def _numpy_normal_equations(log_conc, act, weights, params):
+    y, jac = hill_jacobian(log_conc, *_columns(params))
+    jw = jac * weights[..., None]
+    return np.einsum("npi,npj->nij", jw, jac), np.einsum("npi,np->ni", jw, act - y)
+
+
+def _numpy_cost(log_conc, act, weights, params):
+    y, _ = hill_model(log_conc, *_columns(params))
+    return np.sum(weights * (y - act) ** 2, axis=1)
+
+
+# Compiled versions. These run serially: batch fits are already spread over
+# the job queue's worker processes, a chunk is too small to gain from threads,
+# and Numba's parallel threading layer (TBB here) hangs interpreter exit once
+# used from a non-main thread, which is where Streamlit runs scripts.
+
+if JIT_ENABLED:
+    @numba.njit(cache=True)
+    def _jit_normal_equations(log_conc, act, weights, params):
+        n, m = log_conc.shape
+        jtj = np.zeros((n, 4, 4))
+        jtr = np.zeros((n, 4))
+        for i in range(n):
+            top, bottom, log_ic50, slope = params[i, 0], params[i, 1], params[i, 2], params[i, 3]
+            g = np.empty(4)
+            for j in range(m):
+                w = weights[i, j]
+                if w == 0.0:
+                    continue
+                d = log_conc[i, j] - log_ic50
+                u = np.exp(LN10 * min(max(slope * d, -EXPONENT_LIMIT), EXPONENT_LIMIT))
+                f = 1.0 / (1.0 + u)
+                r = act[i, j] - (bottom + (top - bottom) * f)
+                dfu = f * f * u * LN10 * (top - bottom)
+                g[0], g[1], g[2], g[3] = f, 1.0 - f, dfu * slope, -dfu * d
+                for a in range(4):
+                    jtr[i, a] += w * g[a] * r
+                    for b in range(4):
+                        jtj[i, a, b] += w * g[a] * g[b]
+        return jtj, jtr
+
+    @numba.njit(cache=True)
+    def _jit_cost(log_conc, act, weights, params):
+        n, m = log_conc.shape
+        cost = np.zeros(n)
+        for i in range(n):
+            top, bottom, log_ic50, slope = params[i, 0], params[i, 1], params[i, 2], params[i, 3]
+            total = 0.0
+            for j in range(m):
+                w = weights[i, j]
+                if w == 0.0:
+                    continue
+                u = np.exp(LN10 * min(max(slope * (log_conc[i, j] - log_ic50), -EXPONENT_LIMIT), EXPONENT_LIMIT))
+                r = bottom + (top - bottom) / (1.0 + u) - act[i, j]
+                total += w * r * r
+            cost[i] = total
+        return cost
+
+    @numba.njit(cache=True)
+    def _jit_michaelis_menten(substrate, km, vmax, out):
+        for k in range(substrate.size):
+            s = substrate[k]
+            out[k] = vmax * s / (km + s)
+        return out
+
+
+def _rows(*arrays):
+    return tuple(np.ascontiguousarray(a, dtype=np.float64) for a in arrays)
+
+
+def hill_normal_equations(log_conc, act, weights, params):
+    # Weighted JᵀJ (n, 4, 4) and Jᵀr (n, 4) for a Levenberg-Marquardt step on
+    # every curve. Points with zero weight are ignored, so act may hold any
+    # finite placeholder there.
+    if JIT_ENABLED:
+        return _jit_normal_equations(*_rows(log_conc, act, weights, params))
+    return _numpy_normal_equations(log_conc, act, weights, params)
+
+
+def hill_cost(log_conc, act, weights, params):
+    # Weighted sum of squared residuals per curve, (n,)
+    if JIT_ENABLED:
+        return _jit_cost(*_rows(log_conc, act, weights, params))
+    return _numpy_cost(log_conc, act, weights, params)
+
+
+def use_elementwise_kernel(values, *scalars):
+    # Elementwise kernels take one large array and scalar parameters; anything
+    # else (small arrays, broadcast parameters) stays with NumPy
+    return (JIT_ENABLED and isinstance(values, np.ndarray) and values.size >= JIT_MIN_SIZE
+            and all(np.ndim(s) == 0 for s in scalars))
+
+
+def michaelis_menten(substrate, km, vmax, out=None):
+    # Computes in float64 and stores in out's dtype; out must be C-contiguous
+    # (it may be the substrate array itself)
+    if out is None:
+        out = np.empty(np.shape(substrate))
+    flat = np.ascontiguousarray(substrate).ravel()
+    _jit_michaelis_menten(flat, float(km), float(vmax), out.reshape(-1))
+    return out
+
+
+class Workspace:
+    # Named scratch buffers, reused across calls. take() returns a view of the
+    # buffer kept under (name, dtype), growing it when a larger shape is asked
+    # for, so repeated evaluations of the same shapes allocate nothing. The
+    # contents are left over from the previous call, and a view is only valid
+    # until the next take() of the same name: copy anything that must outlive
+    # it (figure data, cached results). One workspace per thread, see workspace().
+
+    def __init__(self):
+        self._buffers = {}
+
+    def take(self, name, shape, dtype=np.float64):
+        shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        buffer = self._buffers.get((name, dtype))
+        if buffer is None or buffer.size < size:
+            buffer = self._buffers[(name, dtype)] = np.empty(size, dtype=dtype)
+        return buffer[:size].reshape(shape)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def clear(self):
+        self._buffers.clear()
+
+
+_local = threading.local()
+
+
+def workspace():
+    # The calling thread's workspace. Streamlit runs each session's script on its
+    # own thread, so sessions never share a buffer.
+    if not hasattr(_local, "workspace"):
+        _local.workspace = Workspace()
+    return _local.workspace
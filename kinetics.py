@@ -0,0 +1,221 @@
+import numpy as np
+
+import kernels
+
+# Rate laws and calculator equations behind the Mechanisms and Calculator
+# sections. Nothing here depends on Streamlit, so the poster export can reuse it.
+# Large rate-law evaluations go through the compiled kernel when Numba is
+# installed (see kernels.py).
+#
+# michaelis_menten and hill_response also take dtype= and out=. For sweeps and
+# precomputed grids, dtype=np.float32 halves the memory traffic, and out= writes
+# into a caller's buffer (e.g. from kernels.Workspace), which may be the input
+# array itself. Against the float64 reference, with u = 2^-24:
+#   michaelis_menten: relative error <= 6u (about 3.6e-7)
+#   hill_response: absolute error <= u·(|top| + |bottom|)·(8 + 4h + h·|ln([I]/IC50)|)
+# That is under 2e-4 % activity for h = 1 across 10 logs of concentration.
+
+FLOAT32_ROUNDOFF = 2.0 ** -24
+
+MECHANISMS = ["Competitive Inhibition", "Non-competitive Inhibition",
+              "Uncompetitive Inhibition", "Mixed Inhibition"]
+
+
+def inhibitor_alpha(inhibitor_conc, ki):
+    # α = 1 + [I]/Ki
+    return 1 + (inhibitor_conc / ki) if ki > 0 else 1.0
+
+
+def apparent_parameters(mechanism, km, vmax, alpha, alpha_prime=None):
+    # Apparent (Km, Vmax) in the presence of inhibitor. alpha' only differs
+    # from alpha for mixed inhibition.
+    if alpha_prime is None:
+        alpha_prime = alpha
+
+    if mechanism == "Competitive Inhibition":
+        return km * alpha, vmax
+    elif mechanism == "Non-competitive Inhibition":
+        return km, vmax / alpha
+    elif mechanism == "Uncompetitive Inhibition":
+        return km / alpha, vmax / alpha
+    elif mechanism == "Mixed Inhibition":
+        return km * alpha / alpha_prime, vmax / alpha_prime
+    raise ValueError(f"Unknown inhibition mechanism: {mechanism}")
+
+
+def _output(values, dtype, out, *params):
+    # Input and parameters cast to the working dtype (the buffer's, if given),
+    # and the array to write into
+    dtype = np.dtype(dtype if dtype is not None else out.dtype if out is not None else np.float64)
+    values = np.asarray(values, dtype=dtype)
+    params = [np.asarray(p, dtype=dtype) for p in params]
+    if out is None:
+        out = np.empty(np.broadcast_shapes(values.shape, *(p.shape for p in params)), dtype=dtype)
+    return values, params, out
+
+
+def michaelis_menten(substrate, km, vmax, out=None, dtype=None):
+    # v = Vmax[S] / (Km + [S]); every mechanism is this law with apparent Km/Vmax
+    if out is None and dtype is None:
+        if kernels.use_elementwise_kernel(substrate, km, vmax):
+            return kernels.michaelis_menten(substrate, km, vmax)
+        return vmax * substrate / (km + substrate)
+    substrate, (km, vmax), out = _output(substrate, dtype, out, km, vmax)
+    if kernels.use_elementwise_kernel(substrate, km, vmax) and out.flags.c_contiguous:
+        return kernels.michaelis_menten(substrate, km, vmax, out=out)
+    # In place as Vmax / (1 + Km/[S]), so out may be the substrate array
+    with np.errstate(divide="ignore"):
+        np.divide(km, substrate, out=out)
+    np.add(out, 1, out=out)
+    return np.divide(vmax, out, out=out)
+
+
+# Which complexes each mechanism's inhibitor binds: (free enzyme E, ES complex)
+INHIBITOR_BINDING = {
+    "Competitive Inhibition": (True, False),
+    "Non-competitive Inhibition": (True, True),
+    "Uncompetitive Inhibition": (False, True),
+    "Mixed Inhibition": (True, True),
+}
+
+
+def _binding_constants(mechanism, ki, ki_prime):
+    # (Ki for E, Ki' for ES), inf where the inhibitor does not bind; only mixed
+    # inhibition has a separate Ki' (α' = 1 + [I]/Ki')
+    if mechanism not in INHIBITOR_BINDING:
+        raise ValueError(f"Unknown inhibition mechanism: {mechanism}")
+    binds_e, binds_es = INHIBITOR_BINDING[mechanism]
+    if mechanism == "Mixed Inhibition" and ki_prime is None:
+        raise ValueError("Mixed inhibition needs ki_prime")
+    if mechanism != "Mixed Inhibition":
+        ki_prime = ki
+    return np.where(binds_e, ki, np.inf), np.where(binds_es, ki_prime, np.inf)
+
+
+def fractional_inhibition(mechanism, inhibitor_conc, substrate_conc, km, ki, ki_prime=None):
+    # 1 - v_i/v_0 at [S]. For every mechanism v_0/v_i = (Km·α + [S]·α') / (Km + [S])
+    # with α = 1 + [I]/Ki on E and α' = 1 + [I]/Ki' on ES (α = 1 or α' = 1 where
+    # the inhibitor does not bind there). Broadcasts over all arguments.
+    ki_e, ki_es = _binding_constants(mechanism, ki, ki_prime)
+    ratio = (km * (1 + inhibitor_conc / ki_e) + substrate_conc * (1 + inhibitor_conc / ki_es)) / (km + substrate_conc)
+    return 1 - 1 / ratio
+
+
+def target_occupancy(mechanism, inhibitor_conc, substrate_conc, km, ki, ki_prime=None):
+    # Fraction of enzyme with inhibitor bound, (EI + ESI) / E_total, at
+    # equilibrium: with s = [S]/Km, E : ES : EI : ESI = 1 : s : [I]/Ki : s·[I]/Ki'.
+    # Competitive gives [I] / ([I] + Ki·(1 + s)), non-competitive [I] / ([I] + Ki).
+    # Broadcasts over all arguments.
+    ki_e, ki_es = _binding_constants(mechanism, ki, ki_prime)
+    s = substrate_conc / km
+    bound = inhibitor_conc / ki_e + s * inhibitor_conc / ki_es
+    return bound / (1 + s + bound)
+
+
+def inhibitor_for_inhibition(mechanism, inhibition, substrate_conc, km, ki, ki_prime=None):
+    # The [I] that gives fractional inhibition (0 to 1) at [S], in Ki's units;
+    # the inverse of fractional_inhibition. v_0/v_i - 1 = f/(1 - f) is linear in
+    # [I], so [I] = f/(1 - f) · (Km + [S]) / (Km/Ki + [S]/Ki') in closed form for
+    # every mechanism. inf where f >= 1, NaN where f < 0. Broadcasts, so whole
+    # grids of Ki and [S] solve in one call.
+    ki_e, ki_es = _binding_constants(mechanism, ki, ki_prime)
+    inhibition = np.asarray(inhibition, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        odds = np.where(inhibition < 1, inhibition / (1 - inhibition), np.inf)
+        odds = np.where(inhibition < 0, np.nan, odds)
+        return odds * (km + substrate_conc) / (km / ki_e + substrate_conc / ki_es)
+
+
+def hill_response(conc, top, bottom, ic50, hill_slope=1.0, out=None, dtype=None):
+    # y = Bottom + (Top - Bottom) / (1 + ([I]/IC50)^h)
+    if out is None and dtype is None:
+        return bottom + (top - bottom) / (1 + (conc / ic50)**hill_slope)
+    conc, (top, bottom, ic50, hill_slope), out = _output(conc, dtype, out, top, bottom, ic50, hill_slope)
+    np.divide(conc, ic50, out=out)
+    np.power(out, hill_slope, out=out)
+    np.add(out, 1, out=out)
+    np.divide(top - bottom, out, out=out)
+    return np.add(out, bottom, out=out)
+
+
+SWEEP_CHUNK_ELEMENTS = 1 << 22  # values per chunk of a binned sweep (16 MB in float32)
+
+
+def hill_sweep(conc, ic50, hill_slope, top, bottom, bins=None, dtype=np.float32,
+               chunk_elements=SWEEP_CHUNK_ELEMENTS):
+    # hill_response over the grid IC50 × Hill slope × concentration, shaped
+    # (n_ic50, n_hill, n_conc), in one broadcast call into the result.
+    # bins=(ic50_bins, conc_bins) averages the grid down to that many bins per
+    # axis instead (e.g. for display). The fine grid is then evaluated a chunk
+    # of IC50 rows at a time in a reused workspace buffer, so memory stays near
+    # chunk_elements however large the grid is (a chunk holds at least one bin).
+    conc, ic50, hill_slope = (np.asarray(a, dtype=float).ravel() for a in (conc, ic50, hill_slope))
+    if bins is None:
+        out = np.empty((ic50.size, hill_slope.size, conc.size), dtype=dtype)
+        return hill_response(conc, top, bottom, ic50[:, None, None], hill_slope[None, :, None], out=out)
+
+    row_edges = np.linspace(0, ic50.size, min(bins[0], ic50.size) + 1).astype(int)
+    col_edges = np.linspace(0, conc.size, min(bins[1], conc.size) + 1).astype(int)
+    out = np.empty((len(row_edges) - 1, hill_slope.size, len(col_edges) - 1), dtype=dtype)
+    counts = np.diff(row_edges)[:, None, None] * np.diff(col_edges)[None, None, :]
+    rows_per_chunk = max(1, chunk_elements // (hill_slope.size * conc.size))
+    work = kernels.workspace()
+    first = 0
+    while first < len(row_edges) - 1:
+        last = first + 1
+        while last < len(row_edges) - 1 and row_edges[last + 1] - row_edges[first] <= rows_per_chunk:
+            last += 1
+        start, stop = row_edges[first], row_edges[last]
+        block = work.take("hill_sweep", (stop - start, hill_slope.size, conc.size), dtype)
+        hill_response(conc, top, bottom, ic50[start:stop, None, None], hill_slope[None, :, None], out=block)
+        sums = np.add.reduceat(block, col_edges[:-1], axis=2, dtype=np.float64)
+        sums = np.add.reduceat(sums, row_edges[first:last] - start, axis=0)
+        out[first:last] = sums / counts[first:last]
+        first = last
+    return out
+
+
+def interpolate_ic50(concentrations, activities):
+    # IC50 by linear interpolation at 50% activity. Returns (ic50, conc_sorted,
+    # act_sorted); ic50 is None when the data never crosses 50%.
+    conc_array = np.asarray(concentrations, dtype=float)
+    act_array = np.asarray(activities, dtype=float)
+
+    sorted_indices = np.argsort(conc_array)
+    conc_sorted = conc_array[sorted_indices]
+    act_sorted = act_array[sorted_indices]
+
+    if len(act_sorted) > 1 and act_sorted.max() > 50 and act_sorted.min() < 50:
+        # Check if activities decrease with concentration (typical inhibition)
+        if act_sorted[0] > act_sorted[-1]:
+            # Activities decrease: reverse for interpolation
+            ic50 = np.interp(50, act_sorted[::-1], conc_sorted[::-1])
+        else:
+            # Activities increase: interpolate directly
+            ic50 = np.interp(50, act_sorted, conc_sorted)
+        return float(ic50), conc_sorted, act_sorted
+    return None, conc_sorted, act_sorted
+
+
+def hill_slope_estimate(concentrations, activities):
+    # Hill slope from the linearized Hill equation, log((100 - y)/y) = h·log[I] - h·log IC50,
+    # using the points between 5% and 95% activity. NaN with fewer than two usable points.
+    conc = np.asarray(concentrations, dtype=float)
+    act = np.asarray(activities, dtype=float)
+    usable = (conc > 0) & (act > 5) & (act < 95)
+    if np.unique(conc[usable]).size < 2:
+        return float("nan")
+    x = np.log10(conc[usable])
+    y = np.log10((100 - act[usable]) / act[usable])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def cheng_prusoff_ki(inhibition_type, ic50, substrate_conc, km):
+    # Cheng-Prusoff conversion of IC50 to Ki (all inputs in the same units)
+    if inhibition_type == "Competitive":
+        return ic50 / (1 + substrate_conc / km)
+    elif inhibition_type == "Non-competitive":
+        return ic50
+    elif inhibition_type == "Uncompetitive":
+        return ic50 / (1 + km / substrate_conc)
+    raise ValueError(f"Unknown inhibition type: {inhibition_type}")
@@ -0,0 +1,154 @@
+# Pharmacokinetics linked to target occupancy (PK/PD Simulator tab).
+# Linear one- and two-compartment models, given as an IV bolus or orally with
+# first-order absorption. A single dose then gives a sum of exponentials,
+# C(t) = D · Σ c_e·exp(-λ_e·t), and n doses every τ hours superpose in closed
+# form: with m the doses given so far and t' the time since the last one,
+#   C(t) = D · Σ c_e·exp(-λ_e·t') · (1 - r_e^m) / (1 - r_e),  r_e = exp(-λ_e·τ)
+# (1 / (1 - r_e) at steady state). Virtual patients draw CL, V, Q, V2 and ka
+# from log-normal distributions, so every patient has its own exponentials and
+# whole populations evaluate as arrays. Free plasma concentration drives
+# kinetics.target_occupancy; with rapid-equilibrium binding and inactive EI/ESI
+# complexes, the fraction inhibited (kinetics.fractional_inhibition) is the
+# fraction occupied, for every mechanism. Nothing here depends on Streamlit.
+import numpy as np
+import pandas as pd
+
+from kinetics import inhibitor_for_inhibition, target_occupancy
+
+PK_MODELS = ("1-compartment", "2-compartment")
+PK_ROUTES = ("Oral", "IV bolus")
+# Typical values: CL, Q (L/h), V1, V2 (L), ka (1/h), F (bioavailability)
+TYPICAL_PK = {"cl": 5.0, "v1": 50.0, "q": 10.0, "v2": 100.0, "ka": 1.0, "f": 0.8}
+# Between-patient variability as coefficients of variation (log-normal)
+PK_VARIABILITY = {"cl": 0.3, "v1": 0.2, "q": 0.3, "v2": 0.2, "ka": 0.4}
+INTERVAL_POINTS = 48  # steady-state samples per dosing interval
+PERCENTILES = (5, 50, 95)
+
+
+def virtual_patients(n, typical=TYPICAL_PK, variability=PK_VARIABILITY, seed=0):
+    # Dict of (n,) parameter arrays, log-normal around the typical values
+    rng = np.random.default_rng(seed)
+    patients = {}
+    for name, value in typical.items():
+        cv = variability.get(name, 0.0)
+        patients[name] = value * np.exp(rng.normal(0, np.sqrt(np.log1p(cv**2)), n))
+    return patients
+
+
+def unit_dose_exponentials(patients, model="1-compartment", route="Oral"):
+    # (coefficients, rates), each (patients, terms): the concentration (mg/L)
+    # after a 1 mg dose is Σ coefficients·exp(-rates·t), t in hours
+    if model not in PK_MODELS:
+        raise ValueError(f"Unknown PK model: {model}")
+    if route not in PK_ROUTES:
+        raise ValueError(f"Unknown route: {route}")
+    v1 = patients["v1"]
+    k10 = patients["cl"] / v1
+    if model == "1-compartment":
+        rates, weights = k10[:, None], np.ones((len(v1), 1)) / v1[:, None]
+    else:
+        # Macro rate constants α > β: roots of λ² - (k10 + k12 + k21)λ + k10·k21
+        k12, k21 = patients["q"] / v1, patients["q"] / patients["v2"]
+        total = k10 + k12 + k21
+        root = np.sqrt(total**2 - 4 * k10 * k21)
+        alpha, beta = (total + root) / 2, (total - root) / 2
+        rates = np.stack([alpha, beta], axis=1)
+        weights = np.stack([(alpha - k21) / (alpha - beta), (k21 - beta) / (alpha - beta)], axis=1) / v1[:, None]
+    if route == "IV bolus":
+        return weights, rates
+
+    # First-order absorption convolves each term with ka·exp(-ka·t): every
+    # exponential gains ka/(ka - λ) and a matching exp(-ka·t) term cancels it at t = 0.
+    # ka is nudged off any λ it coincides with.
+    ka = patients["ka"][:, None]
+    ka = np.where(np.isclose(ka, rates, rtol=1e-6), ka * (1 + 1e-4), ka)
+    scaled = patients["f"][:, None] * weights * ka / (ka - rates)
+    coefficients = np.concatenate([scaled, -scaled.sum(axis=1, keepdims=True)], axis=1)
+    return coefficients, np.concatenate([rates, ka[:, :1]], axis=1)
+
+
+def repeated_dose_concentration(coefficients, rates, dose, interval, times, n_doses=None):
+    # Concentration (mg/L), (patients, times), at times (hours) for dose mg
+    # every interval hours from t = 0; n_doses=None is steady state, with times
+    # then measured from the last dose
+    times = np.asarray(times, dtype=float)
+    log_ratio = (-rates * interval)[:, None, :]
+    if n_doses is None:
+        since = times
+        accumulation = 1 / -np.expm1(log_ratio)
+    else:
+        given = np.minimum(np.floor(times / interval) + 1, n_doses)
+        since = times - (given - 1) * interval
+        accumulation = np.expm1(log_ratio * given[:, None]) / np.expm1(log_ratio)
+    decay = np.exp(-rates[:, None, :] * since[:, None])
+    # Absorption terms cancel at the moment of dosing; clip the rounding
+    return np.maximum(dose * np.einsum("pte,pe->pt", decay * accumulation, coefficients), 0)
+
+
+def free_micromolar(concentration, molecular_weight, fraction_unbound):
+    # mg/L total -> µM unbound
+    return concentration * fraction_unbound * 1000 / molecular_weight
+
+
+def regimen_grid(doses, intervals):
+    # Every dose (mg) × interval (h) combination
+    dose, interval = np.meshgrid(np.asarray(doses, dtype=float), np.asarray(intervals, dtype=float), indexing="ij")
+    return pd.DataFrame({"dose_mg": dose.ravel(), "interval_h": interval.ravel()})
+
+
+def steady_state_summary(regimens, patients, mechanism, ki, substrate_ratio=1.0, target=0.9,
+                         model="1-compartment", route="Oral", molecular_weight=400.0, fraction_unbound=0.1,
+                         ki_prime=None):
+    # One row per regimen, over the population at steady state: median trough
+    # and peak (free µM), median trough and mean occupancy, median time above
+    # the target occupancy, and the share of patients whose trough occupancy
+    # reaches the target. Ki in µM; the substrate enters as [S]/Km. Regimens
+    # sharing an interval share one unit profile, and all their doses and
+    # patients are evaluated together.
+    coefficients, rates = unit_dose_exponentials(patients, model, route)
+    regimens = regimens.reset_index(drop=True)
+    # Occupancy rises with concentration, so "above target" is a concentration threshold
+    threshold = inhibitor_for_inhibition(mechanism, target, substrate_ratio, 1.0, ki, ki_prime)
+    columns = {name: np.empty(len(regimens)) for name in (
+        "trough_uM", "peak_uM", "trough_occupancy_pct", "mean_occupancy_pct", "time_above_target_pct",
+        "attainment_pct")}
+    for interval, group in regimens.groupby("interval_h", sort=False):
+        rows = group.index.to_numpy()
+        times = np.linspace(0, interval, INTERVAL_POINTS + 1)
+        unit = free_micromolar(repeated_dose_concentration(coefficients, rates, 1.0, interval, times),
+                               molecular_weight, fraction_unbound)
+        conc = group["dose_mg"].to_numpy(float)[:, None, None] * unit  # (doses, patients, times)
+        occupancy = target_occupancy(mechanism, conc, substrate_ratio, 1.0, ki, ki_prime)
+        trough = occupancy[..., -1]
+        columns["trough_uM"][rows] = np.median(conc[..., -1], axis=1)
+        columns["peak_uM"][rows] = np.median(conc.max(axis=-1), axis=1)
+        columns["trough_occupancy_pct"][rows] = 100 * np.median(trough, axis=1)
+        columns["mean_occupancy_pct"][rows] = 100 * np.median(_interval_mean(occupancy), axis=1)
+        columns["time_above_target_pct"][rows] = 100 * np.median(_interval_mean(conc >= threshold), axis=1)
+        columns["attainment_pct"][rows] = 100 * np.mean(trough >= target, axis=1)
+    summary = regimens.copy()
+    summary["daily_dose_mg"] = summary["dose_mg"] * 24 / summary["interval_h"]
+    for name, values in columns.items():
+        summary[name] = values
+    return summary
+
+
+def _interval_mean(values):
+    # Trapezoid average over evenly spaced samples (last axis), endpoints included
+    return (values.sum(axis=-1) - values[..., 0] / 2 - values[..., -1] / 2) / (values.shape[-1] - 1)
+
+
+def population_time_course(patients, dose, interval, n_doses, duration, mechanism, ki, substrate_ratio=1.0,
+                           model="1-compartment", route="Oral", molecular_weight=400.0, fraction_unbound=0.1,
+                           ki_prime=None, points=400):
+    # (times, concentration, occupancy) for one regimen over the population:
+    # free µM and occupancy (%) as PERCENTILES × times
+    coefficients, rates = unit_dose_exponentials(patients, model, route)
+    times = np.linspace(0, duration, points)
+    # Sample every dose time as well, so IV peaks are not missed
+    dose_times = interval * np.arange(n_doses)
+    times = np.unique(np.concatenate([times, dose_times[dose_times <= duration]]))
+    conc = free_micromolar(repeated_dose_concentration(coefficients, rates, dose, interval, times, n_doses),
+                           molecular_weight, fraction_unbound)
+    occupancy = 100 * target_occupancy(mechanism, conc, substrate_ratio, 1.0, ki, ki_prime)
+    return times, np.percentile(conc, PERCENTILES, axis=0), np.percentile(occupancy, PERCENTILES, axis=0)
@@ -0,0 +1,198 @@
+# Plate-reader ingestion for 96/384/1536-well screens. Raw signals come in as
+# stacked plate grids, the layout as a plate map (which wells are samples and
+# which are high/low controls). Normalization and QC work on the whole
+# (plates, rows, cols) array at once. Nothing here depends on Streamlit.
+import csv
+import io
+import re
+
+import numpy as np
+import pandas as pd
+
+PLATE_FORMATS = {96: (8, 12), 384: (16, 24), 1536: (32, 48)}
+
+SAMPLE, HIGH, LOW, EMPTY = "sample", "high", "low", "empty"
+# Accepted spellings in plate maps
+ROLE_ALIASES = {
+    "sample": SAMPLE, "compound": SAMPLE, "test": SAMPLE,
+    "high": HIGH, "max": HIGH, "neutral": HIGH, "dmso": HIGH, "pos": HIGH, "positive": HIGH,
+    "low": LOW, "min": LOW, "inhibitor": LOW, "neg": LOW, "negative": LOW, "background": LOW,
+    "empty": EMPTY, "blank": EMPTY, "": EMPTY,
+}
+
+Z_PRIME_PASS = 0.5  # conventional threshold for an excellent assay
+
+WELL_PATTERN = re.compile(r"^\s*([A-Za-z]{1,2})\s*0*(\d{1,2})\s*$")
+
+
+def row_label(index):
+    # 0 -> A ... 25 -> Z, 26 -> AA ... (1536-well plates go to AF)
+    return chr(65 + index) if index < 26 else "A" + chr(65 + index - 26)
+
+
+def row_index(label):
+    label = label.upper()
+    return ord(label) - 65 if len(label) == 1 else 26 + ord(label[1]) - 65
+
+
+def well_name(row, col):
+    return f"{row_label(row)}{col + 1}"
+
+
+def parse_well(well, plate_format):
+    rows, cols = PLATE_FORMATS[plate_format]
+    match = WELL_PATTERN.match(str(well))
+    if not match:
+        raise ValueError(f"Invalid well name: {well!r}")
+    row, col = row_index(match.group(1)), int(match.group(2)) - 1
+    if not (0 <= row < rows and 0 <= col < cols):
+        raise ValueError(f"Well {well} is outside a {plate_format}-well plate")
+    return row, col
+
+
+def _is_number(cell):
+    try:
+        float(cell)
+        return True
+    except ValueError:
+        return False
+
+
+def read_plate_grids(text, plate_format):
+    # Plate-reader exports: one grid per plate, optionally with a row of column
+    # numbers above it and row letters in the first column. Any line that isn't
+    # a full row of numbers (titles, blank lines, headers) separates plates.
+    # Returns signals with shape (plates, rows, cols).
+    rows, cols = PLATE_FORMATS[plate_format]
+    # Plate titles between grids confuse csv.Sniffer; the commonest separator wins
+    delimiter = max("\t,;", key=text.count)
+    column_header = [str(i) for i in range(1, cols + 1)]
+    plates, current = [], []
+    for line in csv.reader(io.StringIO(text), delimiter=delimiter):
+        cells = [c.strip() for c in line if c.strip() != ""]
+        if cells and not _is_number(cells[0]) and WELL_PATTERN.match(cells[0] + "1"):
+            cells = cells[1:]  # drop the row letter
+        if not current and cells == column_header:
+            continue
+        if len(cells) == cols and all(_is_number(c) for c in cells):
+            current.append([float(c) for c in cells])
+            if len(current) == rows:
+                plates.append(current)
+                current = []
+        elif current:
+            raise ValueError(f"Plate {len(plates) + 1} has {len(current)} rows; expected {rows}")
+    if current:
+        raise ValueError(f"Plate {len(plates) + 1} has {len(current)} rows; expected {rows}")
+    if not plates:
+        raise ValueError(f"No {rows}x{cols} plate grids found")
+    return np.array(plates, dtype=float)
+
+
+def read_plate_map(df, plate_format):
+    # Long-format plate map with columns well, role and (for samples) compound
+    # and concentration. An optional plate column (1-based, matching the order
+    # of the grids) gives each plate its own layout; without it one map is
+    # shared by all plates. Wells not listed are treated as empty. Returns
+    # (roles, compounds, concentrations), each shaped (plates, rows, cols) with
+    # a single plate for a shared map, which broadcasts against the signals.
+    rows, cols = PLATE_FORMATS[plate_format]
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    missing = [c for c in ("well", "role") if c not in df.columns]
+    if missing:
+        raise ValueError(f"Plate map is missing column(s): {', '.join(missing)}")
+
+    per_plate = "plate" in df.columns
+    if per_plate:
+        numbers = pd.to_numeric(df["plate"], errors="coerce")
+        invalid = numbers.isna() | (numbers < 1) | (numbers % 1 != 0)
+        if invalid.any():
+            raise ValueError(f"Invalid plate number {df['plate'][invalid].iloc[0]!r} in plate map")
+        plate_ids = numbers.to_numpy(dtype=int) - 1
+    else:
+        plate_ids = np.zeros(len(df), dtype=int)
+    n_plates = int(plate_ids.max()) + 1 if len(df) else 1
+
+    roles = np.full((n_plates, rows, cols), EMPTY, dtype=object)
+    compounds = np.full((n_plates, rows, cols), None, dtype=object)
+    concentrations = np.full((n_plates, rows, cols), np.nan)
+    for plate, record in zip(plate_ids, df.to_dict("records")):
+        row, col = parse_well(record["well"], plate_format)
+        role = ROLE_ALIASES.get(str(record["role"]).strip().lower() if pd.notna(record["role"]) else "")
+        if role is None:
+            raise ValueError(f"Unknown role {record['role']!r} for well {record['well']}")
+        roles[plate, row, col] = role
+        if role == SAMPLE:
+            if pd.isna(record.get("compound")) or pd.isna(record.get("concentration")):
+                raise ValueError(f"Sample well {record['well']} needs a compound and a concentration")
+            compounds[plate, row, col] = str(record["compound"])
+            concentrations[plate, row, col] = float(record["concentration"])
+
+    for plate in range(n_plates):
+        for role in (HIGH, LOW):
+            if not (roles[plate] == role).any():
+                where = f"Plate {plate + 1} in the plate map" if per_plate else "Plate map"
+                raise ValueError(f"{where} has no {role} control wells")
+    return roles, compounds, concentrations
+
+
+def _masked_stats(signals, mask):
+    # Mean and sample SD over the masked wells of every plate at once: (plates,)
+    values = np.where(mask, signals, np.nan)
+    return np.nanmean(values, axis=(1, 2)), np.nanstd(values, axis=(1, 2), ddof=1)
+
+
+def normalize_plates(signals, roles):
+    # Percent activity against each plate's own controls:
+    # 100 · (signal - mean(low)) / (mean(high) - mean(low))
+    high_mean, _ = _masked_stats(signals, roles == HIGH)
+    low_mean, _ = _masked_stats(signals, roles == LOW)
+    span = (high_mean - low_mean)[:, None, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 * (signals - low_mean[:, None, None]) / span
+
+
+def plate_qc(signals, roles):
+    # Z'-factor, signal-to-background and control CVs for every plate, from one
+    # masked reduction over a (2, plates, rows, cols) stack of both control sets
+    masks = np.stack([roles == HIGH, roles == LOW])
+    values = np.where(masks, signals[None], np.nan)
+    means = np.nanmean(values, axis=(2, 3))
+    sds = np.nanstd(values, axis=(2, 3), ddof=1)
+    (high_mean, low_mean), (high_sd, low_sd) = means, sds
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_prime = 1 - 3 * (high_sd + low_sd) / np.abs(high_mean - low_mean)
+        qc = pd.DataFrame({
+            "plate": np.arange(1, signals.shape[0] + 1),
+            "z_prime": z_prime,
+            "signal_to_background": high_mean / low_mean,
+            "cv_high_pct": 100 * high_sd / np.abs(high_mean),
+            "cv_low_pct": 100 * low_sd / np.abs(low_mean),
+            "high_mean": high_mean,
+            "low_mean": low_mean,
+        })
+    qc["pass"] = qc["z_prime"] >= Z_PRIME_PASS
+    return qc
+
+
+def plate_dose_response(signals, roles, compounds, concentrations, plates=None):
+    # Normalized sample wells as the long compound/concentration/activity table
+    # that the batch IC50 fit takes (jobs.group_dose_response). Replicates across
+    # wells and plates are kept as separate points.
+    activity = normalize_plates(signals, roles)
+    sample = np.broadcast_to(roles == SAMPLE, activity.shape)
+    compounds = np.broadcast_to(compounds, activity.shape)
+    concentrations = np.broadcast_to(concentrations, activity.shape)
+    plate_ids = np.arange(activity.shape[0])
+    if plates is not None:
+        plate_ids = np.asarray(plates)
+        activity, sample = activity[plate_ids], sample[plate_ids]
+        compounds, concentrations = compounds[plate_ids], concentrations[plate_ids]
+    index, rows, cols = np.nonzero(sample)
+    wells = np.array([[well_name(r, c) for c in range(sample.shape[2])] for r in range(sample.shape[1])])
+    return pd.DataFrame({
+        "plate": plate_ids[index] + 1,
+        "well": wells[rows, cols],
+        "compound": compounds[index, rows, cols].astype(str),
+        "concentration": concentrations[index, rows, cols],
+        "activity": activity[index, rows, cols],
+    })
@@ -0,0 +1,176 @@
+# Headless poster export: builds every section's figures without Streamlit,
+# writes them to PNG/SVG/PDF through kaleido in a process pool, and assembles a
+# print-resolution poster plus a one-figure-per-page PDF handout.
+#
+# Usage:
+#   python render_poster.py --out poster_build
+#   python render_poster.py --sections mechanisms calculator --formats png pdf --workers 8
+# Needs kaleido (pip install kaleido) and a Chrome install it can use.
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+from figures import POSTER_FIGURES, build_figure
+
+POSTER_TITLE = "Enzyme Inhibitors in Drug Development"
+SECTION_TITLES = {
+    "overview": "Overview",
+    "mechanisms": "Inhibition Mechanisms",
+    "case_studies": "Drug Case Studies",
+    "calculator": "IC50 & Ki Calculator",
+}
+
+# Paper sizes in mm (portrait)
+PAPER_SIZES = {"a0": (841, 1189), "a1": (594, 841), "a2": (420, 594), "a3": (297, 420)}
+
+FIGURE_WIDTH = 700  # px at scale 1, before --scale
+
+
+def start_kaleido():
+    # Keep one Chrome per worker process instead of one per image
+    try:
+        import kaleido
+        kaleido.start_sync_server(silence_warnings=True)
+    except (ImportError, AttributeError):
+        pass
+
+
+def export_figure(section, name, out_dir, formats, scale):
+    fig = build_figure(section, name)
+    height = fig.layout.height or 400
+    section_dir = os.path.join(out_dir, section)
+    os.makedirs(section_dir, exist_ok=True)
+
+    paths = {}
+    for fmt in formats:
+        path = os.path.join(section_dir, f"{name}.{fmt}")
+        # Vector formats don't need the raster scale factor
+        fig.write_image(path, format=fmt, width=FIGURE_WIDTH, height=height,
+                        scale=scale if fmt == "png" else 1)
+        paths[fmt] = path
+    return section, name, paths
+
+
+def export_all(sections, out_dir, formats, scale, workers):
+    tasks = [(section, name) for section in sections for name, _ in POSTER_FIGURES[section]]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=start_kaleido) as pool:
+        futures = [pool.submit(export_figure, section, name, out_dir, formats, scale)
+                   for section, name in tasks]
+        for future in futures:
+            section, name, paths = future.result()
+            results[(section, name)] = paths
+            print(f"  {section}/{name}: {', '.join(sorted(paths))}")
+    # Keep page order regardless of completion order
+    return [(section, name, results[(section, name)]) for section, name in tasks]
+
+
+def load_font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def layout_poster(section_images, width, margin, columns, header_height, draw=None, canvas=None, top=0):
+    # Lays the figures out section by section in a grid; returns the height used.
+    # Called once to measure and once (with a canvas) to paste.
+    cell_width = (width - margin * (columns + 1)) // columns
+    y = top
+    font = load_font(int(header_height * 0.6))
+    for section, images in section_images:
+        if draw is not None:
+            draw.text((margin, y), SECTION_TITLES.get(section, section), fill="#2E86AB", font=font)
+        y += header_height
+        for row_start in range(0, len(images), columns):
+            row = images[row_start:row_start + columns]
+            row_height = 0
+            for col, image in enumerate(row):
+                cell_height = round(image.height * cell_width / image.width)
+                if canvas is not None:
+                    resized = image.resize((cell_width, cell_height), Image.LANCZOS)
+                    canvas.paste(resized, (margin + col * (cell_width + margin), y))
+                row_height = max(row_height, cell_height)
+            y += row_height + margin
+    return y - top
+
+
+def assemble_poster(exported, out_dir, paper="a0", dpi=300, columns=3):
+    mm_width, mm_height = PAPER_SIZES[paper]
+    width, height = round(mm_width / 25.4 * dpi), round(mm_height / 25.4 * dpi)
+    margin = width // 60
+    title_height = width // 15
+
+    section_images = []
+    for section, name, paths in exported:
+        image = Image.open(paths["png"]).convert("RGB")
+        if section_images and section_images[-1][0] == section:
+            section_images[-1][1].append(image)
+        else:
+            section_images.append((section, [image]))
+
+    # Shrink the grid width if the figures would run off the bottom of the page
+    header_height = width // 40
+    content_width = width
+    # (section headers don't shrink with the grid, so repeat until it fits)
+    available = height - title_height - margin
+    needed = layout_poster(section_images, content_width, margin, columns, header_height)
+    while needed > available:
+        content_width = int(content_width * available / needed)
+        needed = layout_poster(section_images, content_width, margin, columns, header_height)
+
+    canvas = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(canvas)
+    draw.text((width // 2, title_height // 2), POSTER_TITLE, fill="#2E86AB",
+              font=load_font(title_height // 2), anchor="mm")
+    content = Image.new("RGB", (content_width, height - title_height), "white")
+    layout_poster(section_images, content_width, margin, columns, header_height,
+                  draw=ImageDraw.Draw(content), canvas=content)
+    canvas.paste(content, ((width - content_width) // 2, title_height))
+
+    poster_png = os.path.join(out_dir, f"poster_{paper}.png")
+    poster_pdf = os.path.join(out_dir, f"poster_{paper}.pdf")
+    canvas.save(poster_png, dpi=(dpi, dpi))
+    canvas.save(poster_pdf, "PDF", resolution=dpi)
+
+    # Handout: one figure per page
+    pages = [image for _, images in section_images for image in images]
+    handout_pdf = os.path.join(out_dir, "handout.pdf")
+    pages[0].save(handout_pdf, "PDF", resolution=dpi, save_all=True, append_images=pages[1:])
+    return poster_png, poster_pdf, handout_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the poster's figures and assemble a printable poster.")
+    parser.add_argument("--out", default="poster_build", help="Output directory")
+    parser.add_argument("--sections", nargs="+", choices=list(POSTER_FIGURES), default=list(POSTER_FIGURES),
+                        help="Sections to export (default: all)")
+    parser.add_argument("--formats", nargs="+", choices=["png", "svg", "pdf"], default=["png", "svg", "pdf"],
+                        help="Figure formats to write")
+    parser.add_argument("--scale", type=float, default=3.0, help="PNG scale factor (3 ≈ 300 dpi at poster size)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Export processes")
+    parser.add_argument("--paper", choices=list(PAPER_SIZES), default="a0", help="Poster paper size")
+    parser.add_argument("--dpi", type=int, default=300, help="Poster resolution")
+    parser.add_argument("--no-poster", action="store_true", help="Only export the individual figures")
+    args = parser.parse_args()
+
+    formats = list(args.formats)
+    if not args.no_poster and "png" not in formats:
+        formats.append("png")  # the poster is assembled from the PNGs
+
+    start = time.perf_counter()
+    os.makedirs(args.out, exist_ok=True)
+    print(f"Exporting {sum(len(POSTER_FIGURES[s]) for s in args.sections)} figures with {args.workers} workers")
+    exported = export_all(args.sections, args.out, formats, args.scale, args.workers)
+
+    if not args.no_poster:
+        for path in assemble_poster(exported, args.out, args.paper, args.dpi):
+            print(f"Wrote {path}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
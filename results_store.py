@@ -0,0 +1,303 @@
+# Indexed store behind the batch results browser. A finished batch is loaded
+# once into SQLite with indexes on the sortable/filterable columns, and the
+# browser only ever fetches one page of compounds (and the points for the
+# visible rows), so screening-scale results never reach the browser whole.
+# The store also tracks which compound each point belongs to: editing or
+# excluding a point marks only that compound stale, and its refit is patched
+# back in place, so the page, thumbnails and exports pick it up. Refits run in
+# the background: each edit bumps the compound's edit serial, and a refit only
+# lands if no newer edit has been made since it started.
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from fitting import CURVE_FLAGS
+
+SORT_COLUMNS = {"compound": "compound", "IC50": "ic50_uM", "Hill slope": "hill_slope", "Points": "n_points",
+                "Masked points": "n_masked"}
+
+SCHEMA = """
+CREATE TABLE compounds (
+    compound TEXT PRIMARY KEY,
+    ic50_uM REAL,
+    hill_slope REAL,
+    n_points INTEGER,
+    min_activity_pct REAL,
+    max_activity_pct REAL,
+    top_pct REAL,
+    bottom_pct REAL,
+    n_masked INTEGER,
+    curve_class TEXT,
+    efficacy_pct REAL,
+    r_squared REAL,
+    flag_extrapolated INTEGER,
+    flag_poor_fit INTEGER,
+    flag_low_efficacy INTEGER
+);
+CREATE TABLE points (
+    point_id INTEGER PRIMARY KEY,
+    compound TEXT NOT NULL,
+    concentration_uM REAL,
+    activity_pct REAL,
+    masked INTEGER,
+    excluded INTEGER DEFAULT 0
+);
+"""
+
+# Built after the bulk load, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX compounds_ic50 ON compounds (ic50_uM);
+CREATE INDEX compounds_hill ON compounds (hill_slope);
+CREATE INDEX compounds_class ON compounds (curve_class, ic50_uM);
+CREATE INDEX points_compound ON points (compound);
+"""
+
+# Store column <- batch result key (jobs.py), for loading and for patching refits
+RESULT_KEYS = {
+    "ic50_uM": "IC50_uM", "hill_slope": "hill_slope", "n_points": "n_points",
+    "min_activity_pct": "min_activity", "max_activity_pct": "max_activity", "top_pct": "top",
+    "bottom_pct": "bottom", "n_masked": "n_masked", "curve_class": "curve_class",
+    "efficacy_pct": "efficacy_pct", "r_squared": "r_squared", **{flag: flag for flag in CURVE_FLAGS},
+}
+INTEGER_COLUMNS = {"n_points", "n_masked", *CURVE_FLAGS}
+
+
+def _nullable(values):
+    # NaN -> NULL so that range filters and ORDER BY treat missing fits as missing
+    values = np.asarray(values, dtype=float)
+    return [None if v != v else v for v in values.tolist()]
+
+
+class ResultsStore:
+    def __init__(self, results_df, points=None):
+        # results_df: batch results (jobs.py column names); points: optional
+        # exports.points_table, or any object with compound/concentration_uM/activity_pct
+        # (and optionally masked) columns
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO compounds VALUES ({', '.join('?' * (len(RESULT_KEYS) + 1))})",
+            zip(results_df["compound"].astype(str).tolist(), *self._columns(results_df)))
+
+        if points is not None:
+            if hasattr(points, "to_pandas"):
+                points = points.to_pandas()
+            masked = points["masked"].astype(int).tolist() if "masked" in points else [0] * len(points)
+            self._conn.executemany(
+                "INSERT INTO points (compound, concentration_uM, activity_pct, masked) VALUES (?, ?, ?, ?)",
+                zip(points["compound"].astype(str).tolist(), points["concentration_uM"].astype(float).tolist(),
+                    points["activity_pct"].astype(float).tolist(), masked))
+        self._conn.executescript(INDEXES)
+        self._conn.commit()
+        self.has_points = points is not None
+        self.stale = set()
+        self.revisions = {}  # compound -> number of refits, for widget and cache keys
+        self.edits = {}  # compound -> number of edits
+        self.refitting = {}  # compound -> edit serial of the refit in flight
+        self.refit_error = None  # message of the last failed refit, until shown
+        self.refits = {}  # compound -> latest refit row (jobs.py column names), for exports
+
+    @staticmethod
+    def _columns(results):
+        # One list per RESULT_KEYS column, NaN as NULL
+        n = len(results)
+        columns = []
+        for column, key in RESULT_KEYS.items():
+            if key not in results:
+                columns.append([None] * n)
+            elif column in INTEGER_COLUMNS:
+                columns.append([None if v != v else int(v) for v in results[key].tolist()])
+            elif column == "curve_class":
+                columns.append(results[key].tolist())
+            else:
+                columns.append(_nullable(results[key]))
+        return columns
+
+    def _where(self, search=None, hill_range=None, ic50_range=None, fitted_only=False, classes=None, flags=()):
+        clauses, params = [], []
+        if search:
+            # Case-insensitive substring match on the compound ID
+            clauses.append("compound LIKE ? ESCAPE '\\'")
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if hill_range is not None:
+            clauses.append("hill_slope BETWEEN ? AND ?")
+            params += list(hill_range)
+        if ic50_range is not None:
+            clauses.append("ic50_uM BETWEEN ? AND ?")
+            params += list(ic50_range)
+        if fitted_only:
+            clauses.append("ic50_uM IS NOT NULL")
+        if classes is not None:
+            clauses.append(f"curve_class IN ({','.join('?' * len(classes))})" if classes else "0")
+            params += list(classes)
+        for flag in flags:
+            if flag not in CURVE_FLAGS:
+                raise ValueError(f"Unknown flag: {flag}")
+            clauses.append(f"{flag} = 1")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM compounds{where}", params).fetchone()[0]
+
+    def page(self, page=0, page_size=50, sort="IC50", descending=False, **filters):
+        # One page of compounds; missing values sort last either way
+        where, params = self._where(**filters)
+        column = SORT_COLUMNS[sort]
+        order = f"{column} IS NULL, {column} {'DESC' if descending else 'ASC'}, compound"
+        query = f"SELECT * FROM compounds{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=[*params, page_size, page * page_size])
+
+    def points_for(self, compounds):
+        if not compounds:
+            return pd.DataFrame(columns=["point_id", "compound", "concentration_uM", "activity_pct", "masked",
+                                         "excluded"])
+        placeholders = ",".join("?" * len(compounds))
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT * FROM points WHERE compound IN ({placeholders}) ORDER BY compound, concentration_uM, point_id",
+                self._conn, params=list(compounds))
+
+    def class_counts(self):
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT curve_class, COUNT(*) FROM compounds WHERE curve_class IS NOT NULL GROUP BY curve_class"))
+
+    def value_range(self, column):
+        with self._lock:
+            low, high = self._conn.execute(f"SELECT MIN({column}), MAX({column}) FROM compounds").fetchone()
+        return low, high
+
+    # Edits and incremental refits
+
+    def edit_points(self, edits):
+        # edits: {point_id: {"concentration_uM" | "activity_pct" | "excluded": value}}.
+        # Returns the compounds whose fits the edits invalidate, and marks them stale.
+        allowed = {"concentration_uM", "activity_pct", "excluded"}
+        affected = set()
+        with self._lock:
+            for point_id, changes in edits.items():
+                unknown = set(changes) - allowed
+                if unknown:
+                    raise ValueError(f"Points can't be edited in column(s): {', '.join(sorted(unknown))}")
+                assignments = ", ".join(f"{name} = ?" for name in changes)
+                self._conn.execute(f"UPDATE points SET {assignments} WHERE point_id = ?",
+                                   [*(int(v) if name == "excluded" else float(v) for name, v in changes.items()),
+                                    int(point_id)])
+                row = self._conn.execute("SELECT compound FROM points WHERE point_id = ?", (int(point_id),)).fetchone()
+                if row is not None:
+                    affected.add(row[0])
+            self._conn.commit()
+            self.stale |= affected
+            for compound in affected:
+                self.edits[compound] = self.edits.get(compound, 0) + 1
+        return affected
+
+    def refit_needed(self):
+        # Stale compounds with no refit in flight for their latest edit,
+        # including those whose last refit failed
+        with self._lock:
+            return sorted(c for c in self.stale if self.refitting.get(c) != self.edits.get(c))
+
+    def begin_refit(self, compounds):
+        # Marks refits of the compounds' current points as in flight; returns
+        # their edit serials for apply_fits or end_refit
+        with self._lock:
+            serials = {c: self.edits.get(c, 0) for c in compounds}
+            self.refitting.update(serials)
+        return serials
+
+    def end_refit(self, serials, error=None):
+        # A refit that failed: the compounds stay stale and are retried later
+        with self._lock:
+            for compound, serial in serials.items():
+                if self.refitting.get(compound) == serial:
+                    del self.refitting[compound]
+            if error is not None:
+                self.refit_error = error
+
+    def curves(self, compounds):
+        # Everything a refit needs: [(compound, concentrations, activities, excluded)]
+        # in load order, plus the previous (top, bottom, IC50, slope) per compound
+        # (NaN where unknown) to warm-start from, and each curve's point ids
+        placeholders = ",".join("?" * len(compounds))
+        with self._lock:
+            points = pd.read_sql_query(
+                f"SELECT point_id, compound, concentration_uM, activity_pct, excluded FROM points "
+                f"WHERE compound IN ({placeholders}) ORDER BY point_id", self._conn, params=list(compounds))
+            previous = pd.read_sql_query(
+                f"SELECT compound, top_pct, bottom_pct, ic50_uM, hill_slope FROM compounds "
+                f"WHERE compound IN ({placeholders})", self._conn, params=list(compounds)).set_index("compound")
+        by_compound = dict(tuple(points.groupby("compound", sort=False)))
+        curves, point_ids = [], []
+        for compound in compounds:
+            group = by_compound.get(compound, points.iloc[:0])
+            curves.append((compound, group["concentration_uM"].to_numpy(float), group["activity_pct"].to_numpy(float),
+                           group["excluded"].to_numpy(bool)))
+            point_ids.append(group["point_id"].to_numpy())
+        initial = previous.reindex(list(compounds)).to_numpy(float)
+        return curves, initial, point_ids
+
+    def apply_fits(self, rows, point_ids, serials=None):
+        # Patches refit rows (jobs.refit_curves) into the compounds table and their
+        # outlier flags into the points, then clears the compounds' stale marks.
+        # With serials (from begin_refit), rows for compounds edited again since
+        # are dropped; the newer refit brings those up to date.
+        rows = pd.DataFrame(rows)
+        assignments = ", ".join(f"{column} = ?" for column in RESULT_KEYS)
+        with self._lock:
+            if serials is not None:
+                current = [self.edits.get(c, 0) == serials.get(c) for c in rows["compound"]]
+                point_ids = [ids for ids, keep in zip(point_ids, current) if keep]
+                rows = rows[current]
+            self._conn.executemany(f"UPDATE compounds SET {assignments} WHERE compound = ?",
+                                   zip(*self._columns(rows), rows["compound"].tolist()))
+            for row, ids in zip(rows.to_dict("records"), point_ids):
+                masked = np.zeros(len(ids), dtype=int)
+                if isinstance(row.get("masked"), list):
+                    masked[row["masked"]] = 1
+                self._conn.executemany("UPDATE points SET masked = ? WHERE point_id = ?",
+                                       zip(masked.tolist(), ids.tolist()))
+            self._conn.commit()
+            for row in rows.to_dict("records"):
+                compound = row["compound"]
+                self.refits[compound] = row
+                self.stale.discard(compound)
+                self.revisions[compound] = self.revisions.get(compound, 0) + 1
+            if serials is not None:
+                for compound, serial in serials.items():
+                    if self.refitting.get(compound) == serial:
+                        del self.refitting[compound]
+
+    @property
+    def edited(self):
+        return bool(self.revisions)
+
+    # Current tables, for exports after edits
+
+    def patch_results(self, results_df):
+        # The batch results with each refitted compound's row replaced by its
+        # latest refit, in results_df's own columns and order, so exports look
+        # the same whether or not points were edited
+        with self._lock:
+            refits = list(self.refits.values())
+        if not refits:
+            return results_df
+        fresh = pd.DataFrame(refits).reindex(columns=results_df.columns)
+        position = pd.Index(results_df["compound"].astype(str)).get_indexer(fresh["compound"].astype(str))
+        fresh = fresh[position >= 0]
+        fresh.index = results_df.index[position[position >= 0]]
+        return pd.concat([results_df.drop(index=fresh.index), fresh]).loc[results_df.index]
+
+    def points_frame(self):
+        with self._lock:
+            frame = pd.read_sql_query("SELECT compound, concentration_uM, activity_pct, masked, excluded "
+                                      "FROM points ORDER BY point_id", self._conn)
+        return frame.astype({"masked": bool, "excluded": bool})
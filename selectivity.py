@@ -0,0 +1,209 @@
+# Kinome-scale selectivity of inhibitor panels (Kinase Inhibitors case study).
+# A panel is a compounds × kinases matrix of potency (IC50, Ki or Kd in nM;
+# NaN where a pair was not tested), built from long-format rows. Every score
+# is computed for all compounds at once from the whole matrix:
+#   - S(x): fraction of tested kinases hit below x nM (Karaman et al., 2008)
+#   - Gini coefficient of the affinities 1/potency: 0 hits everything equally,
+#     towards 1 hits one kinase (Graczyk, 2007)
+#   - selectivity entropy of the affinities: low is selective
+#     (Uitdehaag & Zaman, 2011)
+#   - primary kinase and the window (log units) to the next-best one
+# Profiles are clustered by k-means on the pattern of pIC50 above the floor
+# (both compounds and kinases), and each axis is ordered along its leading
+# principal component so similar profiles sit together in the heatmap.
+# Nothing here depends on Streamlit.
+import numpy as np
+import pandas as pd
+
+PANEL_COLUMNS = ("compound", "kinase", "potency_nm")
+SELECTIVITY_THRESHOLDS = {"s_100nM": 100.0, "s_1uM": 1000.0, "s_3uM": 3000.0}
+PIC50_FLOOR = 5.0  # untested and weaker than 10 µM count as inactive when clustering
+KMEANS_ITERATIONS = 50
+POWER_ITERATIONS = 30
+KINASE_GROUPS = ("TK", "TKL", "STE", "CK1", "AGC", "CAMK", "CMGC", "Other")
+
+
+def read_panel(df):
+    # Long-format rows (compound, kinase, potency_nm) -> (compounds, kinases,
+    # potency (compounds, kinases)); replicates are averaged geometrically and
+    # non-positive potencies dropped
+    missing = [c for c in PANEL_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Panel data is missing columns: {', '.join(missing)}")
+    df = df.dropna(subset=list(PANEL_COLUMNS))
+    df = df[df["potency_nm"].astype(float) > 0]
+    if df.empty:
+        raise ValueError("No positive potencies to analyse")
+    row, compounds = pd.factorize(df["compound"].astype(str), sort=False)
+    col, kinases = pd.factorize(df["kinase"].astype(str), sort=True)
+    flat = row * len(kinases) + col
+    size = len(compounds) * len(kinases)
+    counts = np.bincount(flat, minlength=size)
+    sums = np.bincount(flat, weights=np.log10(df["potency_nm"].to_numpy(float)), minlength=size)
+    with np.errstate(invalid="ignore"):
+        potency = 10 ** (sums / counts)
+    return list(compounds), list(kinases), potency.reshape(len(compounds), len(kinases))
+
+
+def selectivity_scores(potency, thresholds=SELECTIVITY_THRESHOLDS):
+    # Per-compound scores (a dict of (compounds,) arrays) from the potency
+    # matrix; NaN entries are untested and left out of every score
+    tested = np.isfinite(potency)
+    n_tested = tested.sum(axis=1)
+    scores = {"kinases_tested": n_tested}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, threshold in thresholds.items():
+            scores[name] = (potency < threshold).sum(axis=1) / n_tested
+
+        # Gini of the affinities sorted ascending; np.sort puts the untested
+        # (NaN) last, so the tested ones keep ranks 1..n
+        affinity = np.sort(1 / potency, axis=1)
+        filled = np.nan_to_num(affinity)
+        total = filled.sum(axis=1)
+        ranks = np.arange(1, potency.shape[1] + 1)
+        scores["gini"] = 2 * (filled @ ranks) / (n_tested * total) - (n_tested + 1) / n_tested
+
+        share = filled / total[:, None]
+        scores["entropy"] = -np.sum(np.where(share > 0, share * np.log(share), 0.0), axis=1)
+
+        # The two most potent kinases per compound
+        ranked = np.where(tested, potency, np.inf)
+        best = np.argmin(ranked, axis=1)
+        two = np.partition(np.c_[ranked, np.full(len(ranked), np.inf)], 1, axis=1)[:, :2]
+        scores["primary_index"] = np.where(n_tested > 0, best, -1)
+        scores["primary_nM"] = np.where(n_tested > 0, two[:, 0], np.nan)
+        scores["window_log"] = np.where(n_tested > 1, np.log10(two[:, 1] / two[:, 0]), np.nan)
+    return scores
+
+
+def pic50_profiles(potency):
+    # pIC50 = 9 - log10(potency in nM), floored at PIC50_FLOOR (untested too)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profiles = 9 - np.log10(potency)
+    return np.maximum(np.nan_to_num(profiles, nan=PIC50_FLOOR), PIC50_FLOOR)
+
+
+def activity_directions(profiles):
+    # Rows of pIC50 above the floor scaled to unit length, so k-means groups
+    # profiles by which kinases they hit rather than by overall potency (a
+    # selective compound otherwise sits with the inactive ones); inactive rows
+    # stay zero
+    x = profiles - PIC50_FLOOR
+    norm = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norm > 0, norm, 1)
+
+
+def kmeans(x, k, seed=0, iterations=KMEANS_ITERATIONS):
+    # Lloyd's algorithm with k-means++ seeding: (labels (n,), centers (k, d)).
+    # Distances come from one matrix product per iteration,
+    # |x - c|² = |x|² - 2x·c + |c|², and the new centers from another.
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    sq = np.einsum("ij,ij->i", x, x)
+    centers = [x[rng.integers(len(x))]]
+    nearest = sq - 2 * x @ centers[0] + centers[0] @ centers[0]
+    for _ in range(1, k):
+        weights = np.maximum(nearest, 0)
+        pick = rng.choice(len(x), p=weights / weights.sum()) if weights.sum() > 0 else rng.integers(len(x))
+        centers.append(x[pick])
+        nearest = np.minimum(nearest, sq - 2 * x @ x[pick] + x[pick] @ x[pick])
+    centers = np.array(centers)
+
+    labels = np.full(len(x), -1)
+    for _ in range(iterations):
+        distance = sq[:, None] - 2 * x @ centers.T + np.einsum("ij,ij->i", centers, centers)
+        new_labels = np.argmin(distance, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        members = np.arange(k)[:, None] == labels  # (k, n) one-hot
+        counts = members.sum(axis=1)
+        # Empty clusters keep their previous center
+        centers = np.where(counts[:, None] > 0, (members @ x) / np.maximum(counts, 1)[:, None], centers)
+    return labels, centers
+
+
+def leading_component(x, seed=0, iterations=POWER_ITERATIONS):
+    # Projection of the centred rows on their first principal axis, by power
+    # iteration on XᵀX (no full SVD)
+    centred = x - x.mean(axis=0)
+    v = np.random.default_rng(seed).normal(size=x.shape[1])
+    for _ in range(iterations):
+        v = centred.T @ (centred @ v)
+        norm = np.linalg.norm(v)
+        if norm == 0:
+            break
+        v /= norm
+    return centred @ v
+
+
+def cluster_order(x, k, seed=0):
+    # (labels, order) for the rows of x: k-means clusters numbered and laid out
+    # along the leading principal component, rows within a cluster likewise
+    labels, _ = kmeans(x, k, seed)
+    projection = leading_component(x, seed)
+    position = np.bincount(labels, weights=projection, minlength=labels.max() + 1)
+    position /= np.maximum(np.bincount(labels, minlength=labels.max() + 1), 1)
+    rank = np.argsort(np.argsort(position))
+    labels = rank[labels]
+    return labels, np.lexsort((projection, labels))
+
+
+def block_means(values, bins):
+    # (row_edges, col_edges, means): values averaged down to at most bins =
+    # (rows, columns) blocks, as for the dose-response sweep
+    row_edges = np.linspace(0, values.shape[0], min(bins[0], values.shape[0]) + 1).astype(int)
+    col_edges = np.linspace(0, values.shape[1], min(bins[1], values.shape[1]) + 1).astype(int)
+    sums = np.add.reduceat(np.add.reduceat(values, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+    return row_edges, col_edges, sums / np.outer(np.diff(row_edges), np.diff(col_edges))
+
+
+def analyze_panel(compounds, kinases, potency, compound_clusters=10, kinase_clusters=8, seed=0):
+    # (table, ordered): one table row per compound (scores, primary kinase,
+    # cluster, heatmap position), and the pIC50 matrix ("profiles") with rows
+    # and columns in clustered order, with the names and cluster numbers in
+    # the same order
+    scores = selectivity_scores(potency)
+    profiles = pic50_profiles(potency)
+    row_labels, row_order = cluster_order(activity_directions(profiles), compound_clusters, seed)
+    col_labels, col_order = cluster_order(activity_directions(profiles.T), kinase_clusters, seed)
+
+    primary = scores.pop("primary_index")
+    kinase_names = np.asarray(kinases, dtype=object)
+    table = pd.DataFrame({"compound": compounds, "cluster": row_labels + 1})
+    table["primary_kinase"] = np.where(primary >= 0, kinase_names[np.maximum(primary, 0)], None)
+    for name, values in scores.items():
+        table[name] = values
+    table["heatmap_row"] = np.argsort(row_order) + 1
+    ordered = {
+        "profiles": profiles[np.ix_(row_order, col_order)],
+        "compounds": [compounds[i] for i in row_order],
+        "kinases": [kinases[j] for j in col_order],
+        "compound_clusters": row_labels[row_order] + 1,
+        "kinase_clusters": col_labels[col_order] + 1,
+    }
+    return table, ordered
+
+
+def example_panel(n_compounds=1000, n_kinases=300, coverage=0.95, seed=0):
+    # A synthetic panel in the long format read_panel takes. Kinases sit near
+    # their group's center in a small latent space; each compound hits one
+    # target kinase and falls off with latent distance, more steeply the more
+    # selective it is. Pairs weaker than 10 µM are reported at 10 µM, and a
+    # 1 - coverage fraction of pairs is left untested.
+    rng = np.random.default_rng(seed)
+    group = rng.integers(len(KINASE_GROUPS), size=n_kinases)
+    group_centers = rng.normal(0, 2.0, (len(KINASE_GROUPS), 4))
+    embedding = group_centers[group] + rng.normal(0, 0.8, (n_kinases, 4))
+    kinases = np.array([f"{KINASE_GROUPS[g]}-{j + 1:03d}" for j, g in enumerate(group)], dtype=object)
+
+    target = rng.integers(n_kinases, size=n_compounds)
+    top = rng.uniform(6.5, 9.5, n_compounds)
+    steepness = np.exp(rng.normal(0.3, 0.5, n_compounds))
+    distance = np.linalg.norm(embedding[target][:, None, :] - embedding[None, :, :], axis=-1)
+    pic50 = top[:, None] - steepness[:, None] * distance + rng.normal(0, 0.3, distance.shape)
+    potency = 10 ** (9 - np.maximum(pic50, PIC50_FLOOR))
+
+    row, col = np.nonzero(rng.random(potency.shape) < coverage)
+    compounds = np.array([f"CPD-{i + 1:05d}" for i in range(n_compounds)], dtype=object)
+    return pd.DataFrame({"compound": compounds[row], "kinase": kinases[col], "potency_nm": potency[row, col]})
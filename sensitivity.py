@@ -0,0 +1,163 @@
+# Global sensitivity of the apparent kinetic parameters (Mechanisms section).
+# Km, Vmax, [I], Ki and α' are drawn from Sobol quasi-random sequences over the
+# simulator's slider ranges (Saltelli sampling), the model is evaluated once on
+# every sample as whole arrays, and first-order and total Sobol indices come
+# from the Saltelli (2010) and Jansen estimators, with bootstrap confidence
+# intervals. Nothing here depends on Streamlit.
+import numpy as np
+import pandas as pd
+
+from kinetics import MECHANISMS, apparent_parameters, michaelis_menten
+
+# Parameter ranges, as on the Kinetic Effects sliders
+SENSITIVITY_INPUTS = {
+    "Km": (0.1, 10.0),
+    "Vmax": (1.0, 100.0),
+    "[I]": (0.0, 10.0),
+    "Ki": (0.5, 5.0),
+    "α'": (1.0, 10.0),
+}
+SENSITIVITY_OUTPUTS = ("Apparent Km", "Apparent Vmax", "Velocity")
+BASE_SAMPLES = 2**17  # × (inputs + 2) model evaluations, about 10^6
+BOOTSTRAP_ROUNDS = 100
+BOOTSTRAP_BLOCK = 10
+CONFIDENCE = 0.95
+
+# Sobol direction numbers (Joe & Kuo, new-joe-kuo-6.21201) for dimensions 2-13
+# as (degree s, coefficient a, initial m_1..m_s); dimension 1 is the van der
+# Corput sequence. Saltelli sampling needs twice as many dimensions as inputs.
+SOBOL_DIRECTIONS = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+]
+SOBOL_BITS = 32
+
+
+def _direction_numbers(dims):
+    # V[d, k] = v_{k+1} << (32 - k - 1), from the recurrence
+    # v_k = v_{k-s} ^ (v_{k-s} >> s) ^ XOR_j a_j v_{k-j}
+    directions = np.empty((dims, SOBOL_BITS), dtype=np.uint64)
+    directions[0] = [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+    for d, (s, a, m) in enumerate(SOBOL_DIRECTIONS[:dims - 1], start=1):
+        v = [m_k << (SOBOL_BITS - 1 - k) for k, m_k in enumerate(m)]
+        for k in range(s, SOBOL_BITS):
+            x = v[k - s] ^ (v[k - s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    x ^= v[k - j]
+            v.append(x)
+        directions[d] = v
+    return directions
+
+
+def sobol_sequence(n, dims, seed=None):
+    # First n points (rows) of the dims-dimensional Sobol sequence in [0, 1),
+    # in Gray-code order, randomized by a digital shift when seed is given.
+    # Built bit by bit over all points at once: point i is the XOR of the
+    # direction numbers selected by the bits of gray(i).
+    if dims > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol sequences are available for up to {len(SOBOL_DIRECTIONS) + 1} dimensions")
+    directions = _direction_numbers(dims)
+    index = np.arange(n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    points = np.zeros((n, dims), dtype=np.uint64)
+    for k in range(max(int(n - 1).bit_length(), 1)):
+        bit = (gray >> np.uint64(k)) & np.uint64(1)
+        points ^= bit[:, None] * directions[:, k]
+    if seed is not None:
+        shift = np.random.default_rng(seed).integers(0, 2**SOBOL_BITS, dims, dtype=np.uint64)
+        points ^= shift
+    return points / 2.0**SOBOL_BITS
+
+
+def saltelli_samples(n_base, seed=0):
+    # (A, B, AB): base matrices A and B (n_base × inputs) from one Sobol
+    # sequence of twice the dimension, and AB[i] = A with column i from B,
+    # scaled to the input ranges
+    low, high = np.array(list(SENSITIVITY_INPUTS.values())).T
+    unit = sobol_sequence(n_base, 2 * len(low), seed)
+    a = low + unit[:, :len(low)] * (high - low)
+    b = low + unit[:, len(low):] * (high - low)
+    ab = np.repeat(a[None], len(low), axis=0)
+    for i in range(len(low)):
+        ab[i, :, i] = b[:, i]
+    return a, b, ab
+
+
+def kinetic_outputs(mechanism, samples, substrate):
+    # (apparent Km, apparent Vmax, velocity at [S]) for every sample row;
+    # α' only acts for mixed inhibition, elsewhere α' = α
+    km, vmax, inhibitor, ki, alpha_prime = np.moveaxis(samples, -1, 0)
+    alpha = 1 + inhibitor / ki
+    if mechanism != "Mixed Inhibition":
+        alpha_prime = alpha
+    apparent_km, apparent_vmax = apparent_parameters(mechanism, km, vmax, alpha, alpha_prime)
+    velocity = michaelis_menten(float(substrate), apparent_km, apparent_vmax)
+    return np.stack([apparent_km, apparent_vmax, velocity])
+
+
+def _row_terms(f_a, f_b, f_ab):
+    # Per-row terms whose means make up the estimators, stacked as (terms, n):
+    # f_A, f_A², f_B, f_B² per output, then the Saltelli (2010) first-order
+    # term f_B·(f_ABi - f_A) and the Jansen total term ½(f_A - f_ABi)² per
+    # output and input. f_a, f_b are (outputs, n) and f_ab (outputs, inputs, n).
+    n = f_a.shape[-1]
+    return np.concatenate([f_a, f_a**2, f_b, f_b**2,
+                           (f_b[:, None] * (f_ab - f_a[:, None])).reshape(-1, n),
+                           (0.5 * (f_a[:, None] - f_ab) ** 2).reshape(-1, n)])
+
+
+def _indices(means, outputs):
+    # (first, total), each (outputs, inputs, ...), from the means of _row_terms
+    mean_a, square_a, mean_b, square_b, first, total = np.split(
+        means, np.cumsum([outputs] * 4 + [(len(means) - 4 * outputs) // 2]))
+    variance = (square_a + square_b) / 2 - ((mean_a + mean_b) / 2) ** 2
+    shape = (outputs, -1) + means.shape[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return first.reshape(shape) / variance[:, None], total.reshape(shape) / variance[:, None]
+
+
+def sobol_indices(mechanism, substrate=1.0, n_base=BASE_SAMPLES, bootstrap=BOOTSTRAP_ROUNDS, seed=0):
+    # One row per (output, input): S1 and ST with the half-width of their
+    # bootstrap confidence intervals (CONFIDENCE). An output that does not vary
+    # would have NaN indices.
+    if mechanism not in MECHANISMS:
+        raise ValueError(f"Unknown inhibition mechanism: {mechanism}")
+    a, b, ab = saltelli_samples(n_base, seed)
+    f_a = kinetic_outputs(mechanism, a, substrate)
+    terms = _row_terms(f_a, kinetic_outputs(mechanism, b, substrate), kinetic_outputs(mechanism, ab, substrate))
+    first, total = _indices(terms.mean(axis=1), len(f_a))
+
+    # A bootstrap round resamples the base rows with replacement, which is the
+    # same as weighting each row by how often it was drawn. The weighted means
+    # of all rounds are then one matrix product (in blocks, to bound memory).
+    rng = np.random.default_rng(seed)
+    means = np.empty((len(terms), bootstrap))
+    for start in range(0, bootstrap, BOOTSTRAP_BLOCK):
+        rounds = min(BOOTSTRAP_BLOCK, bootstrap - start)
+        draws = rng.integers(0, n_base, (rounds, n_base)) + n_base * np.arange(rounds)[:, None]
+        counts = np.bincount(draws.ravel(), minlength=rounds * n_base).reshape(rounds, n_base)
+        means[:, start:start + rounds] = terms @ counts.T / n_base
+    tail = 100 * (1 - CONFIDENCE) / 2
+    low, high = np.percentile(np.stack(_indices(means, len(f_a))), [tail, 100 - tail], axis=-1)
+    half_width = (high - low) / 2
+
+    inputs = list(SENSITIVITY_INPUTS)
+    return pd.DataFrame({
+        "output": np.repeat(SENSITIVITY_OUTPUTS, len(inputs)),
+        "input": inputs * len(SENSITIVITY_OUTPUTS),
+        "S1": first.ravel(),
+        "S1_conf": half_width[0].ravel(),
+        "ST": total.ravel(),
+        "ST_conf": half_width[1].ravel(),
+    })
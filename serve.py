@@ -0,0 +1,37 @@
+# ASGI entry point that runs the poster with long-lived cache headers on the
+# content-hashed files written by build_assets.py.
+#
+# Usage: python build_assets.py && uvicorn serve:app --host 0.0.0.0 --port 8501
+# (`streamlit run enzyme_poster_final.py` also serves static/, just without
+# the Cache-Control header.)
+import re
+
+import streamlit as st
+from starlette.datastructures import MutableHeaders
+from starlette.middleware import Middleware
+
+STATIC_ROUTE = "/app/static/"
+HASHED_ASSET = re.compile(r"\.[0-9a-f]{12}\.(svg|css)$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+class StaticCacheHeaders:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        if STATIC_ROUTE not in path or not HASHED_ASSET.search(path):
+            await self.app(scope, receive, send)
+            return
+
+        # Hashed names change whenever the content does, so they never go stale
+        async def send_with_cache_headers(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                MutableHeaders(scope=message)["Cache-Control"] = IMMUTABLE_CACHE
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
+
+
+app = st.App("enzyme_poster_final.py", middleware=[Middleware(StaticCacheHeaders)])
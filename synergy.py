@@ -0,0 +1,236 @@
+# Drug-combination analysis of checkerboard plates (Combination Synergy tab).
+# Every combination is a matrix of activity (%) over concentrations of drug A
+# (rows) and drug B (columns), with a zero-dose row and column giving the
+# single agents. All combinations are padded into (plates, rows, columns)
+# arrays and analysed together:
+#   - single-agent Hill curves, fitted in one batch (fitting.fit_hill_batch)
+#   - reference surfaces for no interaction: HSA (the better single agent),
+#     Bliss independence and Loewe additivity
+#   - excess surfaces, observed effect minus each reference (> 0 is synergy)
+#   - Greco's universal response surface, a/A(E) + b/B(E) + α·ab/(A(E)B(E)) = 1,
+#     fitted per combination; α > 0 is synergy, α < 0 antagonism, α = 0 Loewe
+# Effects are fractions inhibited, E = 1 - activity/100. The Loewe and Greco
+# surfaces have no closed form; they are solved for every well of every plate
+# at once by scanning effect levels for the root and bisecting. Nothing here
+# depends on Streamlit.
+import numpy as np
+import pandas as pd
+
+from fitting import fit_hill_batch
+
+CHECKERBOARD_COLUMNS = ("combination", "conc_a", "conc_b", "activity")
+REFERENCE_MODELS = ("HSA", "Bliss", "Loewe")
+SCAN_LEVELS = 32  # effect levels scanned for the root before bisection
+BISECTION_STEPS = 24
+# Greco α is fitted as log(1 + α), first on a grid and then by golden-section search
+ALPHA_GRID = np.linspace(-4.6, 4.6, 25)  # α from -0.99 to 98
+GOLDEN_STEPS = 20
+
+
+def read_checkerboards(df):
+    # Long-format rows (combination, conc_a, conc_b, activity, optional drug_a and
+    # drug_b) -> (names, drugs, conc_a (P, m), conc_b (P, n), activity (P, m, n)).
+    # Concentrations are sorted per combination and padded with NaN; replicate
+    # wells are averaged.
+    missing = [c for c in CHECKERBOARD_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Checkerboard data is missing columns: {', '.join(missing)}")
+    df = df.dropna(subset=list(CHECKERBOARD_COLUMNS))
+    if df.empty:
+        raise ValueError("No checkerboard wells to analyse")
+    plate, names = pd.factorize(df["combination"].astype(str), sort=False)
+    row = df.groupby(plate)["conc_a"].rank(method="dense").to_numpy(int) - 1
+    col = df.groupby(plate)["conc_b"].rank(method="dense").to_numpy(int) - 1
+    shape = (len(names), row.max() + 1, col.max() + 1)
+
+    sums = np.zeros(shape)
+    counts = np.zeros(shape)
+    np.add.at(sums, (plate, row, col), df["activity"].to_numpy(float))
+    np.add.at(counts, (plate, row, col), 1)
+    conc_a = np.full(shape[:2], np.nan)
+    conc_b = np.full((shape[0], shape[2]), np.nan)
+    conc_a[plate, row] = df["conc_a"].to_numpy(float)
+    conc_b[plate, col] = df["conc_b"].to_numpy(float)
+    if not ((conc_a[:, 0] == 0) & (conc_b[:, 0] == 0)).all():
+        raise ValueError("Every combination needs a zero-dose row and column (the single agents)")
+    with np.errstate(invalid="ignore"):
+        activity = sums / counts
+
+    drugs = [("A", "B")] * len(names)
+    if {"drug_a", "drug_b"} <= set(df.columns):
+        first = df.groupby(plate)[["drug_a", "drug_b"]].first()
+        drugs = list(first.itertuples(index=False, name=None))
+    return list(names), drugs, conc_a, conc_b, activity
+
+
+def _hill_effect(conc, e0, emax, ic50, hill_slope):
+    # Fraction inhibited by one agent alone
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return e0 + (emax - e0) / (1 + (ic50 / conc) ** hill_slope)
+
+
+def _dose_for_effect(effect, e0, emax, ic50, hill_slope):
+    # Inverse Hill: the dose of one agent alone that gives the effect; 0 at or
+    # below its baseline, inf at or beyond its maximum
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dose = ic50 * ((effect - e0) / (emax - effect)) ** (1 / hill_slope)
+    return np.where(effect <= e0, 0.0, np.where(effect >= emax, np.inf, dose))
+
+
+def _greco_residual(effect, a, b, agent_a, agent_b, alpha):
+    # a/A(E) + b/B(E) + α·ab/(A(E)B(E)) - 1; positive below the effect the
+    # combination reaches, and NaN (never positive) where α < 0 makes it -inf
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.where(a > 0, a / _dose_for_effect(effect, *agent_a), 0.0)
+        y = np.where(b > 0, b / _dose_for_effect(effect, *agent_b), 0.0)
+        cross = np.where((x == 0) | (y == 0) | (alpha == 0), 0.0, alpha * x * y)
+        return x + y + cross - 1
+
+
+def greco_effect(a, b, agent_a, agent_b, alpha=0.0):
+    # Effect of every (a, b) under Greco's model (Loewe additivity for α = 0).
+    # a, b, alpha and each agent's (e0, emax, ic50, hill) broadcast together.
+    # The root is the largest effect where the residual turns from positive to
+    # not positive: scan SCAN_LEVELS levels between the agents' baselines and
+    # maxima, then bisect inside that cell.
+    low = np.minimum(agent_a[0], agent_b[0])
+    high = np.maximum(agent_a[1], agent_b[1])
+    a, b, alpha, low, high = np.broadcast_arrays(a, b, alpha, low, high)
+    levels = low[..., None] + (high - low)[..., None] * np.linspace(0, 1, SCAN_LEVELS)
+    expand = [tuple(np.asarray(p)[..., None] for p in agent) for agent in (agent_a, agent_b)]
+    positive = _greco_residual(levels, a[..., None], b[..., None], *expand, alpha[..., None]) > 0
+    crossing = positive[..., :-1] & ~positive[..., 1:]
+    cell = SCAN_LEVELS - 2 - np.argmax(crossing[..., ::-1], axis=-1)
+    lo = np.take_along_axis(levels, cell[..., None], axis=-1)[..., 0]
+    hi = np.take_along_axis(levels, cell[..., None] + 1, axis=-1)[..., 0]
+    for _ in range(BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        above = _greco_residual(mid, a, b, agent_a, agent_b, alpha) > 0
+        lo, hi = np.where(above, mid, lo), np.where(above, hi, mid)
+    effect = (lo + hi) / 2
+    # No crossing: every level is below the root (cap at the maximum) or none is
+    effect = np.where(crossing.any(axis=-1), effect, np.where(positive[..., -1], high, low))
+    return np.where(np.isfinite(low) & np.isfinite(high), effect, np.nan)
+
+
+def _fit_alpha(observed, a, b, agent_a, agent_b, combined):
+    # Least-squares Greco α per plate over the combination wells: a grid over
+    # log(1 + α), refined by golden-section search around the best grid point
+    def sse(theta):
+        fitted = greco_effect(a, b, agent_a, agent_b, np.expm1(theta)[:, None, None])
+        return np.nansum(np.where(combined, (fitted - observed) ** 2, np.nan), axis=(1, 2))
+
+    scores = np.stack([sse(np.full(len(observed), theta)) for theta in ALPHA_GRID], axis=1)
+    best = np.argmin(scores, axis=1)
+    lo = ALPHA_GRID[np.maximum(best - 1, 0)]
+    hi = ALPHA_GRID[np.minimum(best + 1, len(ALPHA_GRID) - 1)]
+    ratio = (np.sqrt(5) - 1) / 2
+    left, right = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    f_left, f_right = sse(left), sse(right)
+    for _ in range(GOLDEN_STEPS):
+        # Keep [lo, right] or [left, hi]; the kept interior point is reused, so
+        # only one new point per plate is evaluated
+        keep_low = f_left < f_right
+        lo, hi = np.where(keep_low, lo, left), np.where(keep_low, right, hi)
+        new_left = np.where(keep_low, hi - ratio * (hi - lo), right)
+        new_right = np.where(keep_low, left, lo + ratio * (hi - lo))
+        fresh = sse(np.where(keep_low, new_left, new_right))
+        f_left, f_right = np.where(keep_low, fresh, f_right), np.where(keep_low, f_left, fresh)
+        left, right = new_left, new_right
+    return np.expm1((lo + hi) / 2)
+
+
+def analyze_checkerboards(conc_a, conc_b, activity, fit_alpha=True):
+    # Everything for P combinations at once. Returns (per-combination dict of
+    # arrays, per-well dict of (P, m, n) surfaces): single-agent fits, the
+    # reference surfaces, their excess over observation and the Greco fit.
+    # Effects are fractions; mean excess scores are in % over combination wells.
+    observed = 1 - activity / 100
+    a, b = conc_a[:, :, None], conc_b[:, None, :]
+    combined = (a > 0) & (b > 0) & np.isfinite(observed)
+
+    # Drug A alone is the zero-dose column of B, drug B alone the zero-dose row
+    fits, _ = fit_hill_batch(np.concatenate([conc_a, conc_b]),
+                             np.concatenate([activity[:, :, 0], activity[:, 0, :]]))
+    plates = len(conc_a)
+    agents = []
+    for part in (slice(0, plates), slice(plates, 2 * plates)):
+        e0, emax = 1 - fits["top"][part] / 100, 1 - fits["bottom"][part] / 100
+        agents.append(tuple(p[:, None, None] for p in (e0, emax, fits["ic50"][part], fits["hill_slope"][part])))
+    agent_a, agent_b = agents
+
+    effect_a, effect_b = _hill_effect(a, *agent_a), _hill_effect(b, *agent_b)
+    references = {
+        "HSA": np.maximum(effect_a, effect_b),
+        "Bliss": effect_a + effect_b - effect_a * effect_b,
+        "Loewe": greco_effect(a, b, agent_a, agent_b),
+    }
+    surfaces = {"observed": np.where(np.isfinite(observed), observed, np.nan)}
+    summary = {}
+    for model, reference in references.items():
+        excess = np.where(combined, observed - reference, np.nan)
+        surfaces[model] = reference
+        surfaces[f"{model} excess"] = excess
+        with np.errstate(invalid="ignore"):
+            summary[f"{model.lower()}_score"] = 100 * np.nanmean(excess, axis=(1, 2))
+
+    if fit_alpha:
+        alpha = _fit_alpha(observed, a, b, agent_a, agent_b, combined)
+        surfaces["Greco fit"] = greco_effect(a, b, agent_a, agent_b, alpha[:, None, None])
+        residual = np.where(combined, surfaces["Greco fit"] - observed, np.nan)
+        summary["greco_alpha"] = alpha
+        with np.errstate(invalid="ignore"):
+            summary["greco_rmse_pct"] = 100 * np.sqrt(np.nanmean(residual ** 2, axis=(1, 2)))
+
+    for drug, part in (("a", slice(0, plates)), ("b", slice(plates, 2 * plates))):
+        summary[f"ic50_{drug}_uM"] = fits["ic50"][part]
+        summary[f"hill_{drug}"] = fits["hill_slope"][part]
+        summary[f"emax_{drug}_pct"] = 100 - fits["bottom"][part]
+    return summary, surfaces
+
+
+def synergy_summary(names, drugs, summary):
+    # One row per combination, as shown and exported by the Synergy tab
+    frame = pd.DataFrame({"combination": names, "drug_a": [d[0] for d in drugs], "drug_b": [d[1] for d in drugs]})
+    for key, values in summary.items():
+        frame[key] = values
+    return frame
+
+
+def synergy_wells(names, conc_a, conc_b, surfaces):
+    # Long format, one row per well that was measured: the observed effect, the
+    # reference and excess surfaces and the Greco fit, in %
+    plate, row, col = np.nonzero(np.isfinite(surfaces["observed"]))
+    frame = pd.DataFrame({"combination": np.asarray(names, dtype=object)[plate],
+                          "conc_a": conc_a[plate, row], "conc_b": conc_b[plate, col]})
+    for key, values in surfaces.items():
+        frame[key.lower().replace(" ", "_") + "_pct"] = 100 * values[plate, row, col]
+    return frame
+
+
+def example_checkerboards(n_combinations=12, doses=8, noise_sd=3.0, seed=0):
+    # Synthetic checkerboards from Greco's model with known α, in the long
+    # format read_checkerboards takes (for the tab's demo and for checking
+    # that the fit recovers α)
+    rng = np.random.default_rng(seed)
+    alpha = np.round(np.expm1(rng.uniform(-1.5, 2.5, n_combinations)), 2)
+    agent_a = (np.zeros(n_combinations), rng.uniform(0.85, 1.0, n_combinations),
+               10 ** rng.uniform(-1, 1, n_combinations), rng.uniform(0.8, 2.0, n_combinations))
+    agent_b = (np.zeros(n_combinations), rng.uniform(0.85, 1.0, n_combinations),
+               10 ** rng.uniform(-1, 1, n_combinations), rng.uniform(0.8, 2.0, n_combinations))
+    steps = np.concatenate([[0.0], 2.0 ** np.arange(-(doses - 3), 2)])
+    conc_a = agent_a[2][:, None] * 4 * steps / steps[-1]
+    conc_b = agent_b[2][:, None] * 4 * steps / steps[-1]
+    effect = greco_effect(conc_a[:, :, None], conc_b[:, None, :],
+                          tuple(p[:, None, None] for p in agent_a), tuple(p[:, None, None] for p in agent_b),
+                          alpha[:, None, None])
+    activity = 100 * (1 - effect) + rng.normal(0, noise_sd, effect.shape)
+    plate, i, j = np.meshgrid(np.arange(n_combinations), np.arange(doses), np.arange(doses), indexing="ij")
+    return pd.DataFrame({
+        "combination": [f"combo-{p + 1:02d} (α={alpha[p]:g})" for p in plate.ravel()],
+        "drug_a": [f"A{p + 1}" for p in plate.ravel()],
+        "drug_b": [f"B{p + 1}" for p in plate.ravel()],
+        "conc_a": conc_a[plate, i].ravel(),
+        "conc_b": conc_b[plate, j].ravel(),
+        "activity": activity.ravel(),
+    })